@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+""" 제어 엔드포인트로 트리거를 대량 주입하면서 /metrics를 계속 긁어도 재생 경로 지연이 늘지 않는지 측정 """
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DDDS_EVENT_LOG", os.devnull)
+
+from control import ControlServer
+from media_index import MediaIndex, DEFAULT_TRACKS
+from pipeline import TriggerWorker
+from player import FakePlayer
+from scheduler import TriggerScheduler, FIFO
+from tracing import Tracer, Histogram
+
+
+def make_media(root):
+    folder = os.path.join(root, "USB", "final")
+    os.makedirs(folder)
+    for filename in DEFAULT_TRACKS.values():
+        with open(os.path.join(folder, filename), "wb") as f:
+            f.write(b"\0" * 1024)
+    media = MediaIndex(base_path=root)
+    media.refresh()
+    return media
+
+
+def scrape(port, stop, hist):
+    """ 멈출 때까지 /metrics를 쉬지 않고 요청 """
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    while not stop.is_set():
+        t0 = time.monotonic_ns()
+        conn.request("GET", "/metrics")
+        conn.getresponse().read()
+        hist.record((time.monotonic_ns() - t0) // 1000)
+    conn.close()
+
+
+def run(args, scrapers):
+    tracer = Tracer()
+    with tempfile.TemporaryDirectory() as root:
+        media = make_media(root)
+        worker = TriggerWorker(FakePlayer(duration=0.0), media, TriggerScheduler(FIFO, maxsize=args.batch * 4))
+        control = ControlServer(worker, "127.0.0.1:0", tracer=tracer).start()
+        port = control.server.server_address[1]
+        worker_thread = threading.Thread(target=worker.run)
+        worker_thread.start()
+
+        stop = threading.Event()
+        scrape_hist = Histogram()
+        threads = [threading.Thread(target=scrape, args=(port, stop, scrape_hist)) for _ in range(scrapers)]
+        for t in threads:
+            t.start()
+
+        codes = sorted(DEFAULT_TRACKS)
+        body = "\n".join(codes[i % len(codes)] for i in range(args.batch)).encode()
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        injected = 0
+        started = time.monotonic()
+        while time.monotonic() - started < args.duration:
+            conn.request("POST", "/trigger?device=bench", body)
+            injected += json.loads(conn.getresponse().read())["injected"]
+            time.sleep(args.interval)
+        elapsed = time.monotonic() - started
+
+        while worker.scheduler.has_pending():
+            time.sleep(0.01)
+        stop.set()
+        for t in threads:
+            t.join()
+        conn.close()
+        worker.stop()
+        worker_thread.join()
+        control.stop()
+
+    started_hist = Histogram()
+    for (_, stage), (total, _) in tracer.histograms.items():
+        if stage == "started":
+            started_hist.merge(total)
+    latency = started_hist.snapshot()
+    scrapes = scrape_hist.snapshot()
+    return {
+        "scrapers": scrapers,
+        "injected": injected,
+        "played": worker.played,
+        "inject_per_s": injected / elapsed,
+        "started_p50_ms": latency.get("p50_ms", 0.0),
+        "started_p99_ms": latency.get("p99_ms", 0.0),
+        "scrapes": scrapes["count"],
+        "scrape_p50_ms": scrapes.get("p50_ms", 0.0),
+        "scrape_p99_ms": scrapes.get("p99_ms", 0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=3.0, help="주입 시간 (초)")
+    parser.add_argument("--batch", type=int, default=50, help="POST 한 번에 넣는 트리거 수")
+    parser.add_argument("--interval", type=float, default=0.01, help="POST 사이 간격 (초)")
+    parser.add_argument("--scrapers", type=int, default=2, help="동시에 /metrics를 긁는 클라이언트 수")
+    args = parser.parse_args()
+
+    results = [run(args, 0), run(args, args.scrapers)]
+    json.dump({"python": sys.version.split()[0], "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
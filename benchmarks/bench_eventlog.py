@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+""" 로그 한 줄의 호출 비용: print(느린 파이프) vs EventLog.event (p50/p99/최대, ns) """
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eventlog import EventLog
+
+
+def measure(fn, n, interval):
+    """ interval초 간격으로 호출 (실제 트리거처럼 띄엄띄엄, 0이면 연속) """
+    costs = []
+    for i in range(n):
+        t0 = time.perf_counter_ns()
+        fn(i)
+        costs.append(time.perf_counter_ns() - t0)
+        if interval:
+            time.sleep(interval)
+    costs.sort()
+    return costs[n // 2], costs[n * 99 // 100], costs[n * 999 // 1000], costs[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--interval", type=float, default=0.0002, help="이벤트 간격 (초)")
+    parser.add_argument("--reader-delay", type=float, default=0.001,
+                        help="느린 로그 수신자(journald/SD카드 흉내)가 줄마다 쉬는 시간 (초)")
+    args = parser.parse_args()
+
+    # 느리게 읽는 파이프: 버퍼가 차면 print가 그 자리에서 막힘
+    reader = subprocess.Popen(
+        [sys.executable, "-c",
+         f"import sys,time\nfor _ in sys.stdin: time.sleep({args.reader_delay})"],
+        stdin=subprocess.PIPE, text=True)
+    slow = reader.stdin
+
+    def print_slow(i):
+        print(f"🎵 MP3 실행 요청: /media/pi/USB/final/stemon{i % 4 + 1}.mp3", file=slow, flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = EventLog(os.path.join(tmp, "events.jsonl"), capacity=4096)
+
+        def event(i):
+            log.event("play", "08:D1:F9:26:65:D2", i, 0, f"stemon{i % 4 + 1}.mp3")
+
+        for name, fn, count in (("print → slow pipe", print_slow, args.events), ("EventLog.event", event, args.events)):
+            p50, p99, p999, worst = measure(fn, count, args.interval)
+            print(f"{name:>18}: p50={p50:>8,}ns p99={p99:>10,}ns p99.9={p999:>12,}ns "
+                  f"max={worst:>12,}ns (n={count})")
+
+        log.close()
+        print(f"{'':>18}  eventlog written={log.written} dropped={log.dropped}")
+
+    reader.kill()
+
+
+if __name__ == "__main__":
+    main()
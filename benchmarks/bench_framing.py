@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+""" 트리거 버스트를 임의 크기 조각으로 보내서 프레이머가 손실 없이 분리하는지 확인 """
+import argparse
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from framing import LineFramer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000, help="보낼 트리거 수")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payload = b"".join(f"{rng.randint(1, 4)}\r\n".encode() for _ in range(args.count))
+    expected = payload.decode().split()
+
+    sender, receiver = socket.socketpair()
+
+    def send():
+        # 여러 트리거가 붙거나 하나가 잘려서 오도록 1~64바이트 조각으로 전송
+        pos = 0
+        while pos < len(payload):
+            n = rng.randint(1, 64)
+            sender.sendall(payload[pos:pos + n])
+            pos += n
+        sender.close()
+
+    thread = threading.Thread(target=send)
+    framer = LineFramer()
+    received = []
+
+    t0 = time.perf_counter()
+    thread.start()
+    try:
+        while True:
+            received.extend(framer.recv_from(receiver))
+    except ConnectionResetError:
+        pass
+    elapsed = time.perf_counter() - t0
+    thread.join()
+
+    print(f"sent={len(expected)} parsed={len(received)} lossless={received == expected} "
+          f"overflows={framer.overflows} rate={len(received) / elapsed:.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+""" 시뮬레이션 ESP32(로컬 TCP)로 DeviceHub의 장치당 메모리/CPU 측정 (2 / 16 / 64대) """
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hub import DeviceHub
+
+
+def run_devices(count, rate, conn):
+    """ 자식 프로세스: 장치 수만큼 TCP 서버를 열고, 접속하면 초당 rate개 트리거 전송 """
+    async def handle(reader, writer):
+        code = 0
+        try:
+            while True:
+                code = code % 4 + 1
+                writer.write(f"{code}\n".encode())
+                await writer.drain()
+                await asyncio.sleep(1.0 / rate)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def main():
+        servers = [await asyncio.start_server(handle, "127.0.0.1", 0) for _ in range(count)]
+        conn.send([f"tcp://127.0.0.1:{server.sockets[0].getsockname()[1]}" for server in servers])
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)  # 종료 신호 대기
+
+    asyncio.run(main())
+
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def measure(count, rate, seconds):
+    parent, child = multiprocessing.Pipe()
+    devices = multiprocessing.Process(target=run_devices, args=(count, rate, child), daemon=True)
+    devices.start()
+    addresses = parent.recv()
+
+    received = [0]
+
+    def on_message(address, message, span):
+        received[0] += 1
+
+    async def main():
+        rss_before = rss_kb()
+        hub = DeviceHub(addresses, on_message, retry_delay=0.1)
+        task = asyncio.create_task(hub.run())
+
+        while not all(d.connected for d in hub.devices.values()):
+            await asyncio.sleep(0.01)
+
+        cpu0 = time.process_time()
+        msgs0 = received[0]
+        await asyncio.sleep(seconds)
+        cpu = time.process_time() - cpu0
+        msgs = received[0] - msgs0
+        rss = rss_kb() - rss_before
+
+        hub.stop()
+        await task
+        return rss, cpu, msgs
+
+    rss, cpu, msgs = asyncio.run(main())
+    parent.send(None)
+    devices.join()
+
+    print(f"devices={count:>3} rss/device={rss / count:.1f}KB "
+          f"cpu/device={cpu / seconds / count * 100:.3f}% msgs/s={msgs / seconds:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[2, 16, 64])
+    parser.add_argument("--rate", type=float, default=5.0, help="장치당 초당 트리거 수")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for count in args.counts:
+        measure(count, args.rate, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+""" 라우드니스 분석: 작업 프로세스 수별 색인 시간, 측정값을 기억한 뒤의 재색인 시간
+
+    --folder로 실제 'final/' 폴더를 주면 ffmpeg ebur128로, 아니면 합성 파일과 CPU만 쓰는 측정 함수로 잼
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DDDS_EVENT_LOG", os.devnull)
+
+from loudness import LoudnessAnalyzer, measure_loudness
+from media_index import MediaIndex
+
+
+def synthetic_measure(path):
+    """ ffmpeg 대신 바이트를 16비트 샘플로 보고 RMS/피크 계산 (디코딩만큼 CPU를 씀) """
+    with open(path, "rb") as f:
+        data = f.read()
+    total = peak = 0
+    for i in range(0, len(data) - 1, 2):
+        sample = int.from_bytes(data[i:i + 2], "little", signed=True)
+        total += sample * sample
+        peak = max(peak, abs(sample))
+    rms = math.sqrt(total / max(1, len(data) // 2)) / 32768
+    return 20 * math.log10(max(rms, 1e-9)) - 0.691, 20 * math.log10(max(peak, 1) / 32768)
+
+
+def make_library(root, files, size_kb):
+    folder = os.path.join(root, "USB", "final")
+    os.makedirs(folder)
+    rng = random.Random(1)
+    for i in range(files):
+        scale = (0.1, 0.3, 1.0)[i % 3]  # 소스마다 다른 볼륨
+        samples = [int(rng.gauss(0, 6000 * scale)) for _ in range(size_kb * 512)]
+        with open(os.path.join(folder, f"clip{i:03d}.mp3"), "wb") as f:
+            f.write(b"".join(max(-32768, min(32767, s)).to_bytes(2, "little", signed=True) for s in samples))
+    return root
+
+
+def run(base, workers, measure, cache_path):
+    analyzer = LoudnessAnalyzer(workers=workers, cache_path=cache_path, measure=measure)
+    media = MediaIndex(base_path=base, loudness=analyzer)
+    started = time.perf_counter()
+    media.refresh()
+    first = time.perf_counter() - started
+
+    # 재시작 흉내: 새 색인과 새 분석기, 측정값은 파일에서
+    analyzer = LoudnessAnalyzer(workers=workers, cache_path=cache_path, measure=measure)
+    media = MediaIndex(base_path=base, loudness=analyzer)
+    started = time.perf_counter()
+    media.refresh()
+    again = time.perf_counter() - started
+
+    gains = sorted(entry.gain for entry in media.by_file.values())
+    return {
+        "workers": workers,
+        "tracks": len(media.by_file),
+        "index_ms": round(first * 1000, 1),
+        "reindex_cached_ms": round(again * 1000, 1),
+        "analyzed": analyzer.analyzed,  # 두 번째 색인에서 새로 잰 트랙 (0이어야 함)
+        "errors": analyzer.errors,
+        "gain_min": gains[0] if gains else None,
+        "gain_max": gains[-1] if gains else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--folder", help="실제 MP3가 있는 'final/' 폴더 (ffmpeg 필요)")
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        if args.folder:
+            if not shutil.which("ffmpeg"):
+                sys.exit("ffmpeg가 필요함")
+            base = os.path.join(root, "media")
+            shutil.copytree(args.folder, os.path.join(base, "USB", "final"))
+            measure = measure_loudness
+        else:
+            base = make_library(os.path.join(root, "media"), args.files, args.size_kb)
+            measure = synthetic_measure
+
+        results = [run(base, workers, measure, os.path.join(root, f"loudness-{i}.json"))
+                   for i, workers in enumerate(args.workers)]
+    json.dump({"python": sys.version.split()[0], "cpus": os.cpu_count(),
+               "measure": measure.__name__, "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
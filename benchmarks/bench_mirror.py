@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+""" USB 라이브러리 → 로컬 사본 동기화: 처음 복사, 변경 없음, 파일 하나 변경, USB 제거 후 재생 가능 여부 """
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DDDS_EVENT_LOG", os.devnull)
+
+from mirror import MirroredIndex
+
+
+def write_track(path, size):
+    with open(path, "wb") as f:
+        f.write(os.urandom(size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=40, help="트랙 수")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="트랙 하나의 크기 (MB)")
+    args = parser.parse_args()
+
+    size = int(args.size_mb * (1 << 20))
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        usb = os.path.join(root, "media", "STICK", "final")
+        os.makedirs(usb)
+        names = [f"track{i:03d}.mp3" for i in range(args.files)]
+        for name in names:
+            write_track(os.path.join(usb, name), size)
+
+        index = MirroredIndex(base_path=os.path.join(root, "media"), mirror_dir=os.path.join(root, "mirror"),
+                              tracks={str(i): name for i, name in enumerate(names)})
+
+        def sync(step):
+            started = time.monotonic()
+            index.refresh()
+            result = dict(index.last_sync or {}, step=step, wall_ms=round((time.monotonic() - started) * 1000, 1))
+            result["playable"] = len(index.by_file)
+            result["local"] = all(e.path.startswith(index.mirror_dir) for e in index.by_file.values())
+            results.append(result)
+
+        sync("cold")
+        sync("unchanged")
+        write_track(os.path.join(usb, names[0]), size)
+        sync("one_changed")
+        os.rename(os.path.join(root, "media", "STICK"), os.path.join(root, "unplugged"))
+        sync("unplugged")
+
+        # 새 프로세스처럼: manifest만으로 바로 재생 가능한지
+        reopened = MirroredIndex(base_path=os.path.join(root, "media"), mirror_dir=os.path.join(root, "mirror"))
+        results.append({"step": "restart_without_usb", "playable": len(reopened.by_file)})
+
+    json.dump({"python": sys.version.split()[0], "files": args.files, "size_mb": args.size_mb,
+               "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
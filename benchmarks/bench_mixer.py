@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+""" 동시 재생 채널 수에 따른 믹서 블록 계산 시간과 CPU (출력 없이 실시간 속도로 측정) """
+import argparse
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mixer import Mixer, np
+
+
+class NullSink:
+    """ aplay 대신 재생 속도만 흉내 내는 출력 """
+
+    def __init__(self, sample_rate, channels):
+        self.bytes_per_second = sample_rate * channels * 2
+        self.next_at = None
+
+    def write(self, data):
+        now = time.monotonic()
+        if self.next_at is None or self.next_at < now:
+            self.next_at = now
+        self.next_at += len(data) / self.bytes_per_second
+        time.sleep(max(0.0, self.next_at - now - 0.05))  # 50ms 버퍼만큼 앞서 나감
+        return len(data)
+
+    def close(self):
+        pass
+
+
+class ToneClip:
+    """ PcmClip 대신 쓰는 메모리 속 사인파 """
+
+    def __init__(self, seconds, sample_rate, channels, freq):
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        mono = (np.sin(2 * np.pi * freq * t) * 12000).astype(np.int16)
+        self.data = memoryview(np.repeat(mono, channels).tobytes())
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+
+class ToneCache:
+    def __init__(self, sample_rate=44100, channels=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+
+def run(voices, seconds, block_frames):
+    cache = ToneCache()
+    mixer = Mixer(cache, media=None, sink=NullSink(cache.sample_rate, cache.channels), block_frames=block_frames)
+    for i in range(voices):
+        channel = mixer.channel(f"dev{i}", ducks=(i == 0 and voices > 1))
+        with mixer.cond:
+            channel.clip = ToneClip(seconds, cache.sample_rate, cache.channels, 220 * (i + 1))
+            channel.position = 0
+            mixer.cond.notify()
+
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.monotonic()
+    while any(c.active for c in mixer.channels.values()):
+        time.sleep(0.05)
+    elapsed = time.monotonic() - start
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    mixer.close()
+
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    stats = mixer.stats()
+    print(f"voices={voices:2d} blocks={stats['blocks']} mix={stats['mix_ms_per_block'] * 1000:.0f}µs/block "
+          f"(block={block_frames / cache.sample_rate * 1000:.1f}ms) underruns={stats['underruns']} "
+          f"cpu={cpu / elapsed * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--voices", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=2.0, help="채널마다 재생할 길이")
+    parser.add_argument("--block-frames", type=int, default=1024)
+    args = parser.parse_args()
+
+    for voices in args.voices:
+        run(voices, args.seconds, args.block_frames)
+
+
+if __name__ == "__main__":
+    main()
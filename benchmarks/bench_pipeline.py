@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+""" 실제 ESP32/USB/VLC 없이 수신 → 대기열 → 재생 파이프라인 전체를 돌려보는 벤치마크 """
+import argparse
+import contextlib
+import json
+import os
+import queue
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DDDS_EVENT_LOG", os.devnull)  # 파이프라인 이벤트 로그는 결과와 섞이지 않게 버림
+
+from debounce import TriggerFilter
+from media_index import MediaIndex, DEFAULT_TRACKS
+from pipeline import TriggerReceiver, TriggerWorker
+from player import FakePlayer
+from protocol import ProtocolSender
+from replay import TriggerRecorder, summarize
+from scheduler import TriggerScheduler, PREEMPT, LATEST, FIFO
+from tracing import Tracer, Histogram
+from transports import connect as transport_connect
+
+WORKLOADS = ("steady", "burst", "many", "storm", "bounce")
+TRANSPORTS = ("socketpair", "tcp", "unix", "udp")
+
+
+class SimulatedDevice:
+    """ 트리거를 보내는 가짜 ESP32 (socketpair는 BluetoothSocket 대신, 나머지는 실제 로컬 소켓 서버) """
+
+    def __init__(self, address, schedule, reconnect_every=0, transport="socketpair", root=None, repeat=1,
+                 binary=False):
+        self.schedule = schedule  # 시작 시점부터의 전송 시각 목록 (초)
+        self.repeat = repeat  # 같은 코드를 연달아 보내는 횟수 (버튼 채터링 흉내)
+        self.binary = binary and transport != "udp"  # 연결마다 HELLO로 바이너리 프로토콜 협상
+        self.sender = ProtocolSender()
+        self.bytes = 0  # 보낸 바이트 수 (무선 구간 점유량 비교용)
+        self.reconnect_every = reconnect_every  # 메시지 N개마다 연결을 끊음 (0이면 유지)
+        self.transport = transport
+        self.peers = queue.Queue()  # 수신 쪽과 연결된 상대편 소켓
+        self.peer = None
+        self.listener = None
+        self.sent = 0
+        self.thread = threading.Thread(target=self._send, daemon=True)
+        self.connect = transport_connect
+
+        if transport == "socketpair":
+            self.address = address
+            self.connect = self._socketpair
+        elif transport in ("tcp", "unix"):
+            if transport == "tcp":
+                self.listener = socket.create_server(("127.0.0.1", 0))
+                self.address = f"tcp://127.0.0.1:{self.listener.getsockname()[1]}"
+            else:
+                path = os.path.join(root, address.replace(":", "") + ".sock")
+                self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.listener.bind(path)
+                self.listener.listen()
+                self.address = "unix://" + path
+            threading.Thread(target=self._accept, daemon=True).start()
+        else:
+            # UDP는 연결이 없으므로 끊기 시나리오도 없음
+            self.reconnect_every = 0
+            probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+            probe.close()
+            self.address = f"udp://127.0.0.1:{port}"
+            peer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            peer.connect(("127.0.0.1", port))
+            self.peers.put(peer)
+
+    def start(self, started):
+        self.started = started
+        self.thread.start()
+
+    def join(self):
+        self.thread.join()
+
+    def close(self):
+        """ 수신 루프가 recv에서 빠져나오도록 상대편을 닫음 """
+        if self.listener:
+            self.listener.close()
+        if self.peer:
+            if self.transport == "udp":
+                self.peer.send(b"")  # 빈 데이터그램으로 recv를 깨움
+            self.peer.close()
+            self.peer = None
+        while not self.peers.empty():
+            self.peers.get().close()
+
+    def _socketpair(self, address):
+        """ TriggerReceiver의 connect 자리에 들어가는 함수 (연결마다 새 socketpair) """
+        local, peer = socket.socketpair()
+        self.peers.put(peer)
+        return local
+
+    def _accept(self):
+        while True:
+            try:
+                peer, _ = self.listener.accept()
+            except OSError:
+                return
+            self.peers.put(peer)
+
+    def _send(self):
+        codes = sorted(DEFAULT_TRACKS)
+        for i, at in enumerate(self.schedule):
+            delay = self.started + at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            code = codes[i // self.repeat % len(codes)]
+            if self.peer is None:
+                self.peer = self.peers.get()
+                if self.binary:
+                    self._write(self.sender.hello())
+            self._write(self.sender.trigger(code) if self.binary else code.encode() + b"\r\n")  # println
+            self.sent += 1
+
+            if self.reconnect_every and self.sent % self.reconnect_every == 0:
+                self.peer.close()
+                self.peer = None
+
+
+    def _write(self, data):
+        self.peer.sendall(data)
+        self.bytes += len(data)
+        if self.binary:
+            # ack를 읽어 두지 않으면 수신 쪽 sendall이 결국 막힘 (실제 장치도 마찬가지)
+            self.peer.setblocking(False)
+            try:
+                pong = self.sender.on_ack(self.peer.recv(4096))
+                if pong:
+                    self.peer.sendall(pong)
+            except (BlockingIOError, InterruptedError):
+                pass
+            finally:
+                self.peer.setblocking(True)
+
+
+def steady(rate, duration):
+    n = int(rate * duration)
+    return [i / rate for i in range(n)]
+
+
+def bursts(size, period, duration):
+    return [b * period for b in range(int(duration / period)) for _ in range(size)]
+
+
+def bounces(presses, copies, gap, duration):
+    """ 버튼을 초당 presses번 누르고, 누를 때마다 gap 간격으로 copies번 전송 """
+    return [t + c * gap for t in steady(presses, duration) for c in range(copies)]
+
+
+def make_devices(args, root):
+    """ 작업 부하 → 가짜 장치 목록 """
+    def device(i, schedule, reconnect_every=0, repeat=1):
+        return SimulatedDevice(f"00:00:00:00:00:{i:02X}", schedule, reconnect_every, args.transport, root, repeat,
+                               args.protocol == "binary")
+
+    if args.workload == "steady":
+        return [device(0, steady(args.rate, args.duration))]
+    if args.workload == "burst":
+        return [device(0, bursts(args.burst, args.period, args.duration))]
+    if args.workload == "many":
+        return [device(i, steady(args.rate / args.devices, args.duration)) for i in range(args.devices)]
+    if args.workload == "bounce":
+        schedule = bounces(args.presses, args.copies, args.bounce_gap, args.duration)
+        return [device(i, schedule, repeat=args.copies) for i in range(4)]
+    return [device(i, steady(args.rate / 4, args.duration), args.reconnect_every) for i in range(4)]
+
+
+def make_media(root):
+    """ 임시 디렉터리에 USB/final/stemonN.mp3 를 만든 색인 """
+    folder = os.path.join(root, "USB", "final")
+    os.makedirs(folder)
+    for filename in DEFAULT_TRACKS.values():
+        with open(os.path.join(folder, filename), "wb") as f:
+            f.write(b"\0" * 1024)
+
+    media = MediaIndex(base_path=root)
+    media.refresh()
+    return media
+
+
+def merged(tracer, stage):
+    """ 모든 장치의 '수신 시점부터' 히스토그램을 합침 """
+    hist = Histogram()
+    for (_, s), (total, _) in list(tracer.histograms.items()):
+        if s == stage:
+            hist.merge(total)
+    return hist
+
+
+def run(args):
+    tracer = Tracer()
+    with tempfile.TemporaryDirectory() as root:
+        devices = make_devices(args, root)
+        media = make_media(root)
+        player = FakePlayer(duration=args.track_time)
+        worker = TriggerWorker(player, media, TriggerScheduler(args.policy, maxsize=args.maxsize))
+        recorder = TriggerRecorder(args.record) if args.record else None
+        # 디바운스는 채터링을 흉내 내는 bounce에만 (다른 작업 부하는 같은 코드를 일부러 빠르게 반복함)
+        debounce = TriggerFilter(args.debounce_ms / 1000) if args.workload == "bounce" and args.debounce_ms else None
+        receivers = [TriggerReceiver(d.address,
+                                     lambda data, span, d=d: worker.add(data, span, d.address),
+                                     connect=recorder.wrap(d.connect) if recorder else d.connect, tracer=tracer,
+                                     retry_delay=args.retry_delay, max_retry_delay=args.retry_delay * 8,
+                                     debounce=debounce, keepalive=args.keepalive_ms / 1000 or None)
+                     for d in devices]
+        threads = [threading.Thread(target=worker.run)]
+        threads += [threading.Thread(target=r.run) for r in receivers]
+
+        # 수신 루프의 연결/끊김 로그는 결과 JSON과 섞이지 않게 버림
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for t in threads:
+                t.start()
+            # 모든 수신 루프가 연결된 뒤에 전송 시작 (UDP는 bind 전에 보낸 것이 사라짐)
+            while any(r.connects == 0 for r in receivers):
+                time.sleep(0.001)
+            usage_before = resource.getrusage(resource.RUSAGE_SELF)
+            started = time.monotonic()
+            for d in devices:
+                d.start(started)
+            for d in devices:
+                d.join()
+            sent_done = time.monotonic()
+
+            # 이미 보낸 트리거가 다 처리될 때까지 대기
+            sent = sum(d.sent for d in devices)
+            deadline = time.monotonic() + args.drain
+            while time.monotonic() < deadline:
+                if (sum(r.messages for r in receivers) >= sent
+                        and not worker.scheduler.has_pending()):
+                    break
+                time.sleep(0.01)
+            elapsed = time.monotonic() - started
+            usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+            for r in receivers:
+                r.stop()
+            for d in devices:
+                d.close()
+            worker.stop()
+            for t in threads:
+                t.join()
+            if recorder:
+                recorder.close(summarize(worker, tracer, receivers, elapsed))
+
+    received = sum(r.messages for r in receivers)
+    m = worker.scheduler.metrics()
+    latency = merged(tracer, "started").snapshot()
+    reconnect = Histogram()
+    for r in receivers:
+        reconnect.merge(r.reconnect.histogram)
+    reconnect = reconnect.snapshot()
+    cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    return {
+        "workload": args.workload,
+        "transport": args.transport,
+        "policy": args.policy,
+        "devices": len(devices),
+        "sent": sent,
+        "received": received,
+        "played": worker.played,
+        "protocol": args.protocol,
+        "keepalive_ms": args.keepalive_ms,
+        "bytes_per_trigger": sum(d.bytes for d in devices) / sent if sent else 0.0,
+        "lost": sent - received,  # 전송 계층에서 사라진 수 (0이어야 정상)
+        "seq_lost": sum(r.link.lost for r in receivers),  # 바이너리: 순번으로 확인한 손실
+        "seq_duplicates": sum(r.link.duplicates for r in receivers),
+        "suppressed": sum(r.suppressed for r in receivers),  # 디바운스로 버린 수 (bounce)
+        "coalesced": m["coalesced"],  # 정책상 합쳐진 수 (PREEMPT/LATEST)
+        "dropped": m["dropped"],  # FIFO 한도 초과로 버린 수
+        "reconnects": sum(r.connects for r in receivers) - len(receivers),
+        "reconnect_p50_ms": reconnect.get("p50_ms", 0.0),  # 끊김 → 재연결 (백오프 포함)
+        "reconnect_p99_ms": reconnect.get("p99_ms", 0.0),
+        "throughput_per_s": received / (sent_done - started) if sent_done > started else 0.0,
+        "started_p50_ms": latency.get("p50_ms", 0.0),
+        "started_p99_ms": latency.get("p99_ms", 0.0),
+        "started_max_ms": latency.get("max_ms", 0.0),
+        "cpu_s": cpu,
+        "cpu_percent": cpu / elapsed * 100,
+    }
+
+
+def compare(result, baseline):
+    """ 이전 결과와 비교 (같은 workload/transport/policy/protocol 항목끼리) """
+    old = next((b for b in baseline
+                if all(b.get(k) == result[k] for k in ("workload", "transport", "policy"))
+                and b.get("protocol", "text") == result["protocol"]), None)
+    if old is None:
+        return
+    for key in ("throughput_per_s", "started_p50_ms", "started_p99_ms", "cpu_percent", "lost"):
+        before, after = old[key], result[key]
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"  {result['workload']:>6} {key:>17}: {before:10.3f} → {after:10.3f} ({change:+.1f}%)",
+              file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workload", choices=WORKLOADS + ("all",), default="all")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="socketpair",
+                        help="socketpair는 BluetoothSocket 대신, 나머지는 transports의 실제 로컬 소켓")
+    parser.add_argument("--policy", choices=(PREEMPT, LATEST, FIFO), default=PREEMPT)
+    parser.add_argument("--protocol", choices=("text", "binary"), default="text",
+                        help="binary는 연결마다 HELLO로 협상하는 순번/시각/ack 프로토콜 (UDP는 항상 text)")
+    parser.add_argument("--maxsize", type=int, default=8, help="FIFO 대기열 길이")
+    parser.add_argument("--duration", type=float, default=3.0, help="전송 시간 (초)")
+    parser.add_argument("--rate", type=float, default=200.0, help="전체 트리거 수/초 (steady/many/storm)")
+    parser.add_argument("--burst", type=int, default=50, help="버스트 하나의 트리거 수")
+    parser.add_argument("--period", type=float, default=0.5, help="버스트 간격 (초)")
+    parser.add_argument("--devices", type=int, default=16, help="many 작업 부하의 장치 수")
+    parser.add_argument("--reconnect-every", type=int, default=20, help="storm: 메시지 N개마다 연결 끊기")
+    parser.add_argument("--retry-delay", type=float, default=0.002,
+                        help="수신 쪽 첫 재연결 대기 (초), 상한은 8배")
+    parser.add_argument("--presses", type=float, default=10.0, help="bounce: 장치당 버튼 누름 수/초")
+    parser.add_argument("--copies", type=int, default=3, help="bounce: 누를 때마다 보내는 중복 수")
+    parser.add_argument("--bounce-gap", type=float, default=0.01, help="bounce: 중복 사이 간격 (초)")
+    parser.add_argument("--debounce-ms", type=float, default=50.0, help="bounce: 디바운스 창 (0이면 끔)")
+    parser.add_argument("--keepalive-ms", type=float, default=0.0,
+                        help="수신 루프의 keepalive/박동 주기 (0이면 끔, 감시자 비용 측정용)")
+    parser.add_argument("--track-time", type=float, default=0.05, help="가짜 트랙 길이 (초)")
+    parser.add_argument("--drain", type=float, default=2.0, help="전송 후 처리 대기 한도 (초)")
+    parser.add_argument("--output", help="결과 JSON 파일 (기본은 stdout)")
+    parser.add_argument("--record", help="수신 바이트를 이 파일에 기록 (작업 부하 하나일 때, bench_replay.py로 재생)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args()
+
+    workloads = WORKLOADS if args.workload == "all" else (args.workload,)
+    if args.record and len(workloads) > 1:
+        parser.error("--record는 --workload 하나와 함께 사용")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = []
+    for workload in workloads:
+        args.workload = workload
+        result = run(args)
+        results.append(result)
+        if baseline:
+            compare(result, baseline)
+
+    report = {"python": sys.version.split()[0], "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
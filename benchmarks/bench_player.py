@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" 트리거 → 첫 오디오 출력 / 재생 중지 지연 비교 (기존 cvlc 프로세스 방식 vs 상주형 플레이어) """
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from player import create_player, vlc
+
+
+def measure(player, track, runs, timeout):
+    """ play() → status()가 'playing'이 될 때까지, stop() 완료까지의 시간(ms) 목록 """
+    samples = []
+    stop_samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        player.play(track)
+
+        while player.status()["state"] != "playing":
+            if time.perf_counter() - t0 > timeout:
+                break
+            time.sleep(0.0005)
+        else:
+            samples.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        player.stop()
+        stop_samples.append((time.perf_counter() - t0) * 1000)
+        time.sleep(0.05)
+    return samples, stop_samples
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"min={samples[0]:.1f}ms median={statistics.median(samples):.1f}ms p95={p95:.1f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("track", help="재생할 MP3 파일 경로")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=5.0, help="한 번 재생을 기다리는 최대 시간 (초)")
+    parser.add_argument("--backend", action="append",
+                        help="subprocess / libvlc / fake (여러 번 지정 가능)")
+    args = parser.parse_args()
+
+    backends = args.backend or ["subprocess"] + (["libvlc"] if vlc is not None else []) + ["fake"]
+
+    for backend in backends:
+        player = create_player(backend)
+        player.play(args.track)  # 워밍업 (플러그인 로딩, 파일 캐시)
+        time.sleep(0.2)
+        player.stop()
+
+        samples, stop_samples = measure(player, args.track, args.runs, args.timeout)
+        player.close()
+
+        if samples:
+            print(f"{backend:>10} start: n={len(samples)} {summarize(samples)}")
+        else:
+            print(f"{backend:>10} start: 재생 시작을 감지하지 못함 (timeout {args.timeout}s)")
+        print(f"{backend:>10}  stop: n={len(stop_samples)} {summarize(stop_samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+""" 기록된 트리거 트래픽을 수신 → 대기열 → 재생 파이프라인에 다시 흘려 기록 당시 결과와 비교 (회귀 벤치마크) """
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DDDS_EVENT_LOG", os.devnull)
+
+from debounce import TriggerFilter
+from media_index import MediaIndex, DEFAULT_TRACKS
+from pipeline import TriggerReceiver, TriggerWorker
+from player import FakePlayer
+from replay import Replayer, load, summarize
+from scheduler import TriggerScheduler, PREEMPT, LATEST, FIFO
+from tracing import Tracer
+
+COMPARED = ("messages", "suppressed", "played", "coalesced", "dropped", "started_p50_ms", "started_p99_ms")
+
+
+def make_media(root):
+    folder = os.path.join(root, "USB", "final")
+    os.makedirs(folder)
+    for filename in DEFAULT_TRACKS.values():
+        with open(os.path.join(folder, filename), "wb") as f:
+            f.write(b"\0" * 1024)
+    media = MediaIndex(base_path=root)
+    media.refresh()
+    return media
+
+
+def run(args, devices, records):
+    tracer = Tracer()
+    replayer = Replayer(records, args.speed)
+    debounce = TriggerFilter(args.debounce_ms / 1000) if args.debounce_ms else None
+    with tempfile.TemporaryDirectory() as root:
+        worker = TriggerWorker(FakePlayer(duration=args.track_time), make_media(root),
+                               TriggerScheduler(args.policy, maxsize=args.maxsize))
+        receivers = [TriggerReceiver(address, lambda data, span, a=address: worker.add(data, span, a),
+                                     connect=replayer.connect, tracer=tracer, debounce=debounce,
+                                     retry_delay=0.001, max_retry_delay=0.01)
+                     for address in devices]
+        threads = [threading.Thread(target=worker.run)] + [threading.Thread(target=r.run) for r in receivers]
+        for t in threads:
+            t.start()
+
+        started = time.monotonic()
+        replayer.run()
+        # 보낸 바이트가 모두 읽히고 대기열이 빌 때까지 (수신 수가 더 늘지 않으면 끝)
+        deadline = time.monotonic() + args.drain
+        last = -1
+        while time.monotonic() < deadline:
+            messages = sum(r.messages for r in receivers)
+            if messages == last and not worker.scheduler.has_pending():
+                break
+            last = messages
+            time.sleep(0.05)
+        elapsed = time.monotonic() - started
+
+        replayer.close()
+        for r in receivers:
+            r.stop()
+        worker.stop()
+        for t in threads:
+            t.join()
+
+    result = summarize(worker, tracer, receivers, elapsed)
+    result["chunks"] = replayer.sent
+    result["replay_late_max_ms"] = round(replayer.late_ms, 3)  # 재생기 자체의 시간 오차
+    return result
+
+
+def diff(before, after):
+    """ 항목별 (이전, 이후, 변화) """
+    return {key: {"before": before[key], "after": after[key], "change": round(after[key] - before[key], 3)}
+            for key in COMPARED if key in before and key in after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("log", help="daemon.py --record 또는 bench_pipeline.py --record로 만든 기록 파일")
+    parser.add_argument("--speed", type=float, default=1.0, help="1은 원래 속도, N은 N배, 0은 최대한 빠르게")
+    parser.add_argument("--policy", choices=(PREEMPT, LATEST, FIFO), default=PREEMPT)
+    parser.add_argument("--maxsize", type=int, default=8, help="FIFO 대기열 길이")
+    parser.add_argument("--debounce-ms", type=float, default=0.0, help="디바운스 창 (0이면 끔)")
+    parser.add_argument("--track-time", type=float, default=0.05, help="가짜 트랙 길이 (초)")
+    parser.add_argument("--drain", type=float, default=2.0, help="전송 후 처리 대기 한도 (초)")
+    parser.add_argument("--output", help="결과 JSON 파일 (기본은 stdout)")
+    parser.add_argument("--baseline", help="비교할 이전 재생 결과 JSON 파일")
+    args = parser.parse_args()
+
+    devices, records, recorded = load(args.log)
+    result = run(args, devices, records)
+    report = {
+        "python": sys.version.split()[0],
+        "log": args.log,
+        "speed": args.speed,
+        "policy": args.policy,
+        "devices": len(devices),
+        "result": result,
+    }
+    if recorded:
+        report["recorded"] = recorded
+        report["vs_recorded"] = diff(recorded, result)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["vs_baseline"] = diff(json.load(f)["result"], result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
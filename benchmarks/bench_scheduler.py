@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+""" 버튼 연타(버스트) 상황에서 대기열 정책별 길이/버림/대기 시간 비교 """
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import TriggerScheduler, PREEMPT, LATEST, FIFO, DROP_OLDEST, DROP_NEWEST
+
+
+def run(scheduler, burst, interval, track_time):
+    """ 소비자는 트랙 하나에 track_time초 (PREEMPT는 바로 다음 트리거로 넘어감) """
+    played = []
+
+    def consumer():
+        while True:
+            trigger = scheduler.get(timeout=0.5)
+            if trigger is None:
+                if scheduler.closed:
+                    return
+                continue
+            played.append(trigger.data)
+            if not scheduler.preemptive:
+                time.sleep(track_time)
+
+    thread = threading.Thread(target=consumer)
+    thread.start()
+    for i in range(burst):
+        scheduler.put(str(i % 4 + 1))
+        time.sleep(interval)
+
+    # 남은 대기열이 빠질 시간
+    time.sleep(track_time * (scheduler.maxsize + 1))
+    scheduler.close()
+    thread.join()
+    return len(played)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--burst", type=int, default=200, help="연속 트리거 수")
+    parser.add_argument("--interval", type=float, default=0.002, help="트리거 간격 (초)")
+    parser.add_argument("--track-time", type=float, default=0.05, help="트랙 하나 재생 시간 (초)")
+    args = parser.parse_args()
+
+    cases = [
+        ("preempt", TriggerScheduler(PREEMPT)),
+        ("latest", TriggerScheduler(LATEST)),
+        ("fifo/drop_oldest", TriggerScheduler(FIFO, maxsize=8, overflow=DROP_OLDEST)),
+        ("fifo/drop_newest", TriggerScheduler(FIFO, maxsize=8, overflow=DROP_NEWEST)),
+    ]
+    for name, scheduler in cases:
+        played = run(scheduler, args.burst, args.interval, args.track_time)
+        m = scheduler.metrics()
+        print(f"{name:>17}: played={played} max_depth={m['max_depth']} "
+              f"coalesced={m['coalesced']} dropped={m['dropped']} "
+              f"delay_avg={m['delay_avg_ms']:.1f}ms delay_max={m['delay_max_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
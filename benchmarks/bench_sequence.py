@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+""" 트랙 사이의 무음 시간: 트랙마다 play()를 따로 부를 때 vs play_sequence로 이어서 재생할 때 (PCM 플레이어, 믹서) """
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DDDS_EVENT_LOG", os.devnull)
+
+from media_index import MediaIndex
+from pcm_cache import PcmCache, PcmPlayer
+from player import FakePlayer
+
+TRACKS = ("intro.mp3", "stemon2.mp3", "outro.mp3")
+
+
+class PacedSink:
+    """ 실제 출력처럼 초당 rate 바이트씩만 소비하는 가짜 aplay (버퍼가 비면 그만큼 무음으로 기록) """
+
+    def __init__(self, rate, buffer_s=0.05):
+        self.rate = rate
+        self.buffer_s = buffer_s  # aplay 버퍼 + 파이프에 쌓일 수 있는 시간
+        self.play_until = None  # 지금까지 쓴 데이터가 다 재생되는 시각
+        self.gaps = []  # 트랙 사이 무음 (초): 버퍼가 빈 채로 기다린 시간 + 0으로 채워 보낸 구간 (믹서)
+        self.heard = False  # 소리가 한 번이라도 나갔는지 (앞쪽 무음은 세지 않음)
+        self.silent_bytes = 0  # 마지막 소리 뒤로 이어진 0 바이트 수
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        with self.lock:
+            now = time.monotonic()
+            if self.play_until is None or now > self.play_until:
+                if self.play_until is not None:
+                    self.gaps.append(now - self.play_until)
+                self.play_until = now
+            self.play_until += len(data) / self.rate
+            self._count_silence(bytes(data))
+            ahead = self.play_until - now - self.buffer_s
+        if ahead > 0:
+            time.sleep(ahead)  # 파이프가 가득 차서 write가 막히는 것과 같음
+        return len(data)
+
+    def _count_silence(self, data):
+        lead = len(data) - len(data.lstrip(b"\0"))
+        if lead == len(data):
+            self.silent_bytes += lead
+            return
+        if self.heard and self.silent_bytes + lead:
+            self.gaps.append((self.silent_bytes + lead) / self.rate)
+        self.heard = True
+        self.silent_bytes = len(data) - len(data.rstrip(b"\0"))
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def drain(self):
+        if self.play_until:
+            time.sleep(max(0.0, self.play_until - time.monotonic()))
+
+
+def tone_decoder(seconds):
+    def decode(src, dst, sample_rate, channels, gain=1.0):
+        with open(dst, "ab") as f:
+            f.write(b"\x10\x01" * int(seconds * sample_rate) * channels)
+    return decode
+
+
+def wait_stopped(player, poll):
+    """ TriggerWorker.wait_until_finished와 같은 방식 (poll초마다 상태 확인) """
+    while player.status()["state"] != "stopped":
+        time.sleep(poll)
+
+
+def run_player(mode, media, cache, args):
+    sink = PacedSink(cache.sample_rate * cache.channels * 2, args.buffer_ms / 1000)
+    player = PcmPlayer(cache, media, sink=sink, fallback=FakePlayer())
+    paths = [media.lookup_file(name).path for name in TRACKS]
+    started = time.monotonic()
+    if mode == "separate":
+        for path in paths:
+            player.play(path)
+            wait_stopped(player, args.poll)
+    else:
+        player.play_sequence(paths)
+        wait_stopped(player, args.poll)
+    sink.drain()
+    return summary(mode, "pcm_player", sink, time.monotonic() - started)
+
+
+def run_mixer(mode, media, cache, args):
+    from mixer import Mixer
+
+    sink = PacedSink(cache.sample_rate * cache.channels * 2, args.buffer_ms / 1000)
+    mixer = Mixer(cache, media, sink=sink)
+    channel = mixer.channel("dev0")
+    paths = [media.lookup_file(name).path for name in TRACKS]
+    started = time.monotonic()
+    if mode == "separate":
+        for path in paths:
+            channel.play(path)
+            wait_stopped(channel, args.poll)
+    else:
+        channel.play_sequence(paths)
+        wait_stopped(channel, args.poll)
+    sink.drain()
+    mixer.close()
+    return summary(mode, "mixer", sink, time.monotonic() - started)
+
+
+def summary(mode, backend, sink, elapsed):
+    return {
+        "backend": backend,
+        "mode": mode,
+        "gaps": len(sink.gaps),
+        "silence_total_ms": round(sum(sink.gaps) * 1000, 2),
+        "silence_max_ms": round(max(sink.gaps, default=0.0) * 1000, 2),
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--track-s", type=float, default=0.5, help="트랙 하나의 길이 (초)")
+    parser.add_argument("--buffer-ms", type=float, default=50.0, help="출력 버퍼에 쌓아 둘 수 있는 시간 (낮은 지연 설정)")
+    parser.add_argument("--poll", type=float, default=0.05, help="따로 재생할 때 끝났는지 확인하는 주기 (초)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        folder = os.path.join(root, "USB", "final")
+        os.makedirs(folder)
+        for i, name in enumerate(TRACKS):
+            with open(os.path.join(folder, name), "wb") as f:
+                f.write(bytes([i]) * 1024)
+        media = MediaIndex(base_path=root, tracks={}, sequences={"5": TRACKS})
+        media.refresh()
+        cache = PcmCache(os.path.join(root, "pcm"), decoder=tone_decoder(args.track_s))
+        for entry in media.by_file.values():
+            cache.load(entry)
+
+        for mode in ("separate", "sequence"):
+            results.append(run_player(mode, media, cache, args))
+        try:
+            import numpy  # noqa: F401 (믹서는 numpy가 있을 때만)
+        except ImportError:
+            pass
+        else:
+            for mode in ("separate", "sequence"):
+                results.append(run_mixer(mode, media, cache, args))
+
+    json.dump({"python": sys.version.split()[0], "track_s": args.track_s, "poll_s": args.poll,
+               "buffer_ms": args.buffer_ms,
+               "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
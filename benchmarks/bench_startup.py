@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+""" 데몬 기동 예산: 프로세스 시작 → 첫 트리거 수신 준비까지 걸린 시간과 최대 RSS (headless / gui) """
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "headless": ["--gui", "off"],
+    "gui": ["--gui", "on"],
+}
+
+
+def run_once(mode, address):
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    command = [sys.executable, os.path.join(ROOT, "daemon.py"), *MODES[mode], "--exit-when-ready", address]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, timeout=60)
+    stages = {}
+    for line in result.stdout.splitlines():
+        if line.startswith("{"):
+            report = json.loads(line)
+            stages[report["stage"]] = report
+    if result.returncode != 0 or not stages:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "no report")
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=["headless", "gui"])
+    parser.add_argument("--address", default="tcp://127.0.0.1:9", help="연결되지 않아도 되는 주소 (기동만 측정)")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        try:
+            runs = [run_once(mode, args.address) for _ in range(args.runs)]
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"{mode:>8}: unavailable ({e})")
+            continue
+
+        results[mode] = {}
+        for stage in runs[0]:
+            elapsed = [r[stage]["elapsed_ms"] for r in runs if stage in r]
+            rss = [r[stage]["peak_rss_kb"] for r in runs if stage in r]
+            results[mode][stage] = {"median_ms": statistics.median(elapsed), "peak_rss_kb": max(rss)}
+            print(f"{mode:>8} {stage:>6}: {statistics.median(elapsed):7.1f} ms (median of {len(elapsed)}), "
+                  f"peak RSS {max(rss) / 1024:.1f} MB")
+
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+""" 감시자 복구 시간: 수신 스레드 죽음/멈춤, 워커 멈춤, 플레이어 멈춤, 반쯤 끊긴 바이너리 링크를 일부러 만들어 측정 """
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DDDS_EVENT_LOG", os.devnull)
+
+from media_index import MediaIndex, DEFAULT_TRACKS
+from pipeline import TriggerReceiver, TriggerWorker, supervise
+from player import FakePlayer
+from protocol import ProtocolSender
+from scheduler import TriggerScheduler
+from supervisor import Supervisor
+
+FAULTS = ("receiver_dies", "receiver_hangs", "worker_hangs", "player_hangs", "link_half_dead")
+
+
+class HangingPlayer(FakePlayer):
+    """ hang이 켜지면 다음 play가 abort()까지 돌아오지 않음 (멈춘 출력 장치 흉내) """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.hang = False
+        self.released = threading.Event()
+
+    def play(self, track, span=None, gain=1.0):
+        if self.hang:
+            self.hang = False
+            self.released.clear()
+            self.released.wait()
+        super().play(track, span, gain)
+
+    def abort(self):
+        self.released.set()
+
+
+class Device:
+    """ socketpair 건너편의 가짜 ESP32 (바이너리 프로토콜, PING에 PONG으로 답함, mute면 아무 답도 안 함) """
+
+    def __init__(self, address):
+        self.address = address
+        self.sender = ProtocolSender()
+        self.peer = None
+        self.connected = threading.Event()
+        self.mute = False
+
+    def connect(self, address):
+        local, self.peer = socket.socketpair()
+        self.peer.sendall(self.sender.hello())
+        self.connected.set()
+        threading.Thread(target=self._answer, args=(self.peer,), daemon=True).start()
+        return local
+
+    def trigger(self, code):
+        self.peer.sendall(self.sender.trigger(code))
+
+    def _answer(self, peer):
+        while True:
+            try:
+                data = peer.recv(4096)
+            except OSError:
+                return
+            if not data:
+                return
+            pong = self.sender.on_ack(data)
+            if pong and not self.mute:
+                peer.sendall(pong)
+
+
+def make_media(root):
+    folder = os.path.join(root, "USB", "final")
+    os.makedirs(folder)
+    for filename in DEFAULT_TRACKS.values():
+        with open(os.path.join(folder, filename), "wb") as f:
+            f.write(b"\0" * 1024)
+    media = MediaIndex(base_path=root)
+    media.refresh()
+    return media
+
+
+def wait_for(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def run(fault, args, root):
+    player = HangingPlayer()
+    worker = TriggerWorker(player, make_media(root), TriggerScheduler())
+    device = Device("dev0")
+    fail = {"dies": False, "hangs": threading.Event()}
+
+    def on_message(data, span):
+        if fail["dies"]:
+            fail["dies"] = False
+            raise RuntimeError("수신 처리 중 예외 (일부러)")
+        if data == "hang":
+            fail["hangs"].wait()  # 감시자가 포기할 때까지 이 스레드를 붙잡음
+        worker.add(data, span, device.address)
+
+    receiver = TriggerReceiver(device.address, on_message, connect=device.connect, retry_delay=0.01,
+                               keepalive=args.keepalive, link_timeout=args.keepalive * 3)
+    supervisor = supervise(Supervisor(deadline=args.deadline, interval=args.interval), worker, [receiver])
+    device.connected.wait(2.0)
+    wait_for(lambda: receiver.link.hellos, 2.0)
+
+    media_resolve = worker.media.resolve
+    connects = receiver.connects
+    injected = time.monotonic()
+    if fault == "receiver_dies":
+        fail["dies"] = True
+        device.trigger("1")
+    elif fault == "receiver_hangs":
+        device.trigger("hang")
+    elif fault == "worker_hangs":
+        released = threading.Event()
+
+        def stuck_resolve(message):
+            worker.media.resolve = media_resolve
+            released.wait()  # 재생과 무관한 곳에서 워커가 멈춤
+            return media_resolve(message)
+
+        worker.media.resolve = stuck_resolve
+        device.trigger("1")
+    elif fault == "player_hangs":
+        player.hang = True
+        device.trigger("1")
+    elif fault == "link_half_dead":
+        device.mute = True  # 연결은 살아 있지만 장치가 아무것도 보내지 않음
+
+    # 복구 = 감시자가 복구를 기록하거나 (링크는) 다시 연결된 뒤 트리거가 재생까지 가는 것
+    name = {"receiver_dies": f"recv-{device.address}", "receiver_hangs": f"recv-{device.address}",
+            "worker_hangs": "worker", "player_hangs": "player"}.get(fault)
+    if name:
+        component = supervisor.components[name]
+        ok = wait_for(lambda: component.last_recovery_ms is not None, args.deadline * 4 + 5)
+        detected_ms = None
+        if component.restarted_at:
+            detected_ms = round((component.restarted_at - injected) * 1000, 1)
+        result = {"detect_ms": detected_ms, "recovery_ms": component.last_recovery_ms,
+                  "restarts": component.restarts}
+    else:
+        ok = wait_for(lambda: receiver.connects > connects, args.keepalive * 6 + 5)
+        result = {"detect_ms": round((time.monotonic() - injected) * 1000, 1), "link_timeouts": receiver.link_timeouts,
+                  "pings": receiver.link.pings}
+        device.mute = False
+    played = worker.played
+    device.connected.wait(2.0)
+    wait_for(lambda: receiver.link.hellos and receiver.sock is not None, 2.0)
+    device.trigger("2")
+    result["plays_after"] = wait_for(lambda: worker.played > played, 2.0)
+    result["recovered"] = ok
+    result["other_restarts"] = {c.name: c.restarts for c in supervisor.components.values()
+                                if c.name != name and c.restarts}
+
+    supervisor.stop()
+    fail["hangs"].set()
+    player.abort()
+    receiver.stop()
+    worker.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fault", choices=FAULTS + ("all",), default="all")
+    parser.add_argument("--deadline", type=float, default=2.0, help="감시자 멈춤 판정 기한 (초)")
+    parser.add_argument("--interval", type=float, default=0.1, help="감시자 확인 주기 (초)")
+    parser.add_argument("--keepalive", type=float, default=0.5, help="수신 keepalive 주기 (초)")
+    args = parser.parse_args()
+
+    results = {}
+    for fault in FAULTS if args.fault == "all" else (args.fault,):
+        with tempfile.TemporaryDirectory() as root:
+            results[fault] = run(fault, args, root)
+    json.dump({"python": sys.version.split()[0], "deadline_s": args.deadline, "interval_s": args.interval,
+               "keepalive_s": args.keepalive, "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
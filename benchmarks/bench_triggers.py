@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+""" 트리거 매니페스트: 크기별 컴파일/교체 시간과 조회 비용, 조회 중 교체했을 때 섞인 결과/지연 """
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DDDS_EVENT_LOG", os.devnull)
+
+from media_index import MediaIndex
+
+
+def write_manifest(folder, codes, version):
+    """ 버전마다 모든 코드가 같은 파일/게인을 가리키도록 (섞인 조회를 알아볼 수 있게) """
+    name, gain = ("a.mp3", 1.0) if version % 2 == 0 else ("b.mp3", 0.5)
+    data = {"codes": {str(i): {"file": name, "gain": gain, "priority": i % 3} for i in range(codes)}}
+    tmp = os.path.join(folder, ".triggers.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, os.path.join(folder, "triggers.json"))  # 반쯤 쓴 파일을 읽지 않도록
+
+
+def measure(codes, args, root):
+    folder = os.path.join(root, str(codes), "USB", "final")
+    os.makedirs(folder)
+    for name in ("a.mp3", "b.mp3"):
+        with open(os.path.join(folder, name), "wb") as f:
+            f.write(name.encode() * 256)
+    media = MediaIndex(base_path=os.path.dirname(os.path.dirname(folder)), triggers_path=None)
+
+    reloads = []
+    for version in range(args.reloads):
+        write_manifest(folder, codes, version)
+        started = time.perf_counter()
+        media.refresh()
+        reloads.append(time.perf_counter() - started)
+
+    probe = [str(i * 7919 % codes) for i in range(1024)]
+    started = time.perf_counter()
+    for _ in range(args.lookups // len(probe)):
+        for code in probe:
+            media.resolve(code)
+    lookup_ns = (time.perf_counter() - started) / (args.lookups // len(probe) * len(probe)) * 1e9
+
+    # 조회 스레드가 도는 동안 매니페스트를 계속 교체
+    torn = lookups = 0
+    worst = 0.0
+    running = True
+
+    def reader():
+        nonlocal torn, lookups, worst
+        while running:
+            t0 = time.perf_counter()
+            entries, binding = media.resolve(probe[lookups % len(probe)])
+            worst = max(worst, time.perf_counter() - t0)
+            if (entries[0].filename == "a.mp3") != (binding.gain == 1.0):
+                torn += 1  # 파일은 한 버전, 게인은 다른 버전
+            lookups += 1
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for version in range(args.reloads, args.reloads + args.swaps):
+        write_manifest(folder, codes, version)
+        media.refresh()
+    running = False
+    thread.join()
+
+    reloads.sort()
+    return {
+        "codes": codes,
+        "reload_p50_ms": round(reloads[len(reloads) // 2] * 1000, 2),
+        "reload_max_ms": round(reloads[-1] * 1000, 2),
+        "lookup_ns": round(lookup_ns, 1),
+        "swaps_during_lookups": args.swaps,
+        "lookups_during_swaps": lookups,
+        "torn_lookups": torn,
+        "lookup_max_us_during_swaps": round(worst * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--codes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--reloads", type=int, default=5)
+    parser.add_argument("--swaps", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=1 << 20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        results = [measure(codes, args, root) for codes in args.codes]
+    json.dump({"python": sys.version.split()[0], "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+""" 로컬 제어/지표 엔드포인트 (트리거 주입, 현재 상태 JSON, Prometheus 텍스트 지표)
+
+    GET  /metrics                   Prometheus 텍스트 형식
+    GET  /state                     대기열/재생/장치 상태 JSON
+    POST /trigger?device=NAME       본문 한 줄에 코드 하나씩 주입
+    GET  /trigger?code=1&count=N    같은 코드를 N번 주입
+
+    요청 하나에 주입할 수 있는 트리거는 MAX_INJECT개까지 (넘으면 400)
+
+    주소는 "127.0.0.1:8765" 또는 "unix:///run/ddds/control.sock"
+"""
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ENV_ADDRESS = "DDDS_CONTROL"  # 지정하면 GUI 스크립트도 제어 엔드포인트를 띄움
+INJECTED = "control"  # device를 주지 않은 주입 트리거의 장치 이름
+MAX_INJECT = 1000  # 요청 하나로 주입할 수 있는 최대 트리거 수
+MAX_BODY = MAX_INJECT * 64  # POST 본문 최대 바이트 (코드 한 줄은 짧음)
+
+# 지연 히스토그램 버킷 상한 (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ControlHandler(BaseHTTPRequestHandler):
+    """ 요청 하나 처리 (server.control이 실제 작업을 함) """
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        control = self.server.control
+        if url.path == "/metrics":
+            self._send(200, control.metrics(), "text/plain; version=0.0.4")
+        elif url.path == "/state":
+            self._send(200, json.dumps(control.state(), ensure_ascii=False), "application/json")
+        elif url.path == "/trigger" and "code" in query:
+            count = query.get("count", ["1"])[0]
+            if not count.isdigit():
+                self._send(400, "count must be a non-negative integer\n")
+                return
+            if int(count) > MAX_INJECT:
+                self._send(400, f"count must be at most {MAX_INJECT}\n")
+                return
+            self._injected(control.inject(query["code"] * int(count), query.get("device", [None])[0]))
+        else:
+            self._send(404, "not found\n")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/trigger":
+            self._send(404, "not found\n")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            self._send(400, f"body must be at most {MAX_BODY} bytes\n")
+            return
+        body = self.rfile.read(length).decode("utf-8", "replace")
+        codes = [line.strip() for line in body.splitlines() if line.strip()]
+        if len(codes) > MAX_INJECT:
+            self._send(400, f"at most {MAX_INJECT} codes per request\n")
+            return
+        device = parse_qs(url.query).get("device", [None])[0]
+        self._injected(self.server.control.inject(codes, device))
+
+    def _injected(self, result):
+        self._send(200, json.dumps(result), "application/json")
+
+    def _send(self, code, text, content_type="text/plain"):
+        data = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # 부하 테스트 중 요청마다 출력하지 않음
+
+
+class ControlServer:
+    """ 별도 스레드의 작은 HTTP 서버, 지표는 카운터를 잠금 없이 읽기만 함 (재생 경로를 막지 않음) """
+
+    def __init__(self, worker, address="127.0.0.1:8765", tracer=None, receivers=(), status=None,
+                 debounce=None, eventlog=None, supervisor=None):
+        self.worker = worker  # TriggerWorker (주입 대상, 재생 카운터)
+        self.address = address
+        self.tracer = tracer
+        self.receivers = receivers  # TriggerReceiver 목록 (연결/수신 카운터)
+        self.status = status  # StatusModel (장치별 화면 상태)
+        self.debounce = debounce  # TriggerFilter
+        self.eventlog = eventlog  # EventLog
+        self.supervisor = supervisor  # Supervisor (구성 요소별 멈춤/재시작/복구 시간)
+        self.injected = 0
+        self.started_at = time.monotonic()
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        if self.address.startswith("unix://"):
+            path = self.address[len("unix://"):]
+            if os.path.exists(path):
+                os.unlink(path)  # 이전 실행이 남긴 소켓 파일
+            self.server = UnixHTTPServer(path, ControlHandler)
+        else:
+            host, _, port = self.address.rpartition(":")
+            self.server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), ControlHandler)
+            self.server.daemon_threads = True
+        self.server.control = self
+        self.thread = threading.Thread(target=self.server.serve_forever, name="control", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            if self.address.startswith("unix://"):
+                try:
+                    os.unlink(self.address[len("unix://"):])
+                except OSError:
+                    pass
+            self.server = None
+
+    def inject(self, codes, device=None):
+        """ 실제 수신과 같은 경로로 대기열에 넣음 (지연 추적 구간 포함) """
+        device = device or INJECTED
+        accepted = 0
+        for code in codes:
+            span = None
+            if self.tracer:
+                span = self.tracer.begin(device)
+                span.mark("parsed")
+            if self.worker.add(code, span, device):
+                accepted += 1
+        self.injected += len(codes)
+        return {"injected": len(codes), "accepted": accepted}
+
+    def state(self):
+        scheduler = self.worker.scheduler
+        media = self.worker.media
+        mirror = getattr(media, "stats", None)  # 로컬 사본 색인일 때만 (동기화 바이트/준비 시간)
+        devices = []
+        if self.status:
+            devices = [device.snapshot() for device in list(self.status.devices.values())]
+        return {
+            "uptime_s": time.monotonic() - self.started_at,
+            "queue": {
+                "policy": scheduler.policy,
+                "depth": len(scheduler.pending),
+                "max_depth": scheduler.max_depth,
+                "enqueued": scheduler.enqueued,
+                "dequeued": scheduler.dequeued,
+                "coalesced": scheduler.coalesced,
+                "dropped": scheduler.dropped,
+            },
+            "worker": {
+                "played": self.worker.played,
+                "missing": self.worker.missing,
+                "unknown": self.worker.unknown,
+                "outranked": self.worker.outranked,
+                "current_device": self.worker.current_device,
+                "injected": self.injected,
+            },
+            "receivers": [receiver.snapshot() for receiver in self.receivers],
+            "devices": devices,
+            "debounce": self.debounce.stats() if self.debounce else None,
+            "eventlog": self.eventlog.stats() if self.eventlog else None,
+            "mirror": mirror() if mirror else None,
+            "loudness": media.loudness.stats() if media.loudness else None,
+            "triggers": {
+                "source": media.triggers.source,  # None이면 기본 매핑
+                "codes": len(media.triggers),
+                "digest": media.triggers.digest,
+                "reloads": media.triggers_reloads,
+                "errors": media.triggers_errors,
+            },
+            "supervisor": self.supervisor.snapshot() if self.supervisor else None,
+        }
+
+    def metrics(self):
+        """ Prometheus 텍스트 형식 (모든 값은 잠금 없이 읽은 순간값) """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {value}")
+
+        scheduler = self.worker.scheduler
+        metric("ddds_uptime_seconds", "gauge", "Seconds since the control endpoint started.",
+               [({}, round(time.monotonic() - self.started_at, 3))])
+        metric("ddds_queue_depth", "gauge", "Triggers waiting in the playback queue.",
+               [({}, len(scheduler.pending))])
+        for name, value, help_text in (
+                ("enqueued", scheduler.enqueued, "Triggers accepted into the queue."),
+                ("dequeued", scheduler.dequeued, "Triggers taken by the playback worker."),
+                ("coalesced", scheduler.coalesced, "Triggers replaced by a newer one."),
+                ("dropped", scheduler.dropped, "Triggers dropped because the FIFO queue was full.")):
+            metric(f"ddds_queue_{name}_total", "counter", help_text, [({}, value)])
+
+        for name, value, help_text in (
+                ("played", self.worker.played, "Tracks started."),
+                ("missing", self.worker.missing, "Known codes whose file was missing."),
+                ("unknown", self.worker.unknown, "Triggers with an unknown code."),
+                ("outranked", self.worker.outranked, "Triggers ignored while a higher-priority track played."),
+                ("injected", self.injected, "Triggers injected through the control endpoint.")):
+            metric(f"ddds_{name}_total", "counter", help_text, [({}, value)])
+
+        receivers = list(self.receivers)
+        if receivers:
+            for name, help_text in (
+                    ("messages", "Triggers received from the device."),
+                    ("suppressed", "Triggers dropped by debouncing."),
+                    ("connects", "Successful connections."),
+                    ("disconnects", "Lost connections."),
+                    ("link_timeouts", "Connections dropped because the device stopped answering keepalives.")):
+                metric(f"ddds_device_{name}_total", "counter", help_text,
+                       [({"device": r.address}, getattr(r, name)) for r in receivers])
+            linked = [r for r in receivers if r.link.hellos]
+            if linked:
+                for name, help_text in (
+                        ("lost", "Triggers missing from the binary protocol sequence."),
+                        ("duplicates", "Repeated binary protocol sequence numbers.")):
+                    metric(f"ddds_device_{name}_total", "counter", help_text,
+                           [({"device": r.address}, getattr(r.link, name)) for r in linked])
+                metric("ddds_device_clock_offset_seconds", "gauge",
+                       "Receiver clock minus device clock, including the minimum one-way delay.",
+                       [({"device": r.address}, (r.link.offset_ms() or 0) / 1000) for r in linked])
+
+        if self.eventlog:
+            metric("ddds_eventlog_dropped_total", "counter", "Events dropped because the ring buffer was full.",
+                   [({}, self.eventlog.dropped)])
+
+        if self.supervisor:
+            components = list(self.supervisor.components.values())
+            metric("ddds_component_up", "gauge", "1 unless the supervisor is waiting for the component to recover.",
+                   [({"component": c.name}, int(c.failed_at is None)) for c in components])
+            for name, help_text in (
+                    ("hangs", "Heartbeats that missed the supervisor deadline."),
+                    ("deaths", "Component threads that exited with an exception."),
+                    ("restarts", "Restarts issued by the supervisor.")):
+                metric(f"ddds_component_{name}_total", "counter", help_text,
+                       [({"component": c.name}, getattr(c, name)) for c in components])
+            self._histogram(lines, "ddds_component_recovery_seconds",
+                            "Time from detecting a failed component to its first heartbeat after the restart.",
+                            [({"component": c.name}, c.recovery) for c in components])
+
+        if self.tracer:
+            self._histogram(lines, "ddds_latency_seconds", "Time from receiving a trigger to each pipeline stage.",
+                            [({"device": device, "stage": stage}, total)
+                             for (device, stage), (total, _) in sorted(list(self.tracer.histograms.items()),
+                                                                         key=lambda item: (str(item[0][0]), item[0][1]))])
+
+        return "\n".join(lines) + "\n"
+
+    def _histogram(self, lines, name, help_text, series):
+        """ µs 히스토그램들을 초 단위 Prometheus 히스토그램으로 (series = [(라벨, Histogram)]) """
+        bounds = [int(b * 1e6) for b in LATENCY_BUCKETS]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in series:
+            cumulative, count, value_sum = histogram.cumulative(bounds)
+            for le, seen in zip(LATENCY_BUCKETS, cumulative):
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {seen}")
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {value_sum / 1e6}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def start_control(worker, address=None, **kwargs):
+    """ 주소(없으면 DDDS_CONTROL)가 있을 때만 제어 엔드포인트 시작, 없으면 None """
+    address = address or os.environ.get(ENV_ADDRESS)
+    if not address:
+        return None
+    return ControlServer(worker, address, **kwargs).start()
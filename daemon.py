@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+""" Qt 없이 도는 트리거 → 재생 데몬 (화면이 있으면 --gui로 상태 창을 붙일 수 있음) """
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import signal
+import sys
+import threading
+import time
+
+_IMPORTED_AT = time.monotonic()  # /proc를 못 읽을 때 시작 시각 대신 사용
+
+from debounce import TriggerFilter
+from eventlog import events
+from mirror import open_media
+from pcm_cache import create_cached_player
+from pipeline import TriggerReceiver, TriggerWorker, supervise
+from replay import TriggerRecorder, summarize
+from scheduler import TriggerScheduler, PREEMPT, LATEST, FIFO
+from status_model import StatusModel
+from supervisor import Supervisor
+from tracing import Tracer, install_signal_dump
+from transports import configured_addresses, connect as transport_connect
+
+DEFAULT_ADDRESSES = ["08:D1:F9:26:65:D2"]
+
+
+def process_age():
+    """ 프로세스가 시작된 뒤 지난 시간 (초, 인터프리터 기동 시간 포함) """
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+
+def report(stage, mode):
+    """ 기동 단계별 경과 시간과 최대 RSS를 JSON 한 줄로 출력 """
+    print(json.dumps({
+        "stage": stage,
+        "mode": mode,
+        "elapsed_ms": round(process_age() * 1000, 1),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }), flush=True)
+
+
+class TriggerDaemon:
+    """ 장치마다 수신 스레드 하나 + 재생 워커 스레드 하나 (Qt와 무관) """
+
+    def __init__(self, addresses, policy=PREEMPT, player=None, media=None, debounce=0.05, control=None,
+                 record=None, mirror=None, watchdog=5.0, keepalive=2.0, triggers=None, loudness=None):
+        self.tracer = Tracer()  # 장치/단계별 지연 히스토그램
+        self.status = StatusModel(max_hz=10)  # 화면이 붙으면 이 모델을 그대로 보여줌
+
+        # USB 'final/' 폴더를 로컬 사본으로 동기화해 두고 재생은 사본에서, 마운트/파일 변경 시에만 감시 스레드가 갱신
+        # 새 트랙은 색인할 때 라우드니스를 재서 게인을 PCM 캐시에 미리 곱해 둠 (재생 중 정규화 없음)
+        self.media, self.media_watcher = open_media(media, mirror, triggers, loudness)
+
+        self.player = player or create_cached_player(self.media)
+        self.worker = TriggerWorker(self.player, self.media, TriggerScheduler(policy),
+                                    notify=self.status.set_message, status=self.status)
+        # 버튼 채터링/재전송으로 창 안에 다시 온 같은 코드는 대기열에 넣기 전에 버림 (0이면 끔)
+        self.debounce = TriggerFilter(window=debounce) if debounce else None
+        # 수신 바이트를 그대로 기록해 두면 replay로 같은 상황을 다시 만들 수 있음
+        self.recorder = TriggerRecorder(record) if record else None
+        connect = self.recorder.wrap(transport_connect) if self.recorder else transport_connect
+        self.receivers = [
+            TriggerReceiver(address, lambda data, span, a=address: self.worker.add(data, span, a),
+                            connect=connect, tracer=self.tracer, status=self.status, debounce=self.debounce,
+                            keepalive=keepalive)
+            for address in addresses
+        ]
+        # 수신/워커/플레이어의 박동이 watchdog초를 넘기면 그것만 다시 시작 (0이면 끔, keepalive보다 길어야 함)
+        self.supervisor = Supervisor(deadline=watchdog) if watchdog and keepalive else None
+        for address in addresses:
+            self.status.add_device(address)
+
+        self.control_address = control  # 제어/지표 엔드포인트 주소 (없으면 끔)
+        self.control = None
+        self.threads = []
+        self.started_at = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        """ 모든 스레드 시작 (반환되면 첫 트리거를 받을 준비 완료) """
+        self.started_at = time.monotonic()
+        self.media_watcher.start()
+        if self.supervisor:
+            supervise(self.supervisor, self.worker, self.receivers)  # 감시자가 스레드를 띄우고 멈추면 다시 띄움
+        else:
+            self.threads = [threading.Thread(target=self.worker.run, name="worker", daemon=True)]
+            self.threads += [threading.Thread(target=r.run, name=f"recv-{r.address}", daemon=True)
+                             for r in self.receivers]
+            for thread in self.threads:
+                thread.start()
+        if self.control_address:
+            from control import ControlServer  # http.server 로드가 기동 시간을 늘리므로 켤 때만
+            self.control = ControlServer(self.worker, self.control_address, tracer=self.tracer,
+                                         receivers=self.receivers, status=self.status,
+                                         debounce=self.debounce, eventlog=events(),
+                                         supervisor=self.supervisor).start()
+
+    def stop(self):
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        if self.supervisor:
+            self.supervisor.stop()  # 아래에서 끝나는 스레드를 죽은 것으로 보지 않도록 먼저
+        if self.control:
+            self.control.stop()
+        for receiver in self.receivers:
+            receiver.stop()
+        self.media_watcher.stop()
+        self.worker.stop()
+        self.worker.stop_current()
+        if self.recorder:
+            self.recorder.close(summarize(self.worker, self.tracer, self.receivers,
+                                          time.monotonic() - self.started_at))
+
+    def wait(self):
+        """ stop()이 불릴 때까지 대기 (시그널 처리를 위해 메인 스레드는 짧게 깨어남) """
+        while not self.stopped.wait(1.0):
+            pass
+
+
+def gui_available():
+    """ 화면이 있고 PyQt5가 설치돼 있는지 (Qt를 import하지 않고 확인) """
+    has_display = os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY") \
+        or os.environ.get("QT_QPA_PLATFORM")
+    return bool(has_display) and importlib.util.find_spec("PyQt5") is not None
+
+
+def run_gui(daemon, exit_when_ready=False):
+    """ 상태 창을 붙여서 Qt 이벤트 루프 실행 (Qt는 여기서만 import) """
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication, QVBoxLayout, QWidget
+    from status_view import StatusView
+
+    app = QApplication(sys.argv)
+    window = QWidget()
+    window.setWindowTitle("Bluetooth MP3 Player")
+    window.setGeometry(100, 100, 400, 200)
+    layout = QVBoxLayout()
+    layout.addWidget(StatusView(daemon.status, "Waiting for Bluetooth connection...", window))
+    window.setLayout(layout)
+    window.show()
+
+    app.aboutToQuit.connect(daemon.stop)
+    if exit_when_ready:
+        # 이벤트 루프의 첫 반복 = 창을 그릴 준비가 끝난 시점
+        QTimer.singleShot(0, lambda: (report("window", "gui"), app.quit()))
+    return app.exec_()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("addresses", nargs="*", help="MAC 또는 transports 주소 (기본: DDDS_TRANSPORTS 또는 내장 MAC)")
+    parser.add_argument("--gui", choices=("auto", "on", "off"), default="auto",
+                        help="auto는 화면과 PyQt5가 있을 때만 상태 창 표시")
+    parser.add_argument("--policy", choices=(PREEMPT, LATEST, FIFO), default=PREEMPT)
+    parser.add_argument("--debounce-ms", type=float, default=50.0,
+                        help="같은 장치의 같은 코드가 이 시간 안에 다시 오면 버림 (0이면 끔)")
+    parser.add_argument("--control", default=os.environ.get("DDDS_CONTROL"),
+                        help="제어/지표 HTTP 주소 (예: 127.0.0.1:8765, unix:///run/ddds/control.sock)")
+    parser.add_argument("--record", help="수신 바이트를 이 파일에 기록 (benchmarks/bench_replay.py로 재생)")
+    parser.add_argument("--mirror", default=os.environ.get("DDDS_MIRROR"),
+                        help="USB 라이브러리 로컬 사본 폴더 (기본 ~/.cache/ddds/mirror, off면 USB에서 바로 재생)")
+    parser.add_argument("--triggers", default=os.environ.get("DDDS_TRIGGERS"),
+                        help="트리거 매니페스트 JSON (기본: USB 'final/triggers.json', 없으면 ~/.config/ddds/triggers.json)")
+    parser.add_argument("--loudness", default=os.environ.get("DDDS_LOUDNESS"),
+                        help="트랙마다 맞출 목표 라우드니스 LUFS (기본 -16, off면 원본 볼륨 그대로)")
+    parser.add_argument("--watchdog-s", type=float, default=5.0,
+                        help="수신/워커/플레이어가 이 시간 넘게 멈추면 그 구성 요소만 재시작 (0이면 끔)")
+    parser.add_argument("--keepalive-s", type=float, default=2.0,
+                        help="조용한 바이너리 장치에 PING을 보내는 간격, 3번 동안 응답이 없으면 재연결 (0이면 끔)")
+    parser.add_argument("--exit-when-ready", action="store_true",
+                        help="준비되면 기동 시간/메모리를 출력하고 종료 (기동 시간 측정용)")
+    args = parser.parse_args()
+
+    gui = args.gui == "on" or (args.gui == "auto" and gui_available())
+    daemon = TriggerDaemon(args.addresses or configured_addresses(DEFAULT_ADDRESSES), args.policy,
+                           debounce=args.debounce_ms / 1000, control=args.control, record=args.record,
+                           mirror=args.mirror, watchdog=args.watchdog_s, keepalive=args.keepalive_s,
+                           triggers=args.triggers, loudness=args.loudness)
+    daemon.start()
+
+    mode = "gui" if gui else "headless"
+    report("ready", mode)  # 여기서부터 첫 트리거를 받을 수 있음
+
+    if args.exit_when_ready and not gui:
+        daemon.stop()
+        return 0
+
+    install_signal_dump(daemon.tracer)  # kill -USR1 <pid> 으로 지연 히스토그램 출력
+    if gui:
+        return run_gui(daemon, args.exit_when_ready)
+
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    signal.signal(signal.SIGINT, lambda *_: daemon.stop())
+    daemon.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,163 +1,97 @@
 #!/usr/bin/env python3
-import bluetooth
-import time
-import subprocess
-import sys
 import os
-import queue
-from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
+import sys
+import time
+from PyQt5.QtWidgets import QApplication, QVBoxLayout, QWidget
 from PyQt5.QtCore import QThread, pyqtSignal
+from control import start_control
+from debounce import TriggerFilter
+from eventlog import events
+from mirror import open_media
+from pcm_cache import create_cached_player
+from pipeline import TriggerReceiver, TriggerWorker, supervise
+from replay import TriggerRecorder, summarize
+from scheduler import TriggerScheduler, PREEMPT
+from status_model import StatusModel
+from status_view import StatusView
+from supervisor import Supervisor
+from tracing import Tracer, install_signal_dump
+from transports import connect, configured_addresses
 
 class BluetoothReceiver(QThread):
     """ 블루투스 메시지를 계속 받는 별도 스레드 """
-    message_received = pyqtSignal(str)  # UI에 메시지를 전달하는 시그널
+    message_received = pyqtSignal(str, object)  # UI에 메시지를 전달하는 시그널 (+ 지연 추적 구간)
 
-    def __init__(self, mac_address, port):
+    def __init__(self, mac_address, port, tracer=None, status=None, recorder=None):
         super().__init__()
         self.mac_address = mac_address
         self.port = port
-        self.sock = None
-        self.running = True
+        open_socket = lambda address: connect(address, port)
+        # Qt와 무관한 수신 루프, 조립된 트리거는 시그널로 전달
+        self.core = TriggerReceiver(
+            mac_address,
+            self.on_message,
+            connect=recorder.wrap(open_socket) if recorder else open_socket,
+            tracer=tracer,
+            status=status,
+            debounce=TriggerFilter(window=0.05),  # 버튼 채터링/재전송으로 50ms 안에 다시 온 같은 코드는 버림
+            keepalive=2.0  # 조용해도 2초마다 박동 (바이너리 장치에는 PING, 6초 동안 응답이 없으면 재연결)
+        )
 
     def run(self):
         """ 블루투스 연결을 유지하면서 메시지를 수신 """
-        while self.running:
-            self.sock = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
+        self.core.run()
 
-            try:
-                self.sock.connect((self.mac_address, self.port))
-                print("✅ 블루투스 연결됨!")
-
-                while self.running:
-                    data = self.sock.recv(1024)
-                    if data:
-                        received_data = data.decode('utf-8').strip()
-                        print(f"🔵 수신됨: {received_data}")
-                        self.message_received.emit(received_data)  # 메시지를 메인 UI로 보냄
-
-            except bluetooth.BluetoothError as e:
-                print(f"❌ 연결 실패: {e}\n5초 후 재시도...")
-                time.sleep(5)
-
-            finally:
-                if self.sock:
-                    self.sock.close()
+    def on_message(self, received_data, span):
+        events().event("received", span.device if span else None, text=received_data)
+        self.message_received.emit(received_data, span)  # 메시지를 메인 UI로 보냄
 
     def stop(self):
         """ 블루투스 수신 스레드 중지 """
-        self.running = False
-        if self.sock:
-            self.sock.close()
+        self.core.stop()
 
 class BluetoothWorker(QThread):
     """ MP3 재생을 관리하는 스레드 """
-    update_signal = pyqtSignal(str)  # UI에 메시지를 보내는 시그널
-    current_process = None  # 현재 실행 중인 VLC 프로세스
-    message_queue = queue.Queue()  # **블루투스 메시지를 저장하는 큐**
 
-    def __init__(self):
+    def __init__(self, policy=PREEMPT):
         super().__init__()
-        self.mp3_folder = None  # MP3 폴더 경로 캐싱 (최초 한 번만 탐색)
-
-    def run(self):
-        """ 큐에서 메시지를 하나씩 꺼내서 MP3 재생 """
-        while True:
-            if not self.message_queue.empty():
-                received_data = self.message_queue.get()
-                print(f"🔄 처리 중: {received_data}")
-
-                self.stop_current_mp3()  # 현재 실행 중인 MP3 즉시 중지
-
-                # **새로운 MP3 실행**
-                if received_data == '1':
-                    self.update_signal.emit("🔊 Playing stemon1.mp3")
-                    self.play_mp3("stemon1.mp3")
-                elif received_data == '2':
-                    self.update_signal.emit("🔊 Playing stemon2.mp3")
-                    self.play_mp3("stemon2.mp3")
-                elif received_data == '3':
-                    self.update_signal.emit("🔊 Playing stemon3.mp3")
-                    self.play_mp3("stemon3.mp3")
-                elif received_data == '4':
-                    self.update_signal.emit("🔊 Playing stemon4.mp3")
-                    self.play_mp3("stemon4.mp3")
-
-    def add_to_queue(self, received_data):
-        """ 블루투스 메시지를 큐에 추가 (메시지가 씹히지 않도록 저장) """
-        print(f"📝 큐에 추가: {received_data}")
-        self.message_queue.put(received_data)
-
-    def play_mp3(self, filename):
-        """ MP3 파일을 USB에서 찾아 실행 (폴더 경로 캐싱 적용) """
-        usb_path = self.find_usb_with_final()
-
-        if usb_path:
-            file_path = os.path.join(usb_path, filename)
-
-            if os.path.exists(file_path):
-                self.update_signal.emit(f"🎵 재생 중: {file_path}")
-                print(f"🎵 MP3 실행 요청: {file_path}")
-
-                # 기존 MP3를 완전히 종료
-                self.stop_current_mp3()
-
-                # **VLC 실행**
-                result = subprocess.call(["cvlc", "--play-and-exit", file_path])
-
-                # 실행 결과 확인
-                if result == 0:
-                    print(f"✅ VLC가 정상적으로 {file_path} 실행 완료!")
-                else:
-                    print(f"❌ VLC 실행 실패! (에러 코드: {result})")
-
-            else:
-                self.update_signal.emit(f"⚠ 파일을 찾을 수 없음: {file_path}")
-                print(f"⚠ 파일 없음: {file_path}")
-
-        else:
-            self.update_signal.emit("⚠ USB에서 'final/' 폴더를 찾을 수 없음.")
-            print("⚠ USB에 'final/' 폴더 없음.")
-
-    def stop_current_mp3(self):
-        """ 현재 실행 중인 MP3 즉시 종료 및 VLC 프로세스 완전 종료 확인 """
-        if self.current_process:
-            self.update_signal.emit("🛑 현재 MP3 재생 중지")
-            print("🛑 VLC 종료 요청")
-
-            try:
-                self.current_process.kill()  # VLC 종료 시도
-            except Exception as e:
-                print(f"❌ VLC 종료 실패: {e}")
+        self.tracer = Tracer()  # 장치/단계별 지연 히스토그램
+        self.status = StatusModel(max_hz=10)  # 화면 상태 모음 (위젯은 초당 최대 10번만 갱신)
 
-            self.current_process = None  # 프로세스 초기화
+        # USB 'final/' 폴더를 로컬 사본으로 동기화해 두고 재생은 사본에서, 마운트/파일 변경 시에만 감시 스레드가 갱신
+        self.media, self.media_watcher = open_media()
+        self.media_watcher.start()
 
-        print("🔍 VLC 프로세스 강제 종료 시도 (pkill 실행)")
-        subprocess.call(["pkill", "vlc"])  # VLC 프로세스 종료
-        time.sleep(0.2)  # 종료 대기
+        # 디코딩된 PCM을 바로 출력하는 상주형 플레이어 (디코딩 전에는 VLC로 재생)
+        self.player = create_cached_player(self.media)
 
-        while subprocess.call(["pgrep", "vlc"]) == 0:  
-            print("⌛ VLC 종료 대기 중...")
-            time.sleep(0.1)
+        # **블루투스 메시지 대기열 (길이 제한, 정책에 따라 합치거나 버림)**
+        self.core = TriggerWorker(self.player, self.media, TriggerScheduler(policy),
+                                  notify=self.on_status, status=self.status)
 
-        print("✅ VLC 완전히 종료됨!")
-
-    def find_usb_with_final(self):
-        """ 'final/' 폴더가 있는 USB를 한 번만 탐색하여 저장 """
-        if self.mp3_folder and os.path.exists(self.mp3_folder):
-            return self.mp3_folder  # 기존에 찾은 경로 사용
+    def run(self):
+        """ 대기열에 트리거가 들어올 때까지 대기하다가 하나씩 꺼내서 MP3 재생 """
+        self.core.run()
 
-        base_path = "/media/pi/"
-        usb_list = os.listdir(base_path)
+    def on_status(self, message):
+        events().event("status", text=message)
+        self.status.set_message(message)
 
-        for usb in usb_list:
-            usb_path = os.path.join(base_path, usb, "final")
-            if os.path.exists(usb_path):
-                self.mp3_folder = usb_path  # 경로 캐싱
-                print(f"✅ MP3 폴더 탐색 완료: {usb_path}")
-                return usb_path
+    def stop(self):
+        """ 재생 스레드 종료 (대기 중인 get을 즉시 깨움) """
+        self.core.stop()
+
+    def add_to_queue(self, received_data, span=None):
+        """ 블루투스 메시지를 대기열에 추가 (정책에 따라 오래된 트리거는 합치거나 버림) """
+        # print 대신 링 버퍼 이벤트 로그 (느린 stdout/journald가 이 스레드를 막지 않음)
+        if self.core.add(received_data, span):
+            events().event("enqueued", text=received_data)
+        else:
+            events().event("dropped", text=received_data)
 
-        self.mp3_folder = None  # 폴더가 없으면 초기화
-        return None
+    def stop_current_mp3(self):
+        """ 현재 실행 중인 MP3 즉시 종료 (플레이어가 자기 프로세스만 종료 및 회수) """
+        self.core.stop_current()
 
 class BluetoothApp(QWidget):
     """ PyQt5 GUI 설정 """
@@ -167,34 +101,55 @@ class BluetoothApp(QWidget):
         self.setWindowTitle("Bluetooth MP3 Player")
         self.setGeometry(100, 100, 400, 200)
 
-        self.label = QLabel("블루투스 연결 대기 중...", self)
-        self.label.setStyleSheet("font-size: 16px; color: blue;")
+        # 블루투스 및 MP3 스레드 실행
+        self.worker = BluetoothWorker()
+        address = configured_addresses(["08:D1:F9:26:65:D2"])[0]  # DDDS_TRANSPORTS로 tcp:// 등 지정 가능
+        # DDDS_RECORD=파일 이면 수신 바이트를 기록 (benchmarks/bench_replay.py로 재생)
+        record = os.environ.get("DDDS_RECORD")
+        self.recorder = TriggerRecorder(record) if record else None
+        self.started_at = time.monotonic()
+        self.receiver = BluetoothReceiver(address, 1, self.worker.tracer, self.worker.status, self.recorder)
+
+        # 안내 문구 + 장치별 상태 줄 (워커의 상태 모델을 주기적으로만 반영)
+        self.view = StatusView(self.worker.status, "블루투스 연결 대기 중...", self)
 
         layout = QVBoxLayout()
-        layout.addWidget(self.label)
+        layout.addWidget(self.view)
         self.setLayout(layout)
 
-        # 블루투스 및 MP3 스레드 실행
-        self.worker = BluetoothWorker()
-        self.receiver = BluetoothReceiver("08:D1:F9:26:65:D2", 1)
-
         self.receiver.message_received.connect(self.worker.add_to_queue)
 
-        self.worker.start()
-        self.receiver.start()
+        # 두 스레드의 박동이 5초 넘게 멈추거나 스레드가 죽으면 그쪽만 다시 시작 (플레이어 호출이 막히면 플레이어만)
+        self.supervisor = Supervisor(deadline=5.0)
 
-        self.worker.update_signal.connect(self.update_label)
+        # DDDS_CONTROL=127.0.0.1:8765 이면 블루투스 없이 트리거 주입/지표 수집 가능
+        self.control = start_control(self.worker.core, tracer=self.worker.tracer,
+                                     receivers=[self.receiver.core], status=self.worker.status,
+                                     debounce=self.receiver.core.debounce, eventlog=events(),
+                                     supervisor=self.supervisor)
 
-    def update_label(self, message):
-        self.label.setText(message)
+        self.worker.start()
+        self.receiver.start()
+        supervise(self.supervisor, self.worker.core, [self.receiver.core],
+                  alive=[self.worker.isRunning, self.receiver.isRunning])
 
     def closeEvent(self, event):
+        self.supervisor.stop()
+        if self.control:
+            self.control.stop()
         self.receiver.stop()
+        self.worker.media_watcher.stop()
+        self.worker.stop()
+        self.worker.wait()
         self.worker.stop_current_mp3()
+        if self.recorder:
+            self.recorder.close(summarize(self.worker.core, self.worker.tracer, [self.receiver.core],
+                                          time.monotonic() - self.started_at))
         event.accept()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = BluetoothApp()
     window.show()
+    install_signal_dump(window.worker.tracer)  # kill -USR1 <pid> 으로 지연 히스토그램 출력
     sys.exit(app.exec_())
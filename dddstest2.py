@@ -1,137 +1,79 @@
 #!/usr/bin/env python3
-import bluetooth
-import time
-import subprocess
 import sys
-import os
-import queue
-from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
+from PyQt5.QtWidgets import QApplication, QVBoxLayout, QWidget
 from PyQt5.QtCore import QThread, pyqtSignal
+from debounce import TriggerFilter
+from mirror import open_media
+from pcm_cache import create_cached_player
+from pipeline import TriggerReceiver, TriggerWorker, supervise
+from scheduler import TriggerScheduler, PREEMPT
+from status_model import StatusModel
+from status_view import StatusView
+from supervisor import Supervisor
+from tracing import Tracer, install_signal_dump
+from transports import connect, configured_addresses
 
 class BluetoothReceiver(QThread):
     """ Separate thread to continuously receive Bluetooth messages """
-    message_received = pyqtSignal(str)  # Signal to send received data to the main UI
+    message_received = pyqtSignal(str, object)  # Signal to send received data to the main UI (+ latency span)
 
-    def __init__(self, mac_address, port):
+    def __init__(self, mac_address, port, tracer=None, status=None):
         super().__init__()
         self.mac_address = mac_address
         self.port = port
-        self.sock = None
-        self.running = True
+        # Qt-free receive loop; every framed trigger is forwarded through the signal
+        self.core = TriggerReceiver(
+            mac_address,
+            self.message_received.emit,
+            connect=lambda address: connect(address, port),
+            tracer=tracer,
+            status=status,
+            debounce=TriggerFilter(window=0.05),  # drop repeats of the same code within 50 ms (button bounce / resends)
+            keepalive=2.0  # beat every 2 s even when idle; binary devices get a PING and are redialled after 6 s of silence
+        )
 
     def run(self):
         """ Establish Bluetooth connection and listen for messages """
-        while self.running:
-            self.sock = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
-
-            try:
-                self.sock.connect((self.mac_address, self.port))
-                print("Bluetooth Connected!")
-
-                while self.running:
-                    data = self.sock.recv(1024)
-                    if data:
-                        received_data = data.decode('utf-8').strip()
-                        print(f"Received: {received_data}")
-                        self.message_received.emit(received_data)  # Send data to main UI
-
-            except bluetooth.BluetoothError as e:
-                print(f"Connection failed: {e}\nRetrying in 5 seconds...")
-                time.sleep(5)
-
-            finally:
-                if self.sock:
-                    self.sock.close()
+        self.core.run()
 
     def stop(self):
         """ Stop Bluetooth thread """
-        self.running = False
-        if self.sock:
-            self.sock.close()
+        self.core.stop()
 
 class BluetoothWorker(QThread):
     """ Main thread to handle MP3 playback """
-    update_signal = pyqtSignal(str)  # Signal for UI updates
-    current_process = None  # Track the currently playing VLC process
-    message_queue = queue.Queue()  # **Queue to store messages**
 
-    def __init__(self):
+    def __init__(self, policy=PREEMPT):
         super().__init__()
+        self.tracer = Tracer()  # Per-device, per-stage latency histograms
+        self.status = StatusModel(max_hz=10)  # Aggregated UI state; the view repaints at most 10x/s
+
+        # Mirror the USB 'final/' folder to local storage and play from the copy; the watcher resyncs on mount/file changes
+        self.media, self.media_watcher = open_media()
+        self.media_watcher.start()
+
+        # Warm player that streams cached PCM; falls back to VLC until a track is decoded
+        self.player = create_cached_player(self.media)
+
+        # **Bounded trigger queue; the policy decides what to coalesce or drop**
+        self.core = TriggerWorker(self.player, self.media, TriggerScheduler(policy),
+                                  notify=self.status.set_message, status=self.status)
 
     def run(self):
-        """ Continuously check the message queue and process MP3 playback """
-        while True:
-            if not self.message_queue.empty():
-                received_data = self.message_queue.get()
-
-                self.stop_current_mp3()  # Stop any playing MP3 before playing a new one
-
-                # Play the correct MP3 file
-                if received_data == '1':
-                    self.update_signal.emit("Playing stemon1.mp3")
-                    self.play_mp3("stemon1.mp3")
-                elif received_data == '2':
-                    self.update_signal.emit("Playing stemon2.mp3")
-                    self.play_mp3("stemon2.mp3")
-                elif received_data == '3':
-                    self.update_signal.emit("Playing stemon3.mp3")
-                    self.play_mp3("stemon3.mp3")
-                elif received_data == '4':
-                    self.update_signal.emit("Playing stemon4.mp3")
-                    self.play_mp3("stemon4.mp3")
-
-    def add_to_queue(self, received_data):
-        """ Add Bluetooth message to queue (Ensures all messages are processed) """
-        self.message_queue.put(received_data)
-
-    def play_mp3(self, filename):
-        """ Automatically detect USB and play MP3 from 'final/' folder """
-        usb_path = self.find_usb_with_final()
-
-        if usb_path:
-            file_path = os.path.join(usb_path, filename)
-
-            if os.path.exists(file_path):
-                self.update_signal.emit(f"Playing {file_path}")
-
-                # Stop current MP3 before playing new one
-                self.stop_current_mp3()
-
-                # **Non-blocking playback using Popen**
-                self.current_process = subprocess.Popen(["cvlc", "--play-and-exit", file_path])
-
-            else:
-                self.update_signal.emit(f"File not found: {file_path}")
-        else:
-            self.update_signal.emit("No USB with 'final/' folder found.")
+        """ Block on the trigger queue and process MP3 playback as triggers arrive """
+        self.core.run()
+
+    def stop(self):
+        """ Stop the playback thread (wakes up the blocking get immediately) """
+        self.core.stop()
+
+    def add_to_queue(self, received_data, span=None):
+        """ Add Bluetooth message to the bounded queue (policy coalesces or drops old ones) """
+        self.core.add(received_data, span)
 
     def stop_current_mp3(self):
         """ Instantly stop the currently playing MP3 """
-        if self.current_process:
-            self.update_signal.emit("Stopping current MP3 playback")
-
-            # **Forcefully kill VLC**
-            self.current_process.kill()  
-            
-            # **Wait only if VLC is still running**
-            if self.current_process.poll() is None:
-                self.current_process.wait()  
-            
-            self.current_process = None  # Reset process tracker
-
-    def find_usb_with_final(self):
-        """ Find the USB drive that contains the 'final/' folder """
-        base_path = "/media/pi/"
-        
-        # List all mounted USB devices
-        usb_list = os.listdir(base_path)
-
-        for usb in usb_list:
-            usb_path = os.path.join(base_path, usb, "final")
-            if os.path.exists(usb_path):  # Check if 'final/' exists
-                return usb_path
-
-        return None  # Return None if no USB contains 'final/'
+        self.core.stop_current()
 
 class BluetoothApp(QWidget):
     """ PyQt5 GUI to display Bluetooth connection status """
@@ -141,17 +83,18 @@ class BluetoothApp(QWidget):
         self.setWindowTitle("Bluetooth MP3 Player")
         self.setGeometry(100, 100, 400, 200)
 
-        self.label = QLabel("Waiting for Bluetooth connection...", self)
-        self.label.setStyleSheet("font-size: 16px; color: blue;")
+        # Initialize Bluetooth threads
+        self.worker = BluetoothWorker()
+        address = configured_addresses(["08:D1:F9:26:65:D2"])[0]  # DDDS_TRANSPORTS can point this at tcp:// etc.
+        self.receiver = BluetoothReceiver(address, 1, self.worker.tracer, self.worker.status)
+
+        # Status header plus one row per device, fed from the worker's status model
+        self.view = StatusView(self.worker.status, "Waiting for Bluetooth connection...", self)
 
         layout = QVBoxLayout()
-        layout.addWidget(self.label)
+        layout.addWidget(self.view)
         self.setLayout(layout)
 
-        # Initialize Bluetooth threads
-        self.worker = BluetoothWorker()
-        self.receiver = BluetoothReceiver("08:D1:F9:26:65:D2", 1)
-
         # Connect Bluetooth receiver signal to worker
         self.receiver.message_received.connect(self.worker.add_to_queue)
 
@@ -159,16 +102,17 @@ class BluetoothApp(QWidget):
         self.worker.start()
         self.receiver.start()
 
-        # Connect worker signal to UI update
-        self.worker.update_signal.connect(self.update_label)
-
-    def update_label(self, message):
-        """ Update QLabel with status messages """
-        self.label.setText(message)
+        # Restart only the thread whose heartbeat stalls for 5 s or that dies (a stuck player call only resets the player)
+        self.supervisor = supervise(Supervisor(deadline=5.0), self.worker.core, [self.receiver.core],
+                                    alive=[self.worker.isRunning, self.receiver.isRunning])
 
     def closeEvent(self, event):
         """ Stop Bluetooth receiver thread on application close """
+        self.supervisor.stop()
         self.receiver.stop()
+        self.worker.media_watcher.stop()
+        self.worker.stop()
+        self.worker.wait()
         self.worker.stop_current_mp3()
         event.accept()
 
@@ -176,4 +120,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = BluetoothApp()
     window.show()
+    install_signal_dump(window.worker.tracer)  # kill -USR1 <pid> dumps latency histograms
     sys.exit(app.exec_())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+""" 수신 단계에서 버튼 채터링/재전송으로 중복된 트리거를 걸러내는 장치별·코드별 디바운스 필터 """
+import threading
+import time
+
+
+class TriggerFilter:
+    """ (장치, 코드)마다 마지막으로 통과시킨 시각을 기억해서 창 안의 반복은 버림 (메시지당 dict 조회 한 번)
+
+        수신 스레드 여러 개가 필터 하나를 같이 씀 (표와 카운터는 잠금 안에서만 바꿈)
+    """
+
+    def __init__(self, window=0.05, code_windows=None, device_windows=None, max_keys=4096,
+                 clock=time.monotonic):
+        self.window = window  # 기본 디바운스 창 (초)
+        self.code_windows = dict(code_windows or {})  # 코드 → 창 (장치 설정보다 우선)
+        self.device_windows = dict(device_windows or {})  # 장치 → 창
+        self.max_keys = max_keys  # 이상한 코드가 쏟아져도 표가 끝없이 커지지 않도록
+        self.clock = clock
+        self.entries = {}  # (장치, 코드) → [마지막 통과 시각, 창, 버린 수]
+        self.passed = 0
+        self.suppressed = 0
+        self.lock = threading.Lock()
+
+    def accept(self, device, code, now=None):
+        """ 통과시키면 True, 창 안의 중복이면 False """
+        if now is None:
+            now = self.clock()
+        key = (device, code)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                if len(self.entries) >= self.max_keys:
+                    self.entries.clear()
+                window = self.code_windows.get(code, self.device_windows.get(device, self.window))
+                self.entries[key] = [now, window, 0]
+                self.passed += 1
+                return True
+
+            if now - entry[0] < entry[1]:
+                entry[2] += 1
+                self.suppressed += 1
+                return False
+
+            entry[0] = now
+            self.passed += 1
+            return True
+
+    def stats(self):
+        with self.lock:
+            return {
+                "passed": self.passed,
+                "suppressed": self.suppressed,
+                "by_key": {f"{device}/{code}": entry[2]
+                           for (device, code), entry in self.entries.items() if entry[2]},
+            }
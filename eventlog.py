@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+""" 재생 경로에서 print 대신 쓰는 구조화 이벤트 로그 (고정 크기 레코드 링 버퍼 + 백그라운드 JSONL 기록) """
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+# 레코드 하나 = 64바이트: 시각(ns), 이벤트 id, 장치 id, 정수 인자 2개, 짧은 문자열(utf-8, 잘림)
+RECORD = struct.Struct("<QHHqq36s")
+ENV_PATH = "DDDS_EVENT_LOG"  # 지정하면 파일로, 없으면 stderr로 기록
+
+
+class EventLog:
+    """ event()는 잠금 안에서 미리 잡아 둔 버퍼에 pack만 하고 반환 (가득 차면 기다리지 않고 버림) """
+
+    def __init__(self, path=None, capacity=4096, max_bytes=4 << 20, backups=3, flush_interval=0.5):
+        self.path = path  # None이면 stderr
+        self.capacity = capacity
+        self.max_bytes = max_bytes  # 파일이 이보다 커지면 path.1, path.2 ... 로 회전
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.buffer = bytearray(RECORD.size * capacity)
+        self.head = 0  # 다음에 쓸 레코드 번호
+        self.tail = 0  # 기록 스레드가 아직 가져가지 않은 첫 레코드 번호
+        self.names = {}  # 이벤트 이름 → id
+        self.devices = {None: 0}  # 장치 이름 → id
+        self.name_list = []
+        self.device_list = [None]
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = True
+        self.dropped = 0  # 버퍼가 가득 차서 버린 이벤트 수
+        self.written = 0
+        self.stream = None
+        self.thread = threading.Thread(target=self._run, name="eventlog", daemon=True)
+        self.thread.start()
+
+    def event(self, name, device=None, a=0, b=0, text=""):
+        """ 이벤트 하나 기록 (재생/수신 스레드에서 호출, 입출력 없음) """
+        now = time.time_ns()
+        data = text.encode("utf-8", "replace")[:36] if text else b""
+        with self.lock:
+            event_id = self.names.get(name)
+            if event_id is None:
+                event_id = self._intern(self.names, self.name_list, name)
+            device_id = self.devices.get(device)
+            if device_id is None:
+                device_id = self._intern(self.devices, self.device_list, device)
+
+            used = self.head - self.tail
+            if used >= self.capacity:
+                self.dropped += 1
+                return
+            RECORD.pack_into(self.buffer, (self.head % self.capacity) * RECORD.size,
+                             now, event_id, device_id, a, b, data)
+            self.head += 1
+
+        if used + 1 == self.capacity // 2:
+            self.wake.set()  # 절반 찼으면 주기를 기다리지 않고 바로 비움
+
+    def close(self):
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+
+    def stats(self):
+        return {"pending": self.head - self.tail, "written": self.written, "dropped": self.dropped}
+
+    def _intern(self, table, items, key):
+        # 이름은 처음 한 번만 등록, 이후에는 dict 조회만 (lock 보유 상태에서 호출)
+        table[key] = len(items)
+        items.append(key)
+        return table[key]
+
+    def _run(self):
+        while self.running:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self._drain()
+        self._drain()
+        if self.stream and self.stream is not sys.stderr:
+            self.stream.close()
+
+    def _drain(self):
+        """ 쌓인 레코드를 복사해 오고 (짧게 lock), 변환과 쓰기는 lock 밖에서 """
+        with self.lock:
+            start, end = self.tail, self.head
+            if start == end:
+                return
+            first = start % self.capacity
+            count = end - start
+            size = RECORD.size
+            if first + count <= self.capacity:
+                chunk = bytes(self.buffer[first * size:(first + count) * size])
+            else:
+                chunk = bytes(self.buffer[first * size:]) + bytes(self.buffer[:(first + count - self.capacity) * size])
+            self.tail = end
+            names, devices = list(self.name_list), list(self.device_list)
+
+        lines = []
+        for t_ns, event_id, device_id, a, b, data in RECORD.iter_unpack(chunk):
+            record = {"t": t_ns / 1e9, "event": names[event_id]}
+            if device_id:
+                record["device"] = devices[device_id]
+            if a:
+                record["a"] = a
+            if b:
+                record["b"] = b
+            text = data.rstrip(b"\0")
+            if text:
+                record["text"] = text.decode("utf-8", "replace")
+            lines.append(json.dumps(record, ensure_ascii=False))
+
+        try:
+            stream = self._stream()
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+            self.written += count
+        except OSError:
+            self.dropped += count
+
+    def _stream(self):
+        if self.path is None:
+            return sys.stderr
+        if self.stream is not None and self.stream.tell() >= self.max_bytes:
+            self.stream.close()
+            self.stream = None
+            for i in range(self.backups, 0, -1):
+                src = self.path if i == 1 else f"{self.path}.{i - 1}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i}")
+        if self.stream is None:
+            self.stream = open(self.path, "a", encoding="utf-8")
+        return self.stream
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def events():
+    """ 프로세스 공용 이벤트 로그 (처음 호출할 때 DDDS_EVENT_LOG 설정으로 생성) """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = EventLog(os.environ.get(ENV_PATH) or None)
+    return _default
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+""" RFCOMM 스트림을 트리거 메시지 단위로 나누는 증분 프레이머 """
+
+
+class LineFramer:
+    """ 줄바꿈으로 구분된 메시지를 재사용 버퍼 위에서 조립 (ESP32 println 형식) """
+
+    def __init__(self, bufsize=4096, delimiter=b"\n"):
+        self.buffer = bytearray(bufsize)  # 수신 버퍼 (연결 동안 재사용)
+        self.view = memoryview(self.buffer)
+        self.delimiter = delimiter
+        self.start = 0  # 아직 처리하지 않은 데이터의 시작 위치
+        self.end = 0  # 수신된 데이터의 끝 위치
+        self.frames = 0  # 조립된 메시지 수
+        self.overflows = 0  # 구분자 없이 버퍼가 가득 차서 버린 메시지 수
+        self.discarding = False  # 넘친 메시지의 나머지를 다음 구분자까지 버리는 중
+
+    def recv_from(self, sock):
+        """ 소켓에서 한 번 읽고 완성된 메시지들을 돌려줌 (연결이 끊기면 ConnectionResetError) """
+        recv_into = getattr(sock, "recv_into", None)
+        if recv_into is not None:
+            n = recv_into(self.recv_buffer())
+        else:
+            # recv_into가 없는 소켓(구버전 PyBluez)은 recv 결과를 버퍼에 복사
+            data = sock.recv(len(self.recv_buffer()))
+            n = len(data)
+            self.view[self.end:self.end + n] = data
+
+        return self.commit(n)
+
+    def recv_buffer(self):
+        """ 다음 수신 데이터를 받을 버퍼 영역 (asyncio sock_recv_into 등에 그대로 넘김) """
+        self._make_room()
+        return self.view[self.end:]
+
+    def commit(self, n):
+        """ recv_buffer()에 n바이트가 들어왔음을 반영하고 완성된 메시지들을 돌려줌 """
+        if n == 0:
+            raise ConnectionResetError("상대방이 연결을 종료함")
+
+        self.end += n
+        return self._frames()
+
+    def feed(self, data):
+        """ 소켓이 아닌 곳에서 받은 바이트를 넣고 완성된 메시지들을 돌려줌 """
+        data = memoryview(data)
+        while data:
+            self._make_room()
+            n = min(len(data), len(self.buffer) - self.end)
+            self.view[self.end:self.end + n] = data[:n]
+            self.end += n
+            data = data[n:]
+            yield from self._frames()
+
+    def take_ack(self):
+        """ 장치에 돌려보낼 ack 바이트 (텍스트 프로토콜은 ack가 없음) """
+        return None
+
+    def keepalive(self):
+        """ 조용한 연결에 보낼 확인 바이트 (텍스트 프로토콜은 없음) """
+        return None
+
+    def reset(self):
+        """ 재연결 시 남은 조각 버리기 """
+        self.start = 0
+        self.end = 0
+        self.discarding = False
+
+    def _frames(self):
+        """ 버퍼에서 구분자로 끝나는 메시지를 꺼냄 (빈 메시지는 건너뜀) """
+        if self.discarding:
+            # 넘친 메시지의 꼬리가 가짜 코드로 나오지 않도록 다음 구분자까지 버림
+            idx = self.buffer.find(self.delimiter, self.start, self.end)
+            if idx < 0:
+                self.start = self.end = 0
+                return
+            self.start = idx + len(self.delimiter)
+            self.discarding = False
+
+        while True:
+            idx = self.buffer.find(self.delimiter, self.start, self.end)
+            if idx < 0:
+                break
+
+            message = str(self.view[self.start:idx], "utf-8", "replace").strip()
+            self.start = idx + len(self.delimiter)
+            if message:
+                self.frames += 1
+                yield message
+
+        if self.start == self.end:
+            self.start = self.end = 0  # 대부분의 경우: 남은 조각 없음
+
+    def _make_room(self):
+        """ 버퍼 끝에 여유가 없으면 남은 조각을 앞으로 당김 """
+        if self.end < len(self.buffer):
+            return
+
+        if self.start == 0:
+            # 구분자 없이 버퍼 전체가 찼음: 깨진 메시지로 보고 나머지까지 버림
+            self.overflows += 1
+            self.start = self.end = 0
+            self.discarding = True
+            return
+
+        remaining = self.end - self.start
+        self.buffer[:remaining] = self.view[self.start:self.end]
+        self.start = 0
+        self.end = remaining
+
+
+class LengthPrefixFramer(LineFramer):
+    """ [길이 1바이트][본문] 형식의 메시지 조립 (본문에 줄바꿈이 들어갈 수 있는 펌웨어용) """
+
+    def _frames(self):
+        while self.end - self.start >= 1:
+            length = self.buffer[self.start]
+            if self.end - self.start - 1 < length:
+                break  # 본문이 아직 다 오지 않음
+
+            body_start = self.start + 1
+            message = str(self.view[body_start:body_start + length], "utf-8", "replace").strip()
+            self.start = body_start + length
+            if message:
+                self.frames += 1
+                yield message
+
+        if self.start == self.end:
+            self.start = self.end = 0
+
+
+class DatagramFramer(LineFramer):
+    """ 데이터그램 하나가 완결된 메시지인 전송(UDP)용 (끝 구분자는 생략 가능, 빈 데이터그램은 무시) """
+
+    def recv_buffer(self):
+        self.reset()  # 데이터그램 사이에 이어지는 조각은 없음
+        return self.view[:len(self.buffer) - len(self.delimiter)]
+
+    def commit(self, n):
+        if n == 0:
+            return iter(())
+
+        size = len(self.delimiter)
+        if self.buffer[n - size:n] != self.delimiter:
+            self.view[n:n + size] = self.delimiter
+            n += size
+        self.end = n
+        return self._frames()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+""" 하나의 asyncio 이벤트 루프에서 여러 ESP32 연결을 관리하는 허브 """
+import asyncio
+import time
+
+from protocol import LinkTracker
+from reconnect import Backoff, ReconnectStats, Notifier
+from supervisor import Heartbeat
+from transports import connect_async, make_framer
+
+
+class DeviceState:
+    """ 장치 하나의 연결 상태와 카운터 """
+
+    def __init__(self, address, framer, backoff):
+        self.address = address
+        self.connected = False
+        self.connected_at = None  # 마지막 연결 시각 (monotonic)
+        self.connects = 0
+        self.disconnects = 0
+        self.messages = 0
+        self.suppressed = 0  # 디바운스로 버린 트리거 수
+        self.link = LinkTracker()  # 바이너리 프로토콜 장치의 순번/시계 추적
+        self.last_message = None
+        self.last_error = None
+        self.framer = framer
+        if hasattr(framer, "link"):
+            framer.link = self.link
+        self.backoff = backoff
+        self.reconnect = ReconnectStats()
+        self.heartbeat = Heartbeat()  # 장치 코루틴이 진행할 때마다 (keepalive를 켜야 조용한 동안에도 박동)
+        self.link_timeouts = 0
+
+    def snapshot(self):
+        return {
+            "address": self.address,
+            "connected": self.connected,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "messages": self.messages,
+            "suppressed": self.suppressed,
+            "link_timeouts": self.link_timeouts,
+            "link": self.link.snapshot() if self.link.hellos else None,
+            "last_message": self.last_message,
+            "last_error": self.last_error,
+            **self.reconnect.snapshot(),
+        }
+
+
+class DeviceHub:
+    """ 장치마다 연결 → 수신 → 재연결 코루틴을 돌리는 단일 스레드 허브 (모든 장치가 동시에 재시도) """
+
+    def __init__(self, addresses, on_message, connect=connect_async,
+                 on_connect=None, on_disconnect=None, retry_delay=0.5, settle_delay=0.0,
+                 tracer=None, framer=make_framer, max_retry_delay=30.0, stable_after=5.0, debounce=None,
+                 keepalive=None, link_timeout=None, tick=0.5):
+        self.devices = {
+            address: DeviceState(address, framer(address), Backoff(retry_delay, max_retry_delay))
+            for address in addresses
+        }
+        self.on_message = on_message  # on_message(address, message, span)
+        self.on_connect = on_connect  # on_connect(address), 알림 스레드에서 호출
+        self.on_disconnect = on_disconnect  # on_disconnect(address), 알림 스레드에서 호출
+        self.connect = connect  # 코루틴: connect(address) -> 논블로킹 소켓 (기본은 transports 주소)
+        self.settle_delay = settle_delay  # 연결 직후 수신 시작 전 대기
+        self.stable_after = stable_after  # 이만큼 유지된 연결이 끊기면 백오프를 처음부터 (초)
+        self.notifier = Notifier()  # 알림음 재생이 이벤트 루프를 막지 않도록
+        self.tracer = tracer  # 지연 추적 (없으면 span은 None)
+        self.debounce = debounce  # TriggerFilter (중복 트리거를 on_message 전에 버림)
+        self.keepalive = keepalive  # 이만큼 조용하면 바이너리 장치에 PING (None이면 끔)
+        self.link_timeout = link_timeout or (keepalive * 3 if keepalive else None)
+        self.tick = tick  # 이벤트 루프 박동 주기 (초)
+        self.heartbeat = Heartbeat()  # 이벤트 루프 자체 (막히는 콜백이 있으면 멈춤)
+        self.generation = 0  # abort()마다 증가, 예전 루프의 코루틴은 자기 세대가 아니면 끝남
+        self.loop = None
+        self.tasks = {}
+        self.running = True
+
+    async def run(self):
+        """ 모든 장치의 연결 코루틴을 실행하고 stop()까지 대기 (그동안 tick마다 박동) """
+        self.loop = asyncio.get_running_loop()
+        generation = self.generation
+        self.tasks = {address: asyncio.create_task(self._device_loop(device, generation))
+                      for address, device in self.devices.items()}
+        try:
+            while self.running and self.generation == generation:
+                self.heartbeat.beat()
+                await asyncio.sleep(self.tick)
+        finally:
+            tasks = list(self.tasks.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self):
+        """ 다른 스레드에서도 호출 가능한 종료 요청 """
+        self.running = False
+        self.notifier.stop()
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._cancel_tasks)
+
+    def abort(self):
+        """ 감시자용: 멈춘 이벤트 루프를 버림 (새 스레드에서 run()을 다시 실행, 예전 코루틴은 깨어나면 끝남) """
+        self.generation += 1
+
+    def restart_device(self, address):
+        """ 감시자용: 장치 하나의 코루틴만 취소하고 새로 시작 (다른 스레드에서 호출) """
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            raise RuntimeError("이벤트 루프가 돌고 있지 않음")
+        loop.call_soon_threadsafe(self._restart_task, address)
+
+    def snapshot(self):
+        return [device.snapshot() for device in self.devices.values()]
+
+    def _cancel_tasks(self):
+        for task in self.tasks.values():
+            task.cancel()
+
+    def _restart_task(self, address):
+        task = self.tasks.get(address)
+        if task is not None:
+            task.cancel()
+        self.tasks[address] = asyncio.create_task(self._device_loop(self.devices[address], self.generation))
+
+    async def _device_loop(self, device, generation):
+        """ 장치 하나: 연결될 때까지 백오프하며 재시도하고, 끊기면 다시 연결 """
+        heartbeat = device.heartbeat
+        while self.running and self.generation == generation:
+            device.reconnect.attempt()
+            heartbeat.beat(30.0)  # 연결 시도는 운영체제 시간 제한까지 걸릴 수 있음
+            try:
+                sock = await self.connect(device.address)
+            except OSError as e:
+                device.last_error = str(e)
+                delay = device.backoff.next()
+                device.reconnect.failed(delay)
+                heartbeat.beat(delay)
+                await asyncio.sleep(delay)
+                continue
+
+            device.connected = True
+            device.connected_at = time.monotonic()
+            device.connects += 1
+            device.reconnect.connected()
+            device.framer.reset()
+            if self.on_connect:
+                self.notifier.post(self.on_connect, device.address)
+
+            try:
+                if self.settle_delay:
+                    await asyncio.sleep(self.settle_delay)
+                await self._receive(device, sock, generation)
+            except OSError as e:
+                device.last_error = str(e)
+            finally:
+                sock.close()
+                device.connected = False
+                device.disconnects += 1
+                device.reconnect.disconnected()
+
+            if not self.running or self.generation != generation:
+                break
+            if self.on_disconnect:
+                self.notifier.post(self.on_disconnect, device.address)
+
+            # 오래 유지된 연결이면 바로 재연결, 붙었다 끊겼다 하는 장치는 백오프
+            if time.monotonic() - device.connected_at >= self.stable_after:
+                device.backoff.reset()
+            else:
+                delay = device.backoff.next()
+                device.reconnect.retry_in = delay
+                heartbeat.beat(delay)
+                await asyncio.sleep(delay)
+
+    async def _receive(self, device, sock, generation):
+        """ 연결이 끊길 때까지 메시지 수신 (연결 종료는 ConnectionResetError) """
+        framer = device.framer
+        heartbeat = device.heartbeat
+        heard = time.monotonic()
+        while self.running and self.generation == generation:
+            heartbeat.beat()
+            if self.keepalive:
+                try:
+                    n = await asyncio.wait_for(self.loop.sock_recv_into(sock, framer.recv_buffer()), self.keepalive)
+                except asyncio.TimeoutError:  # 3.10 이하에서는 내장 TimeoutError와 다른 클래스
+                    await self._idle(device, sock, heard)
+                    continue
+                heard = time.monotonic()
+            else:
+                n = await self.loop.sock_recv_into(sock, framer.recv_buffer())
+            received_ns = time.monotonic_ns()
+            for message in framer.commit(n):
+                device.messages += 1
+                if self.debounce and not self.debounce.accept(device.address, message, received_ns / 1e9):
+                    device.suppressed += 1
+                    continue
+                device.last_message = message
+                span = None
+                if self.tracer:
+                    span = self.tracer.begin(device.address, received_ns)
+                    span.mark("parsed")
+                self.on_message(device.address, message, span)
+            ack = framer.take_ack()
+            if ack:
+                await self.loop.sock_sendall(sock, ack)
+
+    async def _idle(self, device, sock, heard):
+        """ keepalive 동안 아무것도 못 받음: 바이너리 장치면 PING, link_timeout을 넘기면 끊고 재연결 """
+        ping = device.framer.keepalive()
+        if ping is None:
+            return  # 텍스트 장치는 조용한 것과 죽은 것을 구별할 수 없음
+        silent = time.monotonic() - heard
+        if silent >= self.link_timeout:
+            device.link_timeouts += 1
+            raise TimeoutError(f"{silent:.1f}초 동안 응답 없음")
+        await self.loop.sock_sendall(sock, ping)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+""" 트랙별 라우드니스(BS.1770 통합 라우드니스, 트루 피크)를 색인할 때 한 번만 재고 재생 게인으로 바꿈
+
+    재생 중에는 정규화하지 않음: 게인은 PCM 캐시를 만들 때 곱해 둠
+"""
+import concurrent.futures
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+from eventlog import events
+
+DEFAULT_TARGET = -16.0  # 목표 통합 라우드니스 (LUFS)
+DEFAULT_CEILING = -1.0  # 게인을 올려도 트루 피크가 넘지 않을 한도 (dBTP)
+MAX_GAIN_DB = 12.0  # 아주 작은/큰 클립도 이 이상 바꾸지 않음
+SILENCE = -70.0  # BS.1770 절대 게이트 (이보다 조용하면 게인 1.0)
+DEFAULT_CACHE = os.path.expanduser("~/.cache/ddds/loudness.json")  # 내용 해시 → 측정값
+ENV_TARGET = "DDDS_LOUDNESS"  # 목표 LUFS, off면 분석하지 않음
+
+_INTEGRATED = re.compile(r"I:\s+(-?[\d.]+|-inf) LUFS")
+_PEAK = re.compile(r"Peak:\s+(-?[\d.]+|-inf) dBFS")
+
+
+def measure_loudness(path):
+    """ ffmpeg ebur128 필터로 (통합 라우드니스 LUFS, 트루 피크 dBTP) 측정 (실패하면 OSError) """
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-nostdin", "-hide_banner", "-nostats", "-i", path,
+             "-map", "0:a:0", "-af", "ebur128=peak=true", "-f", "null", "-"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        raise OSError(f"ffmpeg 실패 ({e.returncode}): {path}") from None
+
+    # 프레임마다 찍는 값 뒤에 요약이 오므로 마지막 값이 전체 결과
+    text = result.stderr.decode("utf-8", "replace")
+    loudness = _INTEGRATED.findall(text)
+    peak = _PEAK.findall(text)
+    if not loudness:
+        raise OSError(f"ebur128 결과 없음: {path}")
+    return float(loudness[-1]), float(peak[-1]) if peak else None
+
+
+def track_gain(loudness, peak, target=DEFAULT_TARGET, ceiling=DEFAULT_CEILING):
+    """ 측정값 → 선형 게인 (목표 라우드니스로 맞추되 피크가 ceiling을 넘지 않게, 모르면 1.0) """
+    if loudness is None or loudness < SILENCE:
+        return 1.0
+    gain_db = target - loudness
+    if peak is not None and not math.isinf(peak):
+        gain_db = min(gain_db, ceiling - peak)
+    gain_db = max(-MAX_GAIN_DB, min(MAX_GAIN_DB, gain_db))
+    return round(10 ** (gain_db / 20), 4)
+
+
+class LoudnessAnalyzer:
+    """ 트랙들의 라우드니스를 프로세스 풀에서 나눠 재고 (내용 해시별로 기억) MediaEntry에 게인을 채움 """
+
+    def __init__(self, target=DEFAULT_TARGET, ceiling=DEFAULT_CEILING, cache_path=DEFAULT_CACHE, workers=None,
+                 measure=measure_loudness):
+        self.target = target
+        self.ceiling = ceiling
+        self.cache_path = cache_path  # None이면 측정값을 파일에 남기지 않음
+        self.workers = workers or os.cpu_count() or 1
+        self.measure = measure  # 프로세스 풀로 넘기므로 모듈 최상위 함수여야 함
+        self.measured = {}  # 내용 해시 → (LUFS, dBTP)
+        self.analyzed = 0
+        self.reused = 0
+        self.errors = 0
+        self.last_ms = None  # 마지막 분석에 걸린 시간 (새로 잰 것이 있을 때만)
+        self.lock = threading.Lock()
+        self._load()
+
+    def analyze(self, entries):
+        """ 처음 보는 내용만 측정하고 모든 트랙의 loudness/peak/gain을 채움 (색인 교체 전에 호출) """
+        with self.lock:
+            pending = {}
+            for entry in entries:
+                if entry.content_hash in self.measured:
+                    self.reused += 1
+                else:
+                    pending.setdefault(entry.content_hash, entry.path)
+
+            if pending:
+                started = time.monotonic()
+                for key, result in self._run(pending).items():
+                    if isinstance(result, Exception):
+                        self.errors += 1  # 다음 갱신 때 다시 시도 (그동안 게인 1.0)
+                        events().event("loudness_failed", None, text=os.path.basename(pending[key]))
+                    else:
+                        self.measured[key] = result
+                        self.analyzed += 1
+                self.last_ms = round((time.monotonic() - started) * 1000, 1)
+                events().event("loudness_analyzed", None, len(pending), int(self.last_ms))
+                self._save()
+
+            for entry in entries:
+                entry.loudness, entry.peak = self.measured.get(entry.content_hash, (None, None))
+                entry.gain = track_gain(entry.loudness, entry.peak, self.target, self.ceiling)
+
+    def stats(self):
+        return {
+            "target_lufs": self.target,
+            "ceiling_dbtp": self.ceiling,
+            "tracks": len(self.measured),
+            "analyzed": self.analyzed,
+            "reused": self.reused,
+            "errors": self.errors,
+            "last_ms": self.last_ms,
+        }
+
+    def _run(self, pending):
+        """ 내용 해시 → 측정값 또는 예외 (트랙이 하나거나 프로세스 풀을 못 만들면 이 프로세스에서 차례로) """
+        results = {}
+        if len(pending) > 1 and self.workers > 1:
+            try:
+                with concurrent.futures.ProcessPoolExecutor(min(self.workers, len(pending))) as pool:
+                    futures = {key: pool.submit(self.measure, path) for key, path in pending.items()}
+                    for key, future in futures.items():
+                        try:
+                            results[key] = future.result()
+                        except Exception as e:
+                            results[key] = e
+                return results
+            except (OSError, ImportError, concurrent.futures.BrokenExecutor) as e:
+                events().event("loudness_failed", None, text=f"pool: {e}")  # 이 프로세스에서 차례로 분석
+                results.clear()
+
+        for key, path in pending.items():
+            try:
+                results[key] = self.measure(path)
+            except Exception as e:
+                results[key] = e
+        return results
+
+    def _load(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.measured = {key: (value[0], value[1]) for key, value in data.get("tracks", {}).items()}
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        tmp = self.cache_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump({"tracks": {key: list(value) for key, value in self.measured.items()}}, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            events().event("loudness_failed", None, text=f"save: {e}")
+
+
+def create_loudness_analyzer(target=None):
+    """ 목표 LUFS (None이면 DDDS_LOUDNESS 또는 기본값, off면 분석 안 함), ffmpeg가 없어도 None
+
+        숫자가 아닌 값은 이벤트 로그에 남기고 기본 목표로 분석
+    """
+    if target is None:
+        target = os.environ.get(ENV_TARGET) or DEFAULT_TARGET
+    if target == "off" or not shutil.which("ffmpeg"):
+        return None
+    try:
+        value = float(target)
+    except (TypeError, ValueError):
+        value = math.nan
+    if not math.isfinite(value):
+        events().event("loudness_invalid", None, text=str(target))
+        value = DEFAULT_TARGET
+    return LoudnessAnalyzer(value)
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+""" USB 'final/' 폴더의 MP3 색인 (마운트 시 한 번 만들고 변경이 감지될 때만 갱신) """
+import ctypes
+import hashlib
+import os
+import select
+import struct
+import threading
+import time
+
+from eventlog import events
+from trigger_map import DEFAULT_MANIFEST, ENV_PATH, MANIFEST_NAME, TriggerMap, load_trigger_map
+
+# 트리거 코드 → 파일 이름 (매니페스트가 없을 때의 기본 매핑)
+DEFAULT_TRACKS = {
+    '1': "stemon1.mp3",
+    '2': "stemon2.mp3",
+    '3': "stemon3.mp3",
+    '4': "stemon4.mp3",
+}
+
+# 트리거 코드 → 이어서 재생할 파일 이름들 (코드 하나로 여러 트랙을 끊김 없이)
+DEFAULT_SEQUENCES = {
+    '5': ("intro.mp3", "stemon2.mp3", "outro.mp3"),
+}
+
+
+class MediaEntry:
+    """ 색인된 트랙 하나 (경로, 크기, 길이, 내용 해시, 라우드니스와 재생 게인) """
+
+    __slots__ = ("filename", "path", "size", "mtime_ns", "duration", "content_hash", "loudness", "peak", "gain")
+
+    def __init__(self, filename, path, size, mtime_ns, duration, content_hash, loudness=None, peak=None, gain=1.0):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.duration = duration  # 초 (헤더를 읽지 못하면 None)
+        self.content_hash = content_hash
+        self.loudness = loudness  # 통합 라우드니스 LUFS (분석 전이면 None)
+        self.peak = peak  # 트루 피크 dBTP
+        self.gain = gain  # 재생 때 곱할 선형 게인 (PCM 캐시에 미리 곱해 둠)
+
+    def __repr__(self):
+        return f"MediaEntry({self.filename!r}, size={self.size}, duration={self.duration})"
+
+
+class MediaIndex:
+    """ 트리거 코드/파일 이름 → MediaEntry 조회 (조회 시 파일 시스템 접근 없음) """
+
+    def __init__(self, base_path="/media/pi/", folder_name="final", tracks=None, sequences=None,
+                 triggers_path=None, manifest=True, loudness=None):
+        self.base_path = base_path
+        self.folder_name = folder_name
+        self.default_triggers = TriggerMap.from_tables(tracks or DEFAULT_TRACKS,
+                                                       DEFAULT_SEQUENCES if sequences is None else sequences)
+        self.triggers = self.default_triggers  # 지금 쓰는 매핑 (매니페스트가 바뀌면 통째로 교체)
+        self.triggers_path = triggers_path or os.environ.get(ENV_PATH)  # 지정하면 다른 매니페스트보다 우선
+        self.manifest = manifest  # False면 매니페스트를 찾지 않고 기본 매핑만
+        self.loudness = loudness  # LoudnessAnalyzer (None이면 게인 1.0)
+        self.triggers_signature = None  # 마지막으로 확인한 매니페스트 (경로, 크기, mtime, inode)
+        self.triggers_reloads = 0
+        self.triggers_errors = 0
+        self.folder = None  # 현재 사용 중인 'final' 폴더 (없으면 None)
+        self.by_file = {}  # 파일 이름 → MediaEntry
+        self.by_code = {}  # 트리거 코드 → (Binding, MediaEntry 튜플) (파일이 모두 있는 코드만)
+        self.on_change = []  # 색인이 바뀔 때 호출할 콜백 (인자: index)
+        self.refreshes = 0
+        self.lock = threading.Lock()  # refresh끼리만 직렬화 (조회는 잠금 없음)
+
+    def lookup(self, code):
+        """ 트리거 코드에 해당하는 (첫) 트랙 (없으면 None) """
+        found = self.by_code.get(code)
+        return found[1][0] if found is not None else None
+
+    def lookup_sequence(self, message):
+        """ 메시지 하나 → 이어서 재생할 트랙 튜플 ("1,3,2" 같은 여러 코드와 시퀀스 코드를 펼침)
+
+            모르는 코드나 파일이 없는 코드는 건너뜀, 하나도 없으면 빈 튜플
+        """
+        return self.resolve(message)[0]
+
+    def resolve(self, message):
+        """ 메시지 하나 → (트랙 튜플, 첫 코드의 Binding) (조회표를 한 번만 읽어서 교체 도중에도 한쪽 매핑만 봄) """
+        by_code = self.by_code
+        if "," not in message:
+            found = by_code.get(message)
+            return (found[1], found[0]) if found is not None else ((), None)
+
+        entries = []
+        binding = None
+        for code in message.split(","):
+            found = by_code.get(code.strip())
+            if found is not None:
+                entries.extend(found[1])
+                binding = binding or found[0]
+        return tuple(entries), binding
+
+    def files_for(self, code):
+        """ 코드에 연결된 파일 이름들 (모르는 코드면 None, 오류 메시지용) """
+        binding = self.triggers.get(code)
+        return binding.files if binding is not None else None
+
+    def lookup_file(self, filename):
+        """ 파일 이름에 해당하는 트랙 (없으면 None) """
+        return self.by_file.get(filename)
+
+    def lookup_path(self, path):
+        """ 색인된 경로에 해당하는 트랙 (다른 폴더의 같은 이름이면 None) """
+        entry = self.by_file.get(os.path.basename(path))
+        return entry if entry is not None and entry.path == path else None
+
+    def code_table(self, by_file):
+        """ 파일 색인 + 지금 매핑 → 코드 조회표 (매니페스트 크기와 상관없이 조회는 사전 한 번) """
+        table = {}
+        resolved = {}  # 파일 목록 → MediaEntry 튜플 (없는 파일이 있으면 None), 같은 목록은 한 번만
+        for code, binding in self.triggers.bindings.items():
+            entries = resolved.get(binding.files, ())
+            if entries == ():
+                files = binding.files
+                entries = resolved[files] = tuple(by_file[name] for name in files) \
+                    if all(name in by_file for name in files) else None
+            if entries is not None:
+                table[code] = (binding, entries)
+        return table
+
+    def trigger_paths(self, folder):
+        """ 매니페스트를 찾을 위치 (앞에 있는 것이 우선: 지정한 파일, USB 'final/', 로컬) """
+        paths = [self.triggers_path] if self.triggers_path else []
+        if folder:
+            paths.append(os.path.join(folder, MANIFEST_NAME))
+        paths.append(DEFAULT_MANIFEST)
+        return paths
+
+    def check_triggers(self, folder):
+        """ 매니페스트가 바뀌었으면 다시 컴파일 (잘못된 파일이면 이전 매핑 유지, 매핑이 바뀌었으면 True)
+
+            refresh 잠금 안에서 호출하고, 코드 조회표는 호출한 쪽이 새 매핑으로 다시 만듦
+        """
+        if not self.manifest:
+            return False
+        path = st = None
+        for candidate in self.trigger_paths(folder):
+            try:
+                st = os.stat(candidate)
+            except OSError:
+                continue
+            path = candidate
+            break
+        signature = (path, st.st_size, st.st_mtime_ns, st.st_ino) if path else None
+        if signature == self.triggers_signature:
+            return False  # 파일이 그대로면 다시 읽지 않음 (refresh마다 stat 몇 번)
+        self.triggers_signature = signature
+
+        if path is None:
+            triggers = self.default_triggers  # 매니페스트를 지움: 기본 매핑으로
+        else:
+            try:
+                triggers = load_trigger_map(path)
+            except (OSError, ValueError) as e:
+                self.triggers_errors += 1
+                # 이전 매핑 유지 (이벤트 텍스트는 짧으므로 경로 대신 파일 이름으로)
+                events().event("triggers_invalid", None, text=str(e).replace(path, os.path.basename(path)))
+                return False
+        if triggers.digest == self.triggers.digest:
+            self.triggers = triggers  # 내용은 같고 위치만 바뀜 (USB → 로컬 사본 등)
+            return False
+        self.triggers = triggers
+        self.triggers_reloads += 1
+        events().event("triggers_loaded", None, len(triggers), text=os.path.basename(path or "default"))
+        return True
+
+    def watch_paths(self):
+        """ 변경을 감시할 경로 (마운트 위치 + 현재 'final' 폴더 + 로컬 매니페스트 폴더) """
+        paths = {self.base_path} | self.trigger_dirs()
+        if self.folder:
+            paths.add(self.folder)
+        return paths
+
+    def trigger_dirs(self):
+        """ USB 밖의 매니페스트가 있는 (있을 수 있는) 폴더 (감시 대상) """
+        if not self.manifest:
+            return set()
+        paths = [self.triggers_path] if self.triggers_path else []
+        paths.append(DEFAULT_MANIFEST)
+        return {os.path.dirname(path) for path in paths if os.path.isdir(os.path.dirname(path))}
+
+    def find_folder(self):
+        """ 'final' 폴더가 있는 첫 번째 USB 찾기 """
+        try:
+            mounts = sorted(os.listdir(self.base_path))
+        except OSError:
+            return None
+
+        for usb in mounts:
+            path = os.path.join(self.base_path, usb, self.folder_name)
+            if os.path.isdir(path):
+                return path
+        return None
+
+    def refresh(self):
+        """ 폴더와 매니페스트를 다시 훑어서 바뀐 파일만 다시 해시하고 색인을 통째로 교체 """
+        with self.lock:
+            folder = self.find_folder()
+            old = self.by_file if folder == self.folder else {}
+            by_file = {}
+            fresh = []  # 새로 해시했거나 측정값이 없는 트랙 (라우드니스는 이것만 잼)
+
+            if folder:
+                try:
+                    filenames = sorted(os.listdir(folder))
+                except OSError as e:
+                    # 훑는 도중 빠지거나 읽을 수 없음: 지난 색인을 그대로 두고 다음 갱신 때 다시
+                    events().event("refresh_failed", None, text=str(e))
+                    return False
+                for filename in filenames:
+                    if not filename.lower().endswith(".mp3"):
+                        continue
+
+                    path = os.path.join(folder, filename)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue  # 훑는 도중 지워짐
+
+                    entry = old.get(filename)
+                    if entry is None or entry.size != st.st_size or entry.mtime_ns != st.st_mtime_ns:
+                        try:
+                            entry = MediaEntry(filename, path, st.st_size, st.st_mtime_ns,
+                                               mp3_duration(path), file_hash(path))
+                        except OSError:
+                            continue  # 해시하는 도중 지워졌거나 읽을 수 없음 (다음 갱신 때 다시)
+                        fresh.append(entry)
+                    elif entry.loudness is None:
+                        fresh.append(entry)  # 지난번 측정이 실패했거나 분석기 없이 색인됨
+                    by_file[filename] = entry
+
+            if fresh and self.loudness:
+                self.loudness.analyze(fresh)  # 교체 전에 게인을 채워서 조회 스레드는 완성된 트랙만 봄
+
+            # 매니페스트도 같은 폴더에서 (바뀐 경우에만 다시 컴파일)
+            triggers_changed = self.check_triggers(folder)
+            changed = folder != self.folder or by_file != old or triggers_changed
+            by_code = self.code_table(by_file)
+
+            # 참조만 바꿔 끼우므로 조회 스레드는 항상 완전한 색인만 봄 (재생 중인 트랙은 그대로)
+            self.folder = folder
+            self.by_file = by_file
+            self.by_code = by_code
+            self.refreshes += 1
+
+        if changed:
+            for callback in self.on_change:
+                callback(self)
+        return changed
+
+
+class MediaWatcher(threading.Thread):
+    """ /media/pi 마운트와 'final' 폴더 변경을 inotify로 감시해서 색인 갱신 """
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_UNMOUNT = 0x2000
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                  | IN_DELETE | IN_DELETE_SELF | IN_UNMOUNT)
+
+    def __init__(self, index, settle=0.5, poll_interval=5.0):
+        super().__init__(daemon=True)
+        self.index = index
+        self.settle = settle  # 이벤트가 몰려올 때 모아서 한 번만 갱신 (초)
+        self.poll_interval = poll_interval  # inotify를 못 쓸 때의 주기적 재검사 간격 (초)
+        self.running = True
+        self.watches = {}  # 경로 → watch descriptor
+        self.libc = None
+        self.fd = None
+
+    def run(self):
+        self._refresh()
+        try:
+            self._open_inotify()
+        except OSError as e:
+            events().event("inotify_unavailable", None, int(self.poll_interval), text=str(e))  # 주기적 재검사로
+            self._poll_loop()
+            return
+
+        try:
+            self._inotify_loop()
+        finally:
+            os.close(self.fd)
+
+    def stop(self):
+        self.running = False
+
+    def _refresh(self):
+        """ 갱신 한 번 (실패해도 감시 스레드는 계속, 색인은 지난 것 그대로) """
+        try:
+            self.index.refresh()
+        except Exception as e:
+            events().event("refresh_failed", None, text=f"{type(e).__name__}: {e}")
+
+    def _poll_loop(self):
+        while self.running:
+            time.sleep(self.poll_interval)
+            self._refresh()
+
+    def _inotify_loop(self):
+        self._sync_watches()
+        while self.running:
+            ready, _, _ = select.select([self.fd], [], [], 1.0)
+            if not ready:
+                continue
+
+            # 복사나 마운트 도중의 연속 이벤트는 잠깐 기다렸다가 한꺼번에 처리
+            self._drain()
+            time.sleep(self.settle)
+            self._drain()
+
+            self._refresh()
+            self._sync_watches()
+
+    def _open_inotify(self):
+        # 이미 로드된 libc 심볼 사용 (find_library는 ldconfig를 실행해서 느림)
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    def _sync_watches(self):
+        """ 감시 대상: 마운트 위치 + 현재 'final' 폴더 """
+        wanted = self.index.watch_paths()
+
+        for path in list(self.watches):
+            if path not in wanted:
+                self.libc.inotify_rm_watch(self.fd, self.watches.pop(path))
+
+        for path in wanted - set(self.watches):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+            if wd >= 0:
+                self.watches[path] = wd
+
+    def _drain(self):
+        """ 쌓인 이벤트를 읽어서 버림 (내용과 상관없이 refresh 한 번으로 처리) """
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return
+            if not data:
+                return
+
+            # 마운트 해제 등으로 커널이 없앤 watch 정리
+            offset = 0
+            while offset + 16 <= len(data):
+                wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+                if mask & (self.IN_DELETE_SELF | self.IN_UNMOUNT):
+                    self.watches = {p: w for p, w in self.watches.items() if w != wd}
+                offset += 16 + length
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """ 파일 내용 해시 (blake2b 128비트, 16진수 문자열) """
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# MPEG 오디오 헤더 테이블 (kbps / Hz)
+_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+
+def mp3_duration(path):
+    """ 첫 프레임 헤더(Xing/Info 포함)로 MP3 길이(초) 계산, 실패하면 None """
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(65536)
+    except OSError:
+        return None
+
+    # ID3v2 태그 건너뛰기 (크기는 synchsafe 정수)
+    offset = 0
+    if head[:3] == b"ID3" and len(head) >= 10:
+        offset = 10 + ((head[6] & 0x7F) << 21 | (head[7] & 0x7F) << 14
+                       | (head[8] & 0x7F) << 7 | (head[9] & 0x7F))
+        if offset + 4 > len(head):
+            with open(path, "rb") as f:
+                f.seek(offset)
+                head = f.read(65536)
+            size -= offset
+            offset = 0
+        else:
+            size -= offset
+
+    # 첫 프레임 동기 패턴 찾기
+    pos = offset
+    while pos + 4 <= len(head):
+        if head[pos] == 0xFF and head[pos + 1] & 0xE0 == 0xE0:
+            header = struct.unpack_from(">I", head, pos)[0]
+            version = {3: 1, 2: 2, 0: 2.5}.get((header >> 19) & 3)
+            layer = {3: 1, 2: 2, 1: 3}.get((header >> 17) & 3)
+            bitrate_index = (header >> 12) & 0xF
+            rate_index = (header >> 10) & 3
+            if version and layer and 0 < bitrate_index < 15 and rate_index < 3:
+                break
+        pos += 1
+    else:
+        return None
+
+    table_version = 1 if version == 1 else 2
+    bitrate = _BITRATES[(table_version, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    samples_per_frame = 384 if layer == 1 else (1152 if version == 1 or layer == 2 else 576)
+
+    # VBR 파일은 Xing/Info 헤더의 프레임 수로 정확히 계산
+    for tag in (b"Xing", b"Info"):
+        idx = head.find(tag, pos, pos + 64)
+        if idx >= 0 and idx + 12 <= len(head):
+            flags = struct.unpack_from(">I", head, idx + 4)[0]
+            if flags & 1:
+                frames = struct.unpack_from(">I", head, idx + 8)[0]
+                return frames * samples_per_frame / sample_rate
+
+    # CBR은 파일 크기 / 비트레이트로 추정
+    return (size - (pos - offset)) * 8 / bitrate
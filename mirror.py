@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+""" USB 'final/' 라이브러리를 로컬 저장소(SD/SSD)에 내용 해시 기준으로 동기화하고, 재생은 항상 로컬 사본에서 """
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from eventlog import events
+from loudness import create_loudness_analyzer
+from media_index import MediaEntry, MediaIndex, MediaWatcher
+from trigger_map import DEFAULT_MANIFEST, MANIFEST_NAME
+
+DEFAULT_MIRROR_DIR = os.path.expanduser("~/.cache/ddds/mirror")
+
+
+class MirroredIndex(MediaIndex):
+    """ USB 색인(source)이 바뀌면 달라진 내용만 objects/<해시>.mp3 로 복사하고,
+        library/final/<파일 이름> 을 하드링크로 다시 만든 뒤 조회 결과를 로컬 경로로 바꿔 끼움
+
+        USB가 빠져도 마지막으로 동기화한 라이브러리와 트리거 매니페스트로 계속 재생 (다른 USB가 꽂히면 그 내용으로 교체)
+    """
+
+    def __init__(self, base_path="/media/pi/", folder_name="final", tracks=None, mirror_dir=DEFAULT_MIRROR_DIR,
+                 chunk_size=1 << 20, sequences=None, triggers_path=None, loudness=None):
+        super().__init__(base_path, folder_name, tracks, sequences, triggers_path, loudness=loudness)
+        # USB를 훑는 색인 (라우드니스도 이쪽에서 재고 사본은 결과만 물려받음)
+        self.source = MediaIndex(base_path, folder_name, tracks, sequences, manifest=False, loudness=loudness)
+        self.mirror_dir = mirror_dir
+        self.objects_dir = os.path.join(mirror_dir, "objects")
+        self.library_dir = os.path.join(mirror_dir, "library", folder_name)
+        self.manifest_path = os.path.join(mirror_dir, "manifest.json")
+        self.triggers_copy = os.path.join(mirror_dir, MANIFEST_NAME)  # USB 매니페스트의 마지막 사본
+        self.copied_triggers = None  # triggers_copy에 저장한 매핑
+        self.chunk_size = chunk_size
+        self.source_folder = None  # 마지막으로 동기화한 USB 폴더
+        self.syncs = 0
+        self.bytes_copied = 0  # 지금까지 복사한 바이트 수
+        self.verify_errors = 0  # 복사본 해시가 원본과 달라서 버린 횟수
+        self.last_sync = None  # 마지막 동기화 결과 (stats/로그용)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.library_dir, exist_ok=True)
+        self.check_triggers(None)
+        self._load_manifest()
+
+    def watch_paths(self):
+        """ 감시 대상은 로컬 사본이 아니라 USB 쪽 (+ 로컬 매니페스트 폴더) """
+        return self.source.watch_paths() | self.trigger_dirs()
+
+    def trigger_paths(self, folder):
+        """ 지정한 파일, USB 'final/', 마지막 USB 매니페스트 사본, 로컬 순 """
+        paths = [self.triggers_path] if self.triggers_path else []
+        if self.source.folder:
+            paths.append(os.path.join(self.source.folder, MANIFEST_NAME))
+        paths.append(self.triggers_copy)
+        paths.append(DEFAULT_MANIFEST)
+        return paths
+
+    def check_triggers(self, folder):
+        changed = super().check_triggers(folder)
+        source = self.triggers.source
+        if source and self.copied_triggers is not self.triggers and self.source.folder \
+                and source.startswith(self.source.folder + os.sep):
+            try:
+                tmp = self.triggers_copy + ".tmp"
+                shutil.copyfile(source, tmp)
+                os.replace(tmp, self.triggers_copy)  # USB가 빠져도 다음 실행에서 같은 매핑
+                self.copied_triggers = self.triggers
+            except OSError as e:
+                events().event("mirror_failed", None, text=str(e))
+        return changed
+
+    def refresh(self):
+        """ USB를 다시 훑고, 바뀐 것만 복사/검증한 뒤 로컬 라이브러리로 교체 """
+        with self.lock:
+            started = time.monotonic()
+            try:
+                self.source.refresh()
+            except OSError as e:
+                events().event("mirror_failed", None, text=str(e))  # 훑는 도중 USB가 빠짐
+                return False
+            folder = self.source.folder
+            triggers_changed = self.check_triggers(folder)
+            if folder is None:
+                if triggers_changed:
+                    self.by_code = self.code_table(self.by_file)  # 로컬 매니페스트만 바뀜
+                return triggers_changed  # USB 없음: 마지막 사본 유지
+
+            copied = reused = failed = 0
+            copied_bytes = 0
+            by_file = {}
+            for filename, entry in self.source.by_file.items():
+                obj = os.path.join(self.objects_dir, entry.content_hash + ".mp3")
+                if os.path.exists(obj):
+                    reused += 1
+                else:
+                    try:
+                        copied_bytes += self._copy(entry, obj)
+                        copied += 1
+                    except OSError:
+                        failed += 1  # 복사 도중 USB가 빠졌거나 내용이 바뀜: 다음 갱신 때 다시
+                        events().event("mirror_failed", None, text=filename)
+                        continue
+                by_file[filename] = entry
+
+            old = self.by_file
+            changed = triggers_changed or folder != self.source_folder or by_file.keys() != old.keys() \
+                or any(old[name].content_hash != entry.content_hash or old[name].gain != entry.gain
+                       for name, entry in by_file.items())
+            removed = self._publish(by_file)
+            elapsed = time.monotonic() - started
+            self.source_folder = folder
+            self.syncs += 1
+            self.bytes_copied += copied_bytes
+            self.last_sync = {
+                "source": folder,
+                "files": len(by_file),
+                "copied": copied,
+                "reused": reused,
+                "failed": failed,
+                "removed": removed,
+                "bytes": copied_bytes,
+                "ready_ms": round(elapsed * 1000, 1),  # 훑기 시작부터 로컬 라이브러리 교체까지
+            }
+            self.refreshes += 1
+
+        events().event("mirror_synced", None, copied_bytes, int(elapsed * 1000), text=folder[-36:])
+        if changed:
+            for callback in self.on_change:
+                callback(self)
+        return changed
+
+    def stats(self):
+        return {
+            "mirror_dir": self.mirror_dir,
+            "source": self.source_folder,
+            "syncs": self.syncs,
+            "bytes_copied": self.bytes_copied,
+            "verify_errors": self.verify_errors,
+            "last_sync": self.last_sync,
+        }
+
+    def _copy(self, entry, obj):
+        """ 복사하면서 해시를 계산하고, 색인 때의 해시와 같을 때만 objects/에 올림 """
+        tmp = obj + ".tmp"
+        h = hashlib.blake2b(digest_size=16)
+        size = 0
+        try:
+            with open(entry.path, "rb") as src, open(tmp, "wb") as dst:
+                for chunk in iter(lambda: src.read(self.chunk_size), b""):
+                    h.update(chunk)
+                    dst.write(chunk)
+                    size += len(chunk)
+                dst.flush()
+                os.fsync(dst.fileno())  # 전원이 나가도 반쯤 쓴 파일이 objects/에 남지 않도록
+            if h.hexdigest() != entry.content_hash:
+                self.verify_errors += 1
+                raise OSError(f"해시 불일치 (복사 중 변경됨?): {entry.filename}")
+            os.replace(tmp, obj)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return size
+
+    def _publish(self, by_file):
+        """ library/ 를 새 내용으로 맞추고 (하드링크, 안 되면 복사) 조회 표를 교체, 안 쓰는 객체는 삭제
+
+            파일 하나를 못 올리면 그 파일은 지난번에 올린 항목을 그대로 씀 (저장소가 가득 찼거나 읽기 전용)
+        """
+        local = {}
+        for filename, entry in by_file.items():
+            obj = os.path.join(self.objects_dir, entry.content_hash + ".mp3")
+            path = os.path.join(self.library_dir, filename)
+            current = self.by_file.get(filename)
+            try:
+                if current is None or current.content_hash != entry.content_hash or not os.path.exists(path):
+                    tmp = path + ".tmp"
+                    try:
+                        os.link(obj, tmp)
+                    except OSError:
+                        shutil.copyfile(obj, tmp)  # 하드링크를 못 만드는 파일 시스템
+                    os.replace(tmp, path)  # 재생 중인 예전 파일은 열린 동안 그대로 유지됨
+                st = os.stat(path)
+            except OSError as e:
+                events().event("mirror_failed", None, text=f"{filename}: {e}")
+                if current is not None:
+                    local[filename] = current
+                continue
+            local[filename] = MediaEntry(filename, path, st.st_size, st.st_mtime_ns, entry.duration,
+                                         entry.content_hash, entry.loudness, entry.peak, entry.gain)
+
+        # 지우지 못한 파일은 다음 동기화 때 다시 (라이브러리/사본 내용에는 영향 없음)
+        removed = 0
+        wanted = {entry.content_hash + ".mp3" for entry in local.values()}
+        for folder, keep in ((self.library_dir, local), (self.objects_dir, wanted)):
+            try:
+                names = os.listdir(folder)
+            except OSError as e:
+                events().event("mirror_failed", None, text=str(e))
+                continue
+            for name in names:
+                if name in keep:
+                    continue
+                try:
+                    os.unlink(os.path.join(folder, name))
+                except OSError as e:
+                    events().event("mirror_failed", None, text=str(e))
+                    continue
+                if folder == self.library_dir:
+                    removed += 1
+
+        self._swap(local)
+        self._save_manifest(local)
+        return removed
+
+    def _swap(self, by_file):
+        # 참조만 바꿔 끼우므로 조회 스레드는 항상 완전한 색인만 봄
+        self.folder = self.library_dir if by_file else None
+        self.by_code = self.code_table(by_file)
+        self.by_file = by_file
+
+    def _load_manifest(self):
+        """ 이전 실행의 사본을 바로 사용 (USB를 훑기 전에도 재생 가능) """
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        by_file = {}
+        for filename, item in manifest.get("files", {}).items():
+            path = os.path.join(self.library_dir, filename)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if st.st_size != item["size"]:
+                continue  # 손상된 사본은 다음 동기화 때 다시 받음
+            by_file[filename] = MediaEntry(filename, path, st.st_size, st.st_mtime_ns, item.get("duration"),
+                                           item["hash"], item.get("loudness"), item.get("peak"),
+                                           item.get("gain", 1.0))
+        self.source_folder = manifest.get("source")
+        self._swap(by_file)
+
+    def _save_manifest(self, by_file):
+        manifest = {
+            "source": self.source.folder,
+            "files": {name: {"hash": e.content_hash, "size": e.size, "duration": e.duration,
+                             "loudness": e.loudness, "peak": e.peak, "gain": e.gain}
+                      for name, e in by_file.items()},
+        }
+        tmp = self.manifest_path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp, self.manifest_path)
+        except OSError as e:
+            events().event("mirror_failed", None, text=f"manifest: {e}")  # 다음 실행은 이전 목록으로 시작
+
+
+def create_media_index(mirror_dir=None, triggers_path=None, loudness=None):
+    """ 재생용 색인 (DDDS_MIRROR=off 이면 USB를 직접 읽음, 사본 폴더를 못 만들어도 USB 직접)
+
+        loudness: 목표 LUFS (None이면 DDDS_LOUDNESS 또는 기본값, off면 트랙 게인 없이)
+    """
+    mirror_dir = mirror_dir or os.environ.get("DDDS_MIRROR") or DEFAULT_MIRROR_DIR
+    analyzer = create_loudness_analyzer(loudness)
+    if mirror_dir == "off":
+        return MediaIndex(triggers_path=triggers_path, loudness=analyzer)
+    try:
+        return MirroredIndex(mirror_dir=mirror_dir, triggers_path=triggers_path, loudness=analyzer)
+    except OSError as e:
+        events().event("mirror_failed", None, text=str(e))  # 로컬 사본 없이 USB에서 바로 재생
+        return MediaIndex(triggers_path=triggers_path, loudness=analyzer)
+
+
+def open_media(media=None, mirror_dir=None, triggers_path=None, loudness=None):
+    """ 재생용 색인과 (아직 시작하지 않은) 감시 스레드
+
+        이전 사본이 있으면 바로 반환하고 동기화는 감시 스레드가 뒤에서, 없을 때만 처음 색인을 기다림
+    """
+    media = media or create_media_index(mirror_dir, triggers_path, loudness)
+    if media.folder is None:
+        media.refresh()
+    return media, MediaWatcher(media)
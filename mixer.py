@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+""" 이름 붙은 채널 여러 개를 한 출력으로 섞는 소프트웨어 믹서 (장치별 트랙과 알림음이 동시에 재생) """
+import shutil
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # numpy가 없으면 믹서 없이 기존 단일 플레이어 사용
+    np = None
+
+from eventlog import events
+from pcm_cache import PcmCache, AplaySink, DEFAULT_CACHE_DIR
+from player import create_player, playback_gain
+
+
+class MixerChannel:
+    """ 믹서 채널 하나 (플레이어와 같은 play/stop/status 인터페이스) """
+
+    applies_track_gain = True  # 캐시에는 트랙 게인이 이미 곱해져 있고, 대체 재생에는 여기서 곱함
+
+    def __init__(self, mixer, name, gain=1.0, ducks=False, duckable=True):
+        self.mixer = mixer
+        self.name = name
+        self.gain = gain
+        self.ducks = ducks  # 재생 중이면 다른 채널 볼륨을 낮춤 (알림음)
+        self.duckable = duckable  # 다른 채널이 duck할 때 같이 낮아지는지
+        self.duck = 1.0  # 현재 덕킹 배율 (블록마다 목표값으로 조금씩 이동)
+        self.clip = None  # 재생 중인 PcmClip
+        self.position = 0  # clip.data 안의 샘플 위치
+        self.track = None
+        self.queue = []  # 이어서 재생할 (PcmClip, 트랙) (play_sequence)
+        self.track_gain = 1.0  # 이번 재생에만 적용하는 볼륨 배율 (매니페스트의 gain)
+        self.span = None
+        self.fallback = None  # 캐시에 없는 트랙용 (처음 필요할 때 생성)
+        self.using_fallback = False
+
+    def play(self, track, span=None, gain=1.0):
+        self.play_sequence((track,), span, gain)
+
+    def play_sequence(self, tracks, span=None, gain=1.0):
+        """ 여러 트랙을 샘플 단위로 이어 붙여 재생 (블록 중간에서 다음 클립으로 넘어감) """
+        self.stop()
+        entries = [self.mixer.media.lookup_path(track) for track in tracks]
+        clips = []
+        for entry in entries:
+            clip = self.mixer.cache.get(entry) if entry else None
+            if clip is None and entry:
+                self.mixer.cache.prefetch(entry)  # 다음을 위해 디코딩 예약
+            clips.append(clip)
+
+        if None in clips:
+            # 하나라도 캐시에 없으면 이번에는 원본을 재생 (트랙 게인도 대체 플레이어가 곱함)
+            if self.fallback is None:
+                self.fallback = create_player()
+            self.fallback.play_sequence(tracks, span, playback_gain(self.fallback, entries, gain))
+            self.using_fallback = True
+            self.track = tracks[0]
+            return
+
+        if len(clips) > 1:
+            clips[1].willneed()
+        with self.mixer.cond:
+            self.clip = clips[0]
+            self.position = 0
+            self.track = tracks[0]
+            self.queue = list(zip(clips[1:], tracks[1:]))
+            self.track_gain = gain
+            self.span = span
+            self.mixer.cond.notify()
+
+    def stop(self):
+        if self.using_fallback:
+            self.fallback.stop()
+            self.using_fallback = False
+        with self.mixer.cond:
+            self.clip = None
+            self.track = None
+            self.queue = []
+            self.span = None
+
+    def advance(self):
+        """ 트랙 끝: 다음 클립으로 (mixer.cond 보유 상태에서 호출) """
+        if self.queue:
+            self.clip, self.track = self.queue.pop(0)
+            self.position = 0
+            if self.queue:
+                self.queue[0][0].willneed()
+        else:
+            self.clip = None
+            self.track = None
+
+    def status(self):
+        if self.using_fallback:
+            return self.fallback.status()
+        clip = self.clip
+        if clip is None:
+            return {"state": "stopped", "track": None}
+        state = "playing" if self.position else "starting"
+        return {"state": state, "track": self.track, "position_s": self.position / clip.channels / clip.sample_rate}
+
+    def close(self):
+        self.stop()
+        if self.fallback:
+            self.fallback.close()
+
+    @property
+    def active(self):
+        return self.clip is not None
+
+
+class Mixer:
+    """ 고정 크기 블록 단위로 활성 채널을 int32로 더해서 int16으로 잘라 출력 (numpy 벡터 연산) """
+
+    def __init__(self, cache, media, sink=None, block_frames=1024, duck_gain=0.3, duck_attack=2, duck_release=12):
+        if np is None:
+            raise RuntimeError("Mixer에는 numpy가 필요함")
+        self.cache = cache
+        self.media = media
+        self.sink = sink or AplaySink(cache.sample_rate, cache.channels)
+        self.block_frames = block_frames
+        self.samples = block_frames * cache.channels  # 블록 하나의 샘플 수 (채널 포함)
+        self.duck_gain = duck_gain  # 덕킹 중 다른 채널의 볼륨 배율
+        self.duck_attack = (1.0 - duck_gain) / max(1, duck_attack)  # 블록당 감소량
+        self.duck_release = (1.0 - duck_gain) / max(1, duck_release)  # 블록당 회복량
+        self.channels = {}  # 이름 → MixerChannel
+        self.cond = threading.Condition()
+        self.running = True
+        self.blocks = 0
+        self.underruns = 0  # 블록 계산이 재생 시간보다 오래 걸린 횟수
+        self.sink_errors = 0  # 출력 프로세스가 죽어서 버린 블록 수
+        self.mix_time = 0.0  # 믹싱 계산에 쓴 시간 합 (초)
+
+        # 블록마다 재사용하는 버퍼 (믹싱 중 메모리 할당 없음)
+        self.acc = np.zeros(self.samples, dtype=np.int32)
+        self.tmp = np.zeros(self.samples, dtype=np.int32)
+        self.out = np.zeros(self.samples, dtype=np.int16)
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def channel(self, name, gain=1.0, ducks=False, duckable=True):
+        """ 이름으로 채널을 가져오거나 새로 만듦 """
+        with self.cond:
+            channel = self.channels.get(name)
+            if channel is None:
+                channel = self.channels[name] = MixerChannel(self, name, gain, ducks, duckable)
+            return channel
+
+    def stop_all(self):
+        for channel in list(self.channels.values()):
+            channel.stop()
+
+    def close(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.thread.join()
+        for channel in list(self.channels.values()):
+            channel.close()
+        self.sink.close()
+
+    def stats(self):
+        return {
+            "blocks": self.blocks,
+            "underruns": self.underruns,
+            "sink_errors": self.sink_errors,
+            "mix_ms_per_block": self.mix_time / self.blocks * 1000 if self.blocks else 0.0,
+            "active": [c.name for c in self.channels.values() if c.active],
+        }
+
+    def mix(self):
+        """ 다음 블록 하나를 계산 (재생할 것이 없으면 None) """
+        with self.cond:
+            active = [c for c in self.channels.values() if c.active]
+            if not active:
+                return None
+
+            ducking = any(c.ducks for c in active)
+            acc, tmp = self.acc, self.tmp
+            acc.fill(0)
+            spans = []
+            for c in active:
+                target = self.duck_gain if ducking and c.duckable and not c.ducks else 1.0
+                if c.duck > target:
+                    c.duck = max(target, c.duck - self.duck_attack)
+                elif c.duck < target:
+                    c.duck = min(target, c.duck + self.duck_release)
+
+                # Q15 고정소수점 볼륨: (샘플 × gain×32768) >> 15
+                gain = np.int32(c.gain * c.track_gain * c.duck * 32768)
+                filled = 0
+                while filled < self.samples and c.clip is not None:
+                    data = c.clip.data
+                    n = min(self.samples - filled, len(data) // 2 - c.position)
+                    chunk = np.frombuffer(data, dtype=np.int16, count=n, offset=c.position * 2)
+                    np.multiply(chunk, gain, out=tmp[filled:filled + n])
+                    c.position += n
+                    filled += n
+                    if c.position * 2 >= len(data):
+                        c.advance()  # 트랙 끝: 시퀀스의 다음 클립으로 블록의 나머지를 채움
+                np.right_shift(tmp[:filled], 15, out=tmp[:filled])
+                np.add(acc[:filled], tmp[:filled], out=acc[:filled])
+
+                if c.span:
+                    spans.append(c.span)
+                    c.span = None
+
+            np.clip(acc, -32768, 32767, out=acc)
+            np.copyto(self.out, acc, casting="unsafe")
+            return self.out, spans
+
+    def _run(self):
+        block_time = self.block_frames / self.cache.sample_rate
+        while True:
+            with self.cond:
+                while self.running and not any(c.active for c in self.channels.values()):
+                    self.cond.wait()  # 재생할 것이 없으면 출력도 멈춤 (CPU 0)
+                if not self.running:
+                    return
+
+            start = time.perf_counter()
+            block = self.mix()
+            if block is None:
+                continue
+            elapsed = time.perf_counter() - start
+            self.mix_time += elapsed
+            self.blocks += 1
+            if elapsed > block_time:
+                self.underruns += 1
+
+            out, spans = block
+            try:
+                self.sink.write(memoryview(out).cast("B"))  # 파이프가 가득 차면 여기서 재생 속도에 맞춰 대기
+            except OSError as e:
+                # aplay가 죽음 (BrokenPipe 등): 이 블록은 버리고 다음 write에서 새로 띄움
+                self.sink_errors += 1
+                events().event("sink_failed", None, self.sink_errors, text=str(e))
+                self.sink.abort()
+                time.sleep(block_time)  # 계속 실패해도 스레드가 돌기만 하지 않게
+                continue
+            for span in spans:
+                span.mark("first_audio")
+
+
+def create_mixer(media, cache_dir=DEFAULT_CACHE_DIR, budget_bytes=256 << 20):
+    """ numpy, ffmpeg, aplay가 모두 있으면 Mixer, 없으면 None (호출한 쪽은 단일 플레이어 사용) """
+    if np is None or not (shutil.which("ffmpeg") and shutil.which("aplay")):
+        return None
+
+    cache = PcmCache(cache_dir, budget_bytes)
+    media.on_change.append(cache.warm)
+    cache.warm(media)
+    return Mixer(cache, media)
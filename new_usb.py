@@ -1,146 +1,166 @@
 #!/usr/bin/env python3
-import bluetooth
-import time
-import subprocess
+import asyncio
+import concurrent.futures
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QVBoxLayout, QWidget
+from PyQt5.QtCore import QThread
+from debounce import TriggerFilter
+from eventlog import events
+from hub import DeviceHub
+from mirror import open_media
+from mixer import create_mixer
+from pcm_cache import create_cached_player
+from player import playback_gain
+from status_model import StatusModel
+from status_view import StatusView
+from supervisor import Supervisor
+from tracing import Tracer, install_signal_dump
+from transports import configured_addresses
 
 class BluetoothWorker(QThread):
-    update_signal = pyqtSignal(str)  # UI를 업데이트하기 위한 시그널
-
     def __init__(self):
         super().__init__()
-        self.vlc_process = None  # VLC 프로세스 핸들
         self.running = True  # 스레드 실행 상태
-        self.mac_addresses = ['08:D1:F9:26:65:D2', '08:D1:F9:27:E0:B2']  # 두 개의 ESP32 MAC 주소
-        self.sockets = {}  # 블루투스 소켓 저장
+        self.status = StatusModel(max_hz=10)  # 장치별 화면 상태 (위젯은 초당 최대 10번만 갱신)
+        # 두 개의 ESP32 MAC 주소 (DDDS_TRANSPORTS로 tcp:// unix:// udp:// 주소를 대신 지정 가능)
+        self.mac_addresses = configured_addresses(['08:D1:F9:26:65:D2', '08:D1:F9:27:E0:B2'])
+        self.tracer = Tracer()  # 장치/단계별 지연 히스토그램
+
+        # USB 'final' 폴더를 로컬 사본으로 동기화해 두고 재생은 사본에서, 마운트/파일 변경 시에만 감시 스레드가 갱신
+        self.media, self.media_watcher = open_media()
+        self.media_watcher.start()
+
+        # 장치별 채널과 알림 채널을 섞어서 출력하는 믹서 (알림음이 재생 중인 트랙을 끊지 않고 볼륨만 낮춤)
+        # numpy/ffmpeg/aplay가 없으면 모든 재생이 플레이어 하나를 공유 (새 재생이 이전 재생을 끊음)
+        self.mixer = create_mixer(self.media)
+        self.priorities = {}  # 채널(플레이어) → 지금 재생 중인 코드의 우선순위 (재생 스레드만 사용)
+        # 재생 명령은 이벤트 루프 밖의 스레드 하나에서 받은 순서대로 (play가 막혀도 수신은 계속)
+        self.playback = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="playback")
+        if self.mixer:
+            self.notify_player = self.mixer.channel("notify", ducks=True)
+        else:
+            self.player = create_cached_player(self.media)
+            self.notify_player = self.player
+
+        # 모든 ESP32 연결을 관리하는 이벤트 루프 허브
+        self.hub = DeviceHub(
+            self.mac_addresses,
+            self.handle_message,
+            on_connect=self.on_connected,
+            on_disconnect=self.on_disconnected,
+            retry_delay=0.5,  # 첫 재시도는 0.5초 후, 실패할 때마다 두 배 (지터 포함)
+            max_retry_delay=30.0,  # 재시도 간격 상한
+            tracer=self.tracer,
+            debounce=TriggerFilter(window=0.05),  # 버튼 채터링/재전송으로 50ms 안에 다시 온 같은 코드는 버림
+            keepalive=2.0  # 조용해도 2초마다 박동 (바이너리 장치에는 PING, 6초 동안 응답이 없으면 재연결)
+        )
+        # 이벤트 루프나 장치 코루틴의 박동이 5초 넘게 멈추면 그것만 다시 시작
+        self.supervisor = Supervisor(deadline=5.0)
+
+    def player_for(self, mac, channel=None):
+        """ 장치별 재생 채널 (매니페스트가 채널을 정했으면 그 채널, 믹서가 없으면 공용 플레이어) """
+        if self.mixer:
+            return self.mixer.channel(channel or mac)
+        return self.player
 
     def stop_current_mp3(self):
         """ 현재 실행 중인 MP3를 강제로 중지 """
-        if self.vlc_process:
-            self.vlc_process.terminate()  # VLC 프로세스 종료
-            self.vlc_process.wait()  # 종료 완료 대기
-            self.vlc_process = None
+        if self.mixer:
+            self.mixer.stop_all()
+        else:
+            self.player.stop()
 
     def find_final_folder(self):
-        """ USB 장치에서 'final' 폴더의 경로를 찾음 """
-        base_path = "/media/pi/"
-        if not os.path.exists(base_path):
-            return None  # USB 경로 없음
+        """ 미디어 색인이 찾아 둔 'final' 폴더 경로 (없으면 None) """
+        return self.media.folder
 
-        for usb_name in os.listdir(base_path):
-            usb_path = os.path.join(base_path, usb_name)
-            final_path = os.path.join(usb_path, "final")
+    def play_notification_sound(self, sound_file):
+        """ 알림 MP3 파일 재생 """
+        final_folder = self.find_final_folder()
+        if not final_folder:
+            self.status.set_message("USB with 'final' folder not found.")
+            return
 
-            if os.path.isdir(final_path):  # 'final' 폴더가 존재하면 반환
-                return final_path
+        entry = self.media.lookup_file(sound_file)
+        if entry:
+            self.notify_player.play(entry.path, None, playback_gain(self.notify_player, [entry]))  # 알림 채널에서 재생 (믹서가 없으면 기존 MP3를 끊음)
+        else:
+            self.status.set_message(f"Error: File not found - {os.path.join(final_folder, sound_file)}")
 
-        return None  # 'final' 폴더를 찾지 못함
+    def on_connected(self, mac):
+        """ 연결 성공 시 connected.mp3 실행 (허브의 알림 스레드에서 호출, 수신은 바로 시작) """
+        self.status.connected(mac)
+        self.play_notification_sound("connected.mp3")
 
-    def play_notification_sound(self, sound_file):
-        """ 알림 MP3 파일 재생 """
+    def on_disconnected(self, mac):
+        """ 연결이 끊어졌을 때 disconnected.mp3 실행 (허브가 백오프하며 재연결) """
+        self.status.disconnected(mac, "reconnecting")
+        self.play_notification_sound("disconnected.mp3")
+
+    def handle_message(self, mac, data, span=None):
+        """ 블루투스 데이터 수신 및 MP3 실행 (허브 이벤트 루프에서 호출) """
+        # 받은 트리거는 상태 모델에만 기록 (화면은 모아서 갱신)
+        self.status.received(mac, data)
+
+        # 'final' 폴더의 경로 찾기
         final_folder = self.find_final_folder()
         if not final_folder:
-            self.update_signal.emit("USB with 'final' folder not found.")
+            self.status.set_message("USB with 'final' folder not found.")
             return
 
-        sound_path = os.path.join(final_folder, sound_file)
-        if os.path.exists(sound_path):
-            self.stop_current_mp3()  # 기존 MP3 중지
-            subprocess.Popen(
-                ["cvlc", "--play-and-exit", sound_path],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+        # 색인에서 트리거 코드(시퀀스, "1,3,2" 같은 여러 코드 포함)에 해당하는 MP3 조회 (파일 시스템 접근 없음)
+        entries, binding = self.media.resolve(data)
+        if entries:
+            self.playback.submit(self.play_entries, mac, entries, binding, span)
         else:
-            self.update_signal.emit(f"Error: File not found - {sound_path}")
-
-    def connect_bluetooth(self, mac):
-        """ 특정 ESP32와 블루투스 연결 시도 """
-        port = 1
-        while self.running:
-            try:
-                self.update_signal.emit(f"Attempting to connect to {mac}...")
-                sock = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
-                sock.connect((mac, port))
-                self.update_signal.emit(f"Connected to {mac}")
-
-                # 연결 성공 시 connected.mp3 실행 및 2초 대기
-                self.play_notification_sound("connected.mp3")
-                time.sleep(2)
-
-                return sock  # 연결된 소켓 반환
-            except bluetooth.BluetoothError as e:
-                self.update_signal.emit(f"Connection failed ({mac}): {e}")
-                time.sleep(3)  # 3초 후 다시 시도
-
-    def listen_bluetooth(self, mac):
-        """ 블루투스 데이터 수신 및 MP3 실행 """
-        while self.running:
-            if mac not in self.sockets:
-                self.sockets[mac] = self.connect_bluetooth(mac)
-
-            sock = self.sockets[mac]
-            try:
-                while self.running:
-                    data = sock.recv(1024).decode('utf-8').strip()
-
-                    # 빈 데이터 또는 공백만 있는 데이터가 들어오면 무시
-                    if not data:
-                        self.update_signal.emit(f"[{mac}] Warning: Received empty data. Ignoring...")
-                        continue
-
-                    # 블루투스에서 받은 데이터 로그 출력
-                    self.update_signal.emit(f"[{mac}] Received: {data}")
-
-                    # 'final' 폴더의 경로 찾기
-                    final_folder = self.find_final_folder()
-                    if not final_folder:
-                        self.update_signal.emit(f"[{mac}] USB with 'final' folder not found.")
-                        continue
-
-                    # MP3 파일 경로 설정
-                    mp3_files = {
-                        '1': os.path.join(final_folder, "stemon1.mp3"),
-                        '2': os.path.join(final_folder, "stemon2.mp3"),
-                        '3': os.path.join(final_folder, "stemon3.mp3"),
-                        '4': os.path.join(final_folder, "stemon4.mp3"),
-                    }
-
-                    if data in mp3_files:
-                        mp3_path = mp3_files[data]
-
-                        # 파일이 존재하는지 확인 후 실행
-                        if os.path.exists(mp3_path):
-                            self.stop_current_mp3()  # 기존 MP3 강제 종료
-                            self.update_signal.emit(f"[{mac}] Playing {data}.mp3")
-                            self.vlc_process = subprocess.Popen(
-                                ["cvlc", "--play-and-exit", mp3_path],
-                                stdout=subprocess.DEVNULL,
-                                stderr=subprocess.DEVNULL
-                            )
-                        else:
-                            self.update_signal.emit(f"[{mac}] Error: File not found - {mp3_path}")
-
-            except bluetooth.BluetoothError:
-                self.update_signal.emit(f"[{mac}] Connection lost. Reconnecting...")
-                
-                # 연결이 끊어졌을 때 disconnected.mp3 실행
-                self.play_notification_sound("disconnected.mp3")
-
-                sock.close()
-                del self.sockets[mac]  # 소켓 삭제하여 재연결 시도
+            files = self.media.files_for(data)
+            if files:
+                missing = [os.path.join(final_folder, name) for name in files if self.media.lookup_file(name) is None]
+                self.status.error(mac, f"File not found - {', '.join(missing)}")
+
+    def play_entries(self, mac, entries, binding, span=None):
+        """ 트리거 하나 재생 (재생 스레드에서 호출, 실패는 이벤트 로그와 화면에만 남기고 연결은 유지) """
+        player = self.player_for(mac, binding.channel)
+        try:
+            if binding.priority < self.priorities.get(player, 0) and player.status()["state"] != "stopped":
+                return  # 같은 채널에서 더 높은 우선순위 트랙이 재생 중
+            self.priorities[player] = binding.priority
+            # 이 채널의 기존 재생만 끊고 바로 전환 (여러 트랙이면 다음 트랙을 미리 열어 두고 끊김 없이 이어서)
+            gain = playback_gain(player, entries, binding.gain)
+            if len(entries) == 1:
+                player.play(entries[0].path, span, gain)
+            else:
+                player.play_sequence([entry.path for entry in entries], span, gain)
+        except Exception as e:
+            events().event("play_failed", mac, text=str(e))
+            self.status.error(mac, f"playback failed: {e}")
+            return
+        if span:
+            span.mark("started")
+        self.status.playing(mac, " + ".join(entry.filename for entry in entries))
 
     def run(self):
-        """ 블루투스 메시지를 수신하고 MP3를 재생 """
-        from threading import Thread  # 스레드 사용하여 다중 연결 유지
-
-        for mac in self.mac_addresses:
-            thread = Thread(target=self.listen_bluetooth, args=(mac,))
-            thread.daemon = True
-            thread.start()
+        """ 하나의 이벤트 루프에서 모든 ESP32 연결을 유지하며 MP3를 재생 """
+        self.supervisor.watch("hub", self.hub.heartbeat, run=self.run_hub, abort=self.hub.abort,
+                              alive=self.isRunning)
+        for mac, device in self.hub.devices.items():
+            # 장치 코루틴이 예외로 끝났거나 멈췄으면 그 장치만 다시 시작
+            self.supervisor.watch(f"recv-{mac}", device.heartbeat,
+                                  abort=lambda mac=mac: self.hub.restart_device(mac))
+        self.supervisor.start()
+        self.run_hub()
+
+    def run_hub(self):
+        asyncio.run(self.hub.run())
+
+    def stop(self):
+        """ 모든 연결 종료 """
+        self.running = False
+        self.supervisor.stop()
+        self.media_watcher.stop()
+        self.hub.stop()
+        self.playback.shutdown(wait=False, cancel_futures=True)
 
 class BluetoothApp(QWidget):
     def __init__(self):
@@ -150,23 +170,27 @@ class BluetoothApp(QWidget):
         self.setWindowTitle("Bluetooth MP3 Player")
         self.setGeometry(100, 100, 400, 200)
 
-        # QLabel로 출력 표시
-        self.label = QLabel("Waiting for Bluetooth connection...", self)
-        self.label.setStyleSheet("font-size: 16px; color: blue;")
+        # 블루투스 작업을 백그라운드 스레드에서 실행
+        self.worker = BluetoothWorker()
+
+        # 안내 문구 + ESP32마다 한 줄 (연결 상태, 마지막 트리거, 재생 중인 트랙, 횟수)
+        self.view = StatusView(self.worker.status, "Waiting for Bluetooth connection...", self)
+        for mac in self.worker.mac_addresses:
+            self.worker.status.add_device(mac)  # 연결 전에도 줄을 미리 보여줌
 
         # 레이아웃 설정
         layout = QVBoxLayout()
-        layout.addWidget(self.label)
+        layout.addWidget(self.view)
         self.setLayout(layout)
 
-        # 블루투스 작업을 백그라운드 스레드에서 실행
-        self.worker = BluetoothWorker()
-        self.worker.update_signal.connect(self.update_label)
         self.worker.start()
 
-    def update_label(self, message):
-        """ QLabel에 출력 메시지를 업데이트하는 함수 """
-        self.label.setText(message)
+    def closeEvent(self, event):
+        """ 창을 닫을 때 모든 연결과 재생 종료 """
+        self.worker.stop()
+        self.worker.wait()
+        self.worker.stop_current_mp3()
+        event.accept()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -174,5 +198,6 @@ if __name__ == "__main__":
     # 앱 실행
     window = BluetoothApp()
     window.show()
+    install_signal_dump(window.worker.tracer)  # kill -USR1 <pid> 으로 지연 히스토그램 출력
 
     sys.exit(app.exec_())
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+""" 트랙을 한 번만 PCM으로 디코딩해서 로컬 디스크에 두고 mmap으로 바로 재생 """
+import mmap
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+from collections import OrderedDict
+
+from eventlog import events
+from player import create_player, playback_gain
+
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.cache/ddds/pcm")
+
+# 캐시 파일 헤더: 매직, 원본 내용 해시(32자), 샘플레이트, 채널 수, 프레임 수, 디코딩 때 곱한 게인
+_HEADER = struct.Struct("<8s32sIHQf")
+_MAGIC = b"DDDSPCM2"
+_HEADER_SIZE = 64  # 헤더 영역 크기 (뒤쪽은 0으로 채움)
+
+
+def ffmpeg_decode(src, dst, sample_rate, channels, gain=1.0):
+    """ ffmpeg으로 MP3 → signed 16-bit little-endian PCM 파일 디코딩 (트랙 게인은 디코딩하면서 곱함) """
+    volume = ["-af", f"volume={gain:.4f}"] if gain != 1.0 else []
+    with open(dst, "ab") as out:
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-nostdin", "-i", src, *volume,
+             "-f", "s16le", "-ac", str(channels), "-ar", str(sample_rate), "-"],
+            stdout=out,
+            stderr=subprocess.DEVNULL,
+            check=True
+        )
+
+
+class PcmClip:
+    """ mmap으로 연결된 디코딩 결과 (data는 PCM 본문의 memoryview, 복사 없음) """
+
+    def __init__(self, content_hash, mapping, sample_rate, channels, frames, gain=1.0):
+        self.content_hash = content_hash
+        self.gain = gain  # 샘플에 이미 곱해진 트랙 게인
+        self.mapping = mapping
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = frames
+        self.data = memoryview(mapping)[_HEADER_SIZE:_HEADER_SIZE + frames * channels * 2]
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    def willneed(self):
+        """ 곧 재생할 클립의 페이지를 미리 읽어 두라고 커널에 알림 (첫 write가 디스크를 기다리지 않도록) """
+        madvise = getattr(self.mapping, "madvise", None)
+        if madvise is not None and hasattr(mmap, "MADV_WILLNEED"):
+            try:
+                madvise(mmap.MADV_WILLNEED)
+            except OSError:
+                pass
+
+
+class PcmCache:
+    """ 내용 해시 → PcmClip 캐시 (디스크 용량 한도, LRU 제거, 적중/실패 카운터) """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, budget_bytes=256 << 20,
+                 sample_rate=44100, channels=2, decoder=ffmpeg_decode):
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.decoder = decoder
+        self.files = OrderedDict()  # 내용 해시 → 캐시 파일 크기 (오래 안 쓴 순서)
+        self.clips = {}  # 내용 해시 → 열려 있는 PcmClip
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.decodes = 0
+        self.decode_errors = 0
+        self.lock = threading.Lock()
+        self.pending = set()  # 디코딩 대기/진행 중인 해시
+        self.failed = set()  # 디코딩에 실패한 해시 (내용이 바뀌어 해시가 달라지기 전까지 다시 시도하지 않음)
+        self.stale = set()  # 곱해 둔 게인이 색인과 달라서 다시 디코딩할 해시 (그때까지 파일은 그대로)
+        self.decode_queue = queue.Queue()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_existing()
+        threading.Thread(target=self._decode_loop, daemon=True).start()
+
+    def get(self, entry):
+        """ 캐시에 있으면 PcmClip, 없으면 None (디코딩은 하지 않음) """
+        key = entry.content_hash
+        with self.lock:
+            clip = self.clips.get(key)
+            if clip is None and key in self.files:
+                clip = self._open(key)
+            if clip is not None and abs(clip.gain - entry.gain) > 1e-4:
+                # 게인이 바뀜 (목표 라우드니스 변경, 다시 측정): 교체는 백그라운드 디코딩이 (여기서는 파일을 건드리지 않음)
+                self.stale.add(key)
+                clip = None
+
+            if clip is None:
+                self.misses += 1
+                return None
+
+            self.files.move_to_end(key)
+            self.hits += 1
+            return clip
+
+    def load(self, entry):
+        """ 캐시에 없으면 그 자리에서 디코딩 (재생 경로가 아닌 곳에서 사용) """
+        clip = self.get(entry)
+        if clip is None and entry.content_hash not in self.failed:
+            self._decode(entry)
+            clip = self.get(entry)
+        return clip
+
+    def prefetch(self, entry):
+        """ 백그라운드 디코딩 예약 (이미 있거나 대기 중이면 무시) """
+        with self.lock:
+            key = entry.content_hash
+            if (key in self.files and key not in self.stale) or key in self.pending or key in self.failed:
+                return
+            self.pending.add(key)
+        self.decode_queue.put(entry)
+
+    def warm(self, index):
+        """ 색인된 모든 트랙을 미리 디코딩 (MediaIndex.on_change 콜백용) """
+        for entry in index.by_file.values():
+            self.prefetch(entry)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "decodes": self.decodes,
+                "decode_errors": self.decode_errors,
+                "failed": len(self.failed),
+                "entries": len(self.files),
+                "used_bytes": self.used_bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".pcm")
+
+    def _load_existing(self):
+        """ 이전 실행에서 남은 캐시 파일을 최근 사용 순서로 등록 """
+        found = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pcm"):
+                continue
+            st = os.stat(os.path.join(self.cache_dir, name))
+            found.append((st.st_mtime, name[:-4], st.st_size))
+
+        for _, key, size in sorted(found):
+            self.files[key] = size
+            self.used_bytes += size
+        self._evict()
+
+    def _open(self, key):
+        """ 캐시 파일을 mmap으로 열고 헤더 검증 (깨진 파일은 지움, lock 보유 상태에서 호출) """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._forget(key)
+            return None
+
+        magic, content_hash, sample_rate, channels, frames, gain = _HEADER.unpack_from(mapping)
+        valid = (magic == _MAGIC and content_hash.decode() == key
+                 and sample_rate == self.sample_rate and channels == self.channels
+                 and len(mapping) == _HEADER_SIZE + frames * channels * 2)
+        if not valid:
+            mapping.close()
+            self._forget(key)
+            return None
+
+        clip = PcmClip(key, mapping, sample_rate, channels, frames, gain)
+        self.clips[key] = clip
+        return clip
+
+    def _decode_loop(self):
+        while True:
+            entry = self.decode_queue.get()
+            self._decode(entry)
+
+    def _decode(self, entry):
+        """ 임시 파일에 헤더 + PCM을 쓰고 완성되면 rename으로 교체 """
+        key = entry.content_hash
+        tmp = self._path(key) + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(b"\0" * _HEADER_SIZE)
+            self.decoder(entry.path, tmp, self.sample_rate, self.channels, entry.gain)
+
+            size = os.path.getsize(tmp)
+            frames = (size - _HEADER_SIZE) // (self.channels * 2)
+            with open(tmp, "r+b") as f:
+                f.write(_HEADER.pack(_MAGIC, key.encode(), self.sample_rate, self.channels, frames, entry.gain))
+                f.truncate(_HEADER_SIZE + frames * self.channels * 2)
+            os.replace(tmp, self._path(key))
+        except (OSError, subprocess.SubprocessError):
+            events().event("decode_failed", None, text=entry.filename)
+            with self.lock:
+                self.decode_errors += 1
+                self.pending.discard(key)
+                self.failed.add(key)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+
+        with self.lock:
+            self.pending.discard(key)
+            self.stale.discard(key)
+            self.clips.pop(key, None)  # 다시 디코딩한 경우 다음 get이 새 파일을 엶 (재생 중인 mmap은 그대로)
+            self.decodes += 1
+            size = os.path.getsize(self._path(key))
+            self.used_bytes += size - self.files.pop(key, 0)
+            self.files[key] = size
+            self._evict()
+
+    def _evict(self):
+        """ 용량 한도를 넘으면 가장 오래 안 쓴 파일부터 삭제 (lock 보유 상태에서 호출) """
+        while self.used_bytes > self.budget_bytes and len(self.files) > 1:
+            key = next(iter(self.files))
+            self._forget(key)
+            self.evictions += 1
+
+    def _forget(self, key):
+        # 재생 중인 클립의 mmap은 파일을 지워도 유지되므로 참조만 끊음
+        self.used_bytes -= self.files.pop(key, 0)
+        self.clips.pop(key, None)
+        self.stale.discard(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class AplaySink:
+    """ raw PCM을 상주 aplay 프로세스의 stdin으로 흘려보내는 출력 """
+
+    def __init__(self, sample_rate=44100, channels=2, buffer_us=50000, pipe_bytes=16384):
+        self.command = ["aplay", "-q", "-t", "raw", "-f", "S16_LE",
+                        "-c", str(channels), "-r", str(sample_rate),
+                        f"--buffer-time={buffer_us}", "-"]
+        self.pipe_bytes = pipe_bytes  # 파이프에 쌓이는 양을 줄여서 트랙 전환 지연을 제한
+        self.process = None
+
+    def write(self, data):
+        """ memoryview 조각을 그대로 파이프에 씀 (중간 복사 없음) """
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+
+        fd = self.process.stdin.fileno()
+        written = 0
+        while written < len(data):
+            written += os.write(fd, data[written:])
+        return written
+
+    def close(self):
+        if self.process:
+            self.process.stdin.close()
+            self.process.wait()
+            self.process = None
+
+    def abort(self):
+        """ 출력 장치가 멈춰 write가 막혔을 때 aplay를 죽여서 깨움 (다음 write가 새로 띄움) """
+        process = self.process
+        if process and process.poll() is None:
+            process.kill()
+            process.wait()  # 다음 write가 죽은 것을 보고 바로 새로 띄우도록
+
+    def _start(self):
+        if self.process:
+            try:
+                self.process.stdin.close()  # 죽은 프로세스의 파이프
+            except OSError:
+                pass
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            import fcntl
+            fcntl.fcntl(self.process.stdin.fileno(), fcntl.F_SETPIPE_SZ, self.pipe_bytes)
+        except (ImportError, AttributeError, OSError):
+            pass
+
+
+class PcmPlayer:
+    """ 캐시된 PCM을 mmap에서 바로 출력하는 플레이어 (캐시에 없으면 대체 플레이어로 재생) """
+
+    applies_track_gain = True  # 캐시에는 트랙 게인이 이미 곱해져 있고, 대체 재생에는 여기서 곱함
+
+    def __init__(self, cache, media, sink=None, fallback=None, block_frames=1024):
+        self.cache = cache
+        self.media = media
+        self.sink = sink or AplaySink(cache.sample_rate, cache.channels)
+        self.fallback = fallback or create_player()
+        self.block_bytes = block_frames * cache.channels * 2
+        self.track = None
+        self.mode = None  # 'pcm' / 'fallback' / None
+        self.stream = None  # 재생 스레드
+        self.stop_event = threading.Event()
+        self.position = 0  # 출력한 바이트 수
+        self.lock = threading.Lock()
+
+    def play(self, track, span=None, gain=1.0):
+        self.play_sequence((track,), span, gain)
+
+    def play_sequence(self, tracks, span=None, gain=1.0):
+        """ 여러 트랙을 같은 aplay 파이프에 이어서 씀 (트랙 사이 간격 없음, 다음 클립은 미리 읽어 둠)
+
+            gain이 1.0이 아니면 블록마다 numpy로 곱해서 씀 (numpy가 없으면 대체 플레이어가 볼륨 조절)
+        """
+        np = _numpy() if gain != 1.0 else None
+        with self.lock:
+            self._stop_locked()
+
+            entries = [self.media.lookup_path(track) for track in tracks]
+            clips = []
+            for entry in entries:
+                clip = self.cache.get(entry) if entry else None
+                if clip is None and entry:
+                    self.cache.prefetch(entry)  # 다음을 위해 디코딩 예약
+                clips.append(clip)
+
+            if None in clips or (gain != 1.0 and np is None):
+                # 하나라도 캐시에 없으면 이번에는 원본을 재생 (트랙 게인도 대체 플레이어가 곱함)
+                fallback_gain = playback_gain(self.fallback, entries, gain)
+                if len(tracks) == 1:
+                    self.fallback.play(tracks[0], span, fallback_gain)
+                else:
+                    self.fallback.play_sequence(tracks, span, fallback_gain)
+                self.mode = "fallback"
+            else:
+                self.stop_event = threading.Event()
+                self.position = 0
+                self.stream = threading.Thread(target=self._stream,
+                                               args=(clips, tracks, self.stop_event, span, gain, np), daemon=True)
+                self.stream.start()
+                self.mode = "pcm"
+            self.track = tracks[0]
+
+    def stop(self):
+        with self.lock:
+            self._stop_locked()
+
+    def status(self):
+        if self.mode == "fallback":
+            return self.fallback.status()
+        if self.mode == "pcm" and self.stream.is_alive():
+            state = "playing" if self.position else "starting"
+            return {"state": state, "track": self.track, "position_bytes": self.position}
+        return {"state": "stopped", "track": None}
+
+    def close(self):
+        self.stop()
+        self.sink.close()
+        self.fallback.close()
+
+    def abort(self):
+        """ 감시자용: 막힌 출력을 풀어서 멈춘 play()/stop()이 돌아오게 함 (잠금을 잡지 않음) """
+        self.stop_event.set()
+        self.sink.abort()
+        abort = getattr(self.fallback, "abort", None)
+        if abort:
+            abort()
+
+    def _stop_locked(self):
+        if self.mode == "fallback":
+            self.fallback.stop()
+        elif self.mode == "pcm":
+            self.stop_event.set()
+            self.stream.join()
+            if self.position:
+                # 파이프와 aplay 버퍼에 남은 예전 소리(~140ms)를 버림: 다음 write가 aplay를 새로 띄움
+                self.sink.abort()
+        self.mode = None
+        self.track = None
+
+    def _stream(self, clips, tracks, stop_event, span, gain=1.0, np=None):
+        block = self.block_bytes
+        scale = int(gain * 32768) if np is not None else None  # Q15 고정소수점 (믹서와 같은 방식)
+        total = 0
+        for i, clip in enumerate(clips):
+            if i + 1 < len(clips):
+                clips[i + 1].willneed()  # 지금 트랙을 내보내는 동안 다음 트랙을 메모리로
+            if i:
+                self.track = tracks[i]
+            data = clip.data
+            pos = 0
+            while pos < len(data) and not stop_event.is_set():
+                chunk = data[pos:pos + block]
+                if scale is not None:
+                    samples = np.frombuffer(chunk, dtype=np.int16).astype(np.int32)
+                    samples *= scale
+                    samples >>= 15
+                    np.clip(samples, -32768, 32767, out=samples)
+                    chunk = samples.astype(np.int16).tobytes()
+                try:
+                    pos += self.sink.write(chunk)
+                except OSError:
+                    return  # 출력 프로세스가 죽음 (abort 등), 다음 재생 때 다시 띄움
+                self.position = total + pos
+                if span:
+                    span.mark("first_audio")  # 첫 버퍼를 출력 장치에 넘긴 시점
+                    span = None
+            total += pos
+
+
+def _numpy():
+    """ 볼륨을 곱해야 할 때만 numpy를 불러옴 (기동 시간, 없으면 None) """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def create_cached_player(media, cache_dir=DEFAULT_CACHE_DIR, budget_bytes=256 << 20):
+    """ ffmpeg와 aplay가 있으면 PCM 캐시 플레이어, 없으면 일반 플레이어 """
+    if not (shutil.which("ffmpeg") and shutil.which("aplay")):
+        return create_player()
+
+    cache = PcmCache(cache_dir, budget_bytes)
+    media.on_change.append(cache.warm)
+    cache.warm(media)
+    return PcmPlayer(cache, media)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+""" Qt 없이 동작하는 트리거 수신 → 대기열 → 재생 파이프라인 (QThread 래퍼와 벤치마크가 공유) """
+import select
+import socket
+import threading
+import time
+
+from eventlog import events
+from player import playback_gain
+from protocol import LinkTracker
+from reconnect import Backoff, ReconnectStats
+from scheduler import TriggerScheduler
+from supervisor import Heartbeat
+from tracing import Tracer
+from transports import connect as transport_connect, make_framer
+
+
+class TriggerReceiver:
+    """ 장치 하나에 연결해서 트리거를 받아 on_message(data, span)로 넘기는 수신 루프 """
+
+    def __init__(self, address, on_message, connect=transport_connect, tracer=None, retry_delay=0.5,
+                 framer=make_framer, max_retry_delay=30.0, stable_after=5.0, status=None, debounce=None,
+                 keepalive=None, link_timeout=None, connect_timeout=30.0):
+        self.address = address  # MAC 또는 transports 주소 (tcp:// unix:// udp:// ...)
+        self.on_message = on_message
+        self.connect = connect  # connect(address) -> 연결된 블로킹 소켓
+        self.framer = framer  # framer(address) -> 연결마다 새 프레이머
+        self.tracer = tracer or Tracer()
+        self.backoff = Backoff(retry_delay, max_retry_delay)  # 연결 실패마다 재시도 대기를 늘림
+        self.stable_after = stable_after  # 이만큼 유지된 연결이 끊기면 백오프를 처음부터 (초)
+        self.reconnect = ReconnectStats()
+        self.status = status  # StatusModel (화면 표시용, 없으면 생략)
+        self.debounce = debounce  # TriggerFilter (중복 트리거를 대기열 전에 버림, 없으면 모두 통과)
+        self.sock = None
+        self.running = True
+        self.wakeup = threading.Event()  # stop()이 재시도 대기를 바로 깨움
+        self.connects = 0
+        self.disconnects = 0
+        self.messages = 0
+        self.suppressed = 0  # 디바운스로 버린 트리거 수
+        self.link = LinkTracker()  # 바이너리 프로토콜 장치의 순번/시계 추적 (텍스트 장치면 비어 있음)
+        self.keepalive = keepalive  # 이만큼 조용하면 바이너리 장치에 PING, 감시자용 박동도 이 주기로 (None이면 끔)
+        self.link_timeout = link_timeout or (keepalive * 3 if keepalive else None)  # PING에도 답이 없으면 재연결
+        self.connect_timeout = connect_timeout  # 연결 시도가 이보다 오래 막히면 멈춘 것으로 봄 (초)
+        self.heartbeat = Heartbeat()
+        self.generation = 0  # abort()마다 증가, 예전 루프는 자기 세대가 아니면 끝남
+        self.link_timeouts = 0  # 응답 없는 링크를 끊은 횟수
+
+    def run(self):
+        """ 연결을 유지하면서 메시지 수신 (끊기면 백오프하며 다시 연결) """
+        generation = self.generation
+        heartbeat = self.heartbeat
+        while self.running and self.generation == generation:
+            self.reconnect.attempt()
+            heartbeat.beat(self.connect_timeout)
+            try:
+                sock = self.connect(self.address)
+            except OSError as e:
+                delay = self.backoff.next()
+                self.reconnect.failed(delay)
+                events().event("connect_failed", self.address, int(delay * 1000), text=str(e))
+                if self.status:
+                    self.status.disconnected(self.address, f"retry in {delay:.1f}s")
+                heartbeat.beat(delay)
+                self.wakeup.wait(delay)
+                continue
+            if self.generation != generation:
+                sock.close()  # 연결하는 동안 감시자가 이 루프를 버림
+                return
+            self.sock = sock
+
+            connected_at = time.monotonic()
+            self.connects += 1
+            self.reconnect.connected()
+            events().event("connected", self.address)
+            if self.status:
+                self.status.connected(self.address)
+            try:
+                self._receive(sock, generation)
+            except OSError as e:
+                if self.running:
+                    events().event("connection_lost", self.address, text=str(e))
+            finally:
+                sock.close()
+                self.disconnects += 1
+                self.reconnect.disconnected()
+                if self.status:
+                    self.status.disconnected(self.address)
+
+            # 오래 유지된 연결이면 바로 재연결, 붙었다 끊겼다 하면 백오프
+            if time.monotonic() - connected_at >= self.stable_after:
+                self.backoff.reset()
+            elif self.running:
+                delay = self.backoff.next()
+                self.reconnect.retry_in = delay
+                heartbeat.beat(delay)
+                self.wakeup.wait(delay)
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.sock:
+            self.sock.close()
+
+    def abort(self):
+        """ 감시자용: 지금 루프를 버리고 (막힌 recv는 소켓을 닫아 깨움) 새 스레드가 run()을 이어받게 함 """
+        self.generation += 1
+        self.wakeup.set()
+        self.wakeup = threading.Event()
+        sock = self.sock
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)  # 다른 스레드의 recv는 close만으로는 깨지 않을 수 있음
+            except OSError:
+                pass
+            sock.close()
+
+    def snapshot(self):
+        return {
+            "address": self.address,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "messages": self.messages,
+            "suppressed": self.suppressed,
+            "link_timeouts": self.link_timeouts,
+            "link": self.link.snapshot() if self.link.hellos else None,
+            **self.reconnect.snapshot(),
+        }
+
+    def _receive(self, sock, generation=None):
+        framer = self.framer(self.address)  # 연결마다 버퍼 하나를 재사용
+        if hasattr(framer, "link"):
+            framer.link = self.link  # 재연결해도 순번/시계 추적은 장치 단위로 이어감
+        generation = self.generation if generation is None else generation
+        heartbeat = self.heartbeat
+        poller = None
+        if self.keepalive:
+            poller = select.poll()
+            poller.register(sock, select.POLLIN)  # recv 전에 기다려서 조용한 동안에도 박동/PING
+            timeout_ms = int(self.keepalive * 1000)
+            heard = time.monotonic()
+        while self.running and self.generation == generation:
+            heartbeat.beat()
+            if poller is not None:
+                if not poller.poll(timeout_ms):
+                    self._idle(sock, framer, heard)
+                    continue
+                heard = time.monotonic()
+            frames = framer.recv_from(sock)
+            received_ns = time.monotonic_ns()  # 바이트 수신 시각
+            for data in frames:
+                self.messages += 1
+                if self.debounce and not self.debounce.accept(self.address, data, received_ns / 1e9):
+                    self.suppressed += 1
+                    continue
+                span = self.tracer.begin(self.address, received_ns)
+                span.mark("parsed")
+                if self.status:
+                    self.status.received(self.address, data)
+                self.on_message(data, span)
+            ack = framer.take_ack()
+            if ack:
+                sock.sendall(ack)  # recv 한 번에 받은 프레임을 ack 하나로
+
+    def _idle(self, sock, framer, heard):
+        """ keepalive 동안 아무것도 못 받음: 바이너리 장치면 PING, link_timeout을 넘기면 끊고 재연결 """
+        ping = framer.keepalive()
+        if ping is None:
+            return  # 텍스트 장치는 조용한 것과 죽은 것을 구별할 수 없음 (스레드 박동만)
+        silent = time.monotonic() - heard
+        if silent >= self.link_timeout:
+            self.link_timeouts += 1
+            events().event("link_timeout", self.address, int(silent * 1000))
+            raise TimeoutError(f"{silent:.1f}초 동안 응답 없음")
+        sock.sendall(ping)  # 반쯤 끊긴 링크는 여기서 오류가 나기도 함
+
+
+class TriggerWorker:
+    """ 대기열에서 트리거를 꺼내 색인된 트랙을 재생 """
+
+    def __init__(self, player, media, scheduler=None, notify=None, status=None):
+        self.player = player
+        self.media = media  # MediaIndex (트리거 코드 → 트랙)
+        self.scheduler = scheduler or TriggerScheduler()
+        self.notify = notify or (lambda message: None)  # UI 상태 문자열 전달
+        self.status = status  # StatusModel (장치별 재생 상태, 없으면 생략)
+        self.current_device = None  # 지금 재생 중인 트랙을 요청한 장치
+        self.current_priority = 0  # 지금 재생 중인 코드의 매니페스트 우선순위
+        self.running = True
+        self.played = 0
+        self.missing = 0  # 코드는 알지만 파일이 없던 횟수
+        self.unknown = 0  # 모르는 코드
+        self.outranked = 0  # 더 높은 우선순위 트랙이 재생 중이라 무시한 트리거
+        self.ignored_channels = set()  # 매니페스트가 channel을 정했지만 플레이어가 하나뿐이라 무시한 코드
+        self.heartbeat = Heartbeat()  # 대기열 루프 (get 대기는 최대 1초)
+        self.player_heartbeat = Heartbeat(active=False)  # 플레이어 호출 중에만 감시
+        self.generation = 0
+
+    def add(self, data, span=None, source=None):
+        """ 트리거를 대기열에 추가 (정책에 따라 합치거나 버림, 받아들였으면 True) """
+        return self.scheduler.put(data, source, span)
+
+    def run(self):
+        """ 대기열에 트리거가 들어올 때까지 블로킹 대기하다가 하나씩 재생 """
+        generation = self.generation
+        while self.running and self.generation == generation:
+            self.heartbeat.beat()
+            trigger = self.scheduler.get(timeout=1.0)
+            if trigger is None:
+                continue
+
+            self.handle(trigger)
+
+            # 끝까지 재생하는 정책이면 트랙이 끝난 뒤에 다음 트리거를 꺼냄
+            if not self.scheduler.preemptive:
+                self.wait_until_finished()
+
+    def handle(self, trigger):
+        """ 트리거 하나 처리: 기존 재생을 멈추고 새 트랙 (시퀀스/여러 코드면 트랙들을 이어서) 재생 """
+        entries, binding = self.media.resolve(trigger.data)
+        if not entries:
+            files = self.media.files_for(trigger.data)
+            if files is None:
+                self.unknown += 1
+            elif self.media.folder is None:
+                self.missing += 1
+                self.notify("No USB with 'final/' folder found.")
+            else:
+                self.missing += 1
+                missing = [name for name in files if self.media.lookup_file(name) is None]
+                self.notify(f"File not found: {', '.join(missing)}")
+            return
+
+        span = trigger.span
+        device = trigger.source or (span.device if span else None)
+        if binding.priority < self.current_priority and self.player.status()["state"] != "stopped":
+            self.outranked += 1
+            events().event("outranked", device, binding.priority, self.current_priority, text=trigger.data)
+            return
+        if binding.channel and binding.code not in self.ignored_channels:
+            # 채널은 믹서(new_usb.py)에서만 나뉨: 여기서는 모든 코드가 플레이어 하나를 공유 (코드마다 한 번만 기록)
+            self.ignored_channels.add(binding.code)
+            events().event("channel_ignored", device, text=f"{binding.code}:{binding.channel}")
+        self.stop_current()
+        if span:
+            span.mark("stopped")
+
+        name = " + ".join(entry.filename for entry in entries)
+        self.notify(f"Playing {name}")
+        self.player_heartbeat.enter()
+        try:
+            gain = playback_gain(self.player, entries, binding.gain)
+            if len(entries) == 1:
+                self.player.play(entries[0].path, span, gain)
+            else:
+                # 다음 트랙은 플레이어가 지금 트랙을 재생하는 동안 미리 열어 둠
+                self.player.play_sequence([entry.path for entry in entries], span, gain)
+        except Exception as e:
+            events().event("play_failed", device, text=str(e))
+            self.notify(f"Playback failed: {e}")
+            if self.status:
+                self.status.error(device, f"playback failed: {e}")
+            return
+        finally:
+            self.player_heartbeat.leave()
+
+        if span:
+            span.mark("started")
+        self.played += 1
+        self.current_device = device
+        self.current_priority = binding.priority
+        events().event("play", device, len(entries), text=entries[0].filename)
+        if self.status:
+            self.status.playing(device, name)
+
+    def stop_current(self):
+        """ 재생 중인 트랙 즉시 중지 """
+        if self.player.status()["state"] != "stopped":
+            self.notify("Stopping current MP3 playback")
+            t0 = time.monotonic_ns()
+            self.player_heartbeat.enter()
+            try:
+                self.player.stop()
+            finally:
+                self.player_heartbeat.leave()
+            events().event("stop", self.current_device, (time.monotonic_ns() - t0) // 1000)  # a = 중지에 걸린 µs
+            if self.status and self.current_device:
+                self.status.stopped(self.current_device)
+
+    def wait_until_finished(self):
+        """ 현재 트랙이 끝나거나 워커가 멈출 때까지 대기 """
+        while self.running and self.player.status()["state"] != "stopped":
+            self.heartbeat.beat()
+            time.sleep(0.05)
+
+    def abort(self):
+        """ 감시자용: 지금 루프를 버리고 새 스레드가 run()을 이어받게 함 (대기열은 그대로) """
+        self.generation += 1
+
+    def abort_player(self):
+        """ 감시자용: 멈춘 플레이어 호출을 풀어줌 (플레이어가 지원할 때만) """
+        abort = getattr(self.player, "abort", None)
+        if abort is None:
+            raise RuntimeError(f"{type(self.player).__name__}는 abort를 지원하지 않음")
+        abort()
+
+    def stop(self):
+        """ 재생 루프 종료 (대기 중인 get을 즉시 깨움) """
+        self.running = False
+        self.scheduler.close()
+
+
+def supervise(supervisor, worker, receivers, alive=None):
+    """ 워커/플레이어/수신기를 감시자에 등록 (alive = [워커, 수신기...]의 isRunning, 이미 띄운 QThread용
+        없으면 감시자가 스레드를 띄움, 플레이어는 호출 중일 때만 감시) """
+    components = [("worker", worker.run, worker.heartbeat, worker.abort, worker.player_heartbeat)]
+    components += [(f"recv-{r.address}", r.run, r.heartbeat, r.abort, None) for r in receivers]
+    for i, (name, run, heartbeat, abort, waits_on) in enumerate(components):
+        if alive is None:
+            supervisor.spawn(name, run, heartbeat, abort=abort, waits_on=waits_on)
+        else:
+            supervisor.watch(name, heartbeat, run, abort, alive=alive[i], waits_on=waits_on)
+    supervisor.watch("player", worker.player_heartbeat, abort=worker.abort_player)
+    supervisor.start()
+    return supervisor
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+""" MP3 재생 백엔드 모음 (공통 인터페이스: play(track) / play_sequence(tracks) / stop() / status())
+
+    play/play_sequence의 gain은 이번 재생에만 곱하는 볼륨 배율 (트리거 매니페스트의 gain × 트랙 라우드니스 게인,
+    playback_gain 참고)
+"""
+import os
+import select
+import signal
+import subprocess
+import threading
+import time
+
+try:
+    import vlc  # python-vlc (libvlc 바인딩, 선택 의존성)
+except ImportError:
+    vlc = None
+
+
+class SubprocessPlayer:
+    """ 트리거마다 cvlc 프로세스를 새로 띄우는 기존 방식 (libvlc가 없을 때의 대체 경로) """
+
+    def __init__(self, command=("cvlc", "--play-and-exit"), term_timeout=0.005, kill_timeout=1.0):
+        self.command = list(command)
+        self.term_timeout = term_timeout  # SIGTERM 후 SIGKILL까지의 유예 시간 (초)
+        self.kill_timeout = kill_timeout  # SIGKILL 후 회수를 기다리는 최대 시간 (초)
+        self.process = None  # 현재 실행 중인 VLC 프로세스
+        self.track = None
+
+    def play(self, track, span=None, gain=1.0):
+        """ 기존 재생을 멈추고 새 cvlc 프로세스로 재생 (첫 오디오 시각은 알 수 없어 span에 기록 안 함) """
+        self.play_sequence((track,), span, gain)
+
+    def play_sequence(self, tracks, span=None, gain=1.0):
+        """ 여러 트랙을 프로세스 하나에 넘겨 이어서 재생 (트랙 사이에 프로세스를 새로 띄우지 않음) """
+        self.stop()
+        volume = [f"--gain={gain:.4f}"] if gain != 1.0 else []
+        # 자체 프로세스 그룹으로 띄워서 다른 VLC는 건드리지 않고 자식까지 한 번에 종료
+        self.process = subprocess.Popen(
+            self.command + volume + list(tracks),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        self.track = tracks[0]
+
+    def stop(self):
+        """ 현재 재생 중인 cvlc 프로세스 그룹 종료 (SIGTERM → SIGKILL) """
+        if self.process:
+            terminate_process_group(self.process, self.term_timeout, self.kill_timeout)
+            self.process = None
+        self.track = None
+
+    def status(self):
+        """ 재생 상태 반환 ('stopped' / 'starting' / 'playing') """
+        if not self.process or self.process.poll() is not None:
+            return {"state": "stopped", "track": None}
+
+        # 오디오 장치를 열었으면 실제로 소리가 나가기 시작한 것으로 본다
+        state = "playing" if _has_audio_output(self.process.pid) else "starting"
+        return {"state": state, "track": self.track, "pid": self.process.pid}
+
+    def close(self):
+        self.stop()
+
+    def abort(self):
+        """ 감시자용: 회수를 기다리지 않고 프로세스 그룹을 바로 SIGKILL """
+        process = self.process
+        if process and process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+class LibVlcPlayer:
+    """ libvlc 인스턴스를 계속 띄워두고 트랙만 교체하는 상주형 플레이어 """
+
+    _STATES = {}  # vlc.State -> 공통 상태 문자열 (vlc 모듈이 있을 때 채움)
+
+    def __init__(self, options=("--no-video", "--quiet")):
+        if vlc is None:
+            raise RuntimeError("python-vlc 모듈이 설치되어 있지 않음")
+
+        if not self._STATES:
+            LibVlcPlayer._STATES = {
+                vlc.State.Opening: "starting",
+                vlc.State.Buffering: "starting",
+                vlc.State.Playing: "playing",
+                vlc.State.Paused: "paused",
+            }
+
+        self.instance = vlc.Instance(*options)
+        self.media_player = self.instance.media_player_new()
+        self.list_player = None  # play_sequence를 처음 쓸 때 생성 (같은 media_player로 출력)
+        self.media_cache = {}  # 경로별 Media 객체 재사용 (파일 파싱 비용 절감)
+        self.track = None
+        self.span = None  # 재생 시작 이벤트를 기다리는 트리거 구간
+        self.lock = threading.Lock()
+
+        self.media_player.event_manager().event_attach(
+            vlc.EventType.MediaPlayerPlaying, self._on_playing)
+
+    def play(self, track, span=None, gain=1.0):
+        """ 재생 중인 트랙을 즉시 새 트랙으로 교체 """
+        with self.lock:
+            self.span = span
+            media = self.media_cache.get(track)
+            if media is None:
+                media = self.instance.media_new_path(track)
+                self.media_cache[track] = media
+
+            # set_media가 기존 재생을 끊으므로 별도 stop 호출이 필요 없음
+            if self.list_player:
+                self.list_player.stop()  # 진행 중인 시퀀스가 다음 트랙으로 넘어가지 않도록
+            self.media_player.set_media(media)
+            self.media_player.audio_set_volume(round(gain * 100))  # 100이 원래 볼륨
+            self.media_player.play()
+            self.track = track
+
+    def play_sequence(self, tracks, span=None, gain=1.0):
+        """ libvlc 목록 재생기로 이어서 재생 (다음 트랙은 현재 트랙이 끝나기 전에 같은 인스턴스에서 열림) """
+        with self.lock:
+            self.span = span
+            if self.list_player is None:
+                self.list_player = self.instance.media_list_player_new()
+                self.list_player.set_media_player(self.media_player)
+            media_list = self.instance.media_list_new()
+            for track in tracks:
+                media = self.media_cache.get(track)
+                if media is None:
+                    media = self.media_cache[track] = self.instance.media_new_path(track)
+                media_list.add_media(media)
+            self.list_player.stop()
+            self.list_player.set_media_list(media_list)
+            self.media_player.audio_set_volume(round(gain * 100))
+            self.list_player.play()
+            self.track = tracks[0]
+
+    def stop(self):
+        """ 재생만 멈추고 libvlc 인스턴스는 유지 """
+        with self.lock:
+            if self.list_player:
+                self.list_player.stop()
+            self.media_player.stop()
+            self.track = None
+
+    def status(self):
+        """ 재생 상태 반환 ('stopped' / 'starting' / 'playing' / 'paused') """
+        state = self._STATES.get(self.media_player.get_state(), "stopped")
+        return {
+            "state": state,
+            "track": self.track if state != "stopped" else None,
+            "position_ms": self.media_player.get_time(),
+        }
+
+    def close(self):
+        self.stop()
+        if self.list_player:
+            self.list_player.release()
+        self.media_player.release()
+        self.instance.release()
+
+    def _on_playing(self, _event):
+        """ libvlc 이벤트 스레드: 출력이 시작된 시점을 구간에 기록 """
+        span, self.span = self.span, None
+        if span:
+            span.mark("first_audio")
+
+
+class FakePlayer:
+    """ 테스트/벤치마크용 가짜 플레이어 (실제 소리 없이 호출 기록만 남김) """
+
+    def __init__(self, start_delay=0.0, duration=None):
+        self.start_delay = start_delay  # play 후 'playing'이 되기까지 걸리는 시간 (초)
+        self.duration = duration  # 트랙 길이 (None이면 stop 전까지 계속 재생)
+        self.history = []  # (monotonic 시각, 동작, 트랙) 기록
+        self.track = None
+        self.started_at = None
+        self.count = 1  # 이어서 재생 중인 트랙 수
+        self.gain = 1.0  # 마지막 play에 넘어온 볼륨 배율
+        self.lock = threading.Lock()
+
+    def play(self, track, span=None, gain=1.0):
+        with self.lock:
+            self.started_at = time.monotonic()
+            self.track = track
+            self.count = 1
+            self.gain = gain
+            self.history.append((self.started_at, "play", track))
+        if span:
+            span.mark("first_audio", time.monotonic_ns() + int(self.start_delay * 1e9))
+
+    def play_sequence(self, tracks, span=None, gain=1.0):
+        """ 트랙마다 duration씩 이어서 재생한 것으로 침 """
+        self.play(tracks[0], span, gain)
+        with self.lock:
+            self.count = len(tracks)
+            self.history.extend((self.started_at, "queue", track) for track in tracks[1:])
+
+    def stop(self):
+        with self.lock:
+            if self.track is not None:
+                self.history.append((time.monotonic(), "stop", self.track))
+            self.track = None
+            self.started_at = None
+
+    def status(self):
+        with self.lock:
+            if self.track is None:
+                return {"state": "stopped", "track": None}
+
+            elapsed = time.monotonic() - self.started_at
+            if self.duration is not None and elapsed >= self.start_delay + self.duration * self.count:
+                return {"state": "stopped", "track": None}
+            state = "playing" if elapsed >= self.start_delay else "starting"
+            return {"state": state, "track": self.track}
+
+    def close(self):
+        self.stop()
+
+
+def playback_gain(player, entries, gain=1.0):
+    """ player에 넘길 볼륨 배율: 트랙 게인을 스스로 곱하는 플레이어(PCM 캐시, 믹서)가 아니면 첫 트랙의 게인도 곱함 """
+    entry = entries[0] if entries else None
+    if entry is None or getattr(player, "applies_track_gain", False):
+        return gain
+    return gain * entry.gain
+
+
+def create_player(backend="auto"):
+    """ 사용 가능한 백엔드로 플레이어 생성 ('auto' / 'libvlc' / 'subprocess' / 'fake') """
+    if backend == "auto":
+        backend = "libvlc" if vlc is not None else "subprocess"
+
+    if backend == "libvlc":
+        return LibVlcPlayer()
+    if backend == "subprocess":
+        return SubprocessPlayer()
+    if backend == "fake":
+        return FakePlayer()
+    raise ValueError(f"알 수 없는 플레이어 백엔드: {backend}")
+
+
+def terminate_process_group(process, term_timeout=0.005, kill_timeout=1.0):
+    """ 프로세스 그룹에 SIGTERM을 보내고 기한 안에 안 끝나면 SIGKILL, 종료 코드 반환 """
+    if process.poll() is not None:
+        return process.returncode
+
+    for sig, timeout in ((signal.SIGTERM, term_timeout), (signal.SIGKILL, kill_timeout)):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            pass  # 이미 종료됨 (아직 회수만 안 된 상태)
+
+        if _wait_exit(process, timeout):
+            return process.returncode
+
+    return None  # SIGKILL 후에도 회수 실패 (D 상태 등)
+
+
+def _wait_exit(process, timeout):
+    """ pidfd로 종료 알림을 기다린 뒤 회수 (pidfd 미지원 커널은 Popen.wait로 대체) """
+    if process.poll() is not None:
+        return True
+
+    try:
+        pidfd = os.pidfd_open(process.pid)
+    except (AttributeError, OSError):
+        try:
+            process.wait(timeout)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+    try:
+        poller = select.poll()
+        poller.register(pidfd, select.POLLIN)
+        if not poller.poll(timeout * 1000):
+            return False
+    finally:
+        os.close(pidfd)
+
+    process.wait()  # 이미 종료된 상태이므로 즉시 회수됨
+    return True
+
+
+def _has_audio_output(pid):
+    """ 프로세스가 ALSA 재생 장치(/dev/snd/pcm*p)를 열었는지 확인 """
+    fd_dir = f"/proc/{pid}/fd"
+    try:
+        fds = os.listdir(fd_dir)
+    except OSError:
+        return False
+
+    for fd in fds:
+        try:
+            target = os.readlink(os.path.join(fd_dir, fd))
+        except OSError:
+            continue
+        if target.startswith("/dev/snd/pcm") and target.endswith("p"):
+            return True
+    return False
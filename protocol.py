@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+""" ESP32 ↔ 수신기 간 선택형 바이너리 트리거 프로토콜 (순번, 송신 시각, 묶음 ack)
+
+    프레임 = [op 1B][순번 2B][송신 시각 ms 4B][본문 길이 1B] + 본문 (리틀 엔디언)
+
+    장치가 연결 직후 HELLO를 보내면 그 연결은 바이너리, 첫 바이트가 다른 값이면 기존 텍스트(println) 그대로.
+    수신기는 recv 한 번에 들어온 프레임들을 ACK 하나로 응답
+    (순번 = 빠짐없이 받은 마지막 순번, 시각 = 마지막으로 받은 프레임의 송신 시각, 왕복 시간용).
+    ACK 순번이 앞으로 가지 않으면 그 다음 순번이 빠진 것이므로 장치는 그 프레임부터 다시 보내면 됨.
+    HELLO에 대한 ACK가 곧 협상 응답이라, ACK를 못 받은 장치는 텍스트로 돌아가면 됨.
+    한동안 조용한 링크에는 수신기가 PING(시각 = 수신기 시계)을 보내고 장치는 같은 순번/시각의 PONG으로 답함.
+"""
+import struct
+import time
+
+from framing import LineFramer
+from tracing import Histogram
+
+HEADER = struct.Struct("<BHIB")
+
+OP_TRIGGER = 0x01
+OP_ACK = 0x02
+OP_PING = 0x03  # 수신기 → 장치 (연결 유지 확인)
+OP_PONG = 0x04  # 장치 → 수신기 (PING의 순번과 시각을 그대로)
+OP_HELLO = 0xA5  # 출력 가능한 ASCII가 아니라 텍스트 연결의 첫 바이트와 겹치지 않음
+
+VERSION = 1
+ACK_WINDOW = 64  # 빠진 순번을 이만큼 기다려도 오지 않으면 포기하고 ACK를 앞으로 옮김
+
+
+def encode(op, seq, sent_ms, payload=b""):
+    """ 프레임 하나 (장치 쪽 구현과 시뮬레이터용) """
+    return HEADER.pack(op, seq & 0xFFFF, sent_ms & 0xFFFFFFFF, len(payload)) + payload
+
+
+class LinkTracker:
+    """ 장치 하나의 순번(손실/중복)과 시계 차이 추적 (재연결해도 장치 단위로 이어감) """
+
+    def __init__(self, window=60.0):
+        self.window_ms = window * 1000  # 최소 시계 차이를 다시 잡는 주기
+        self.version = None  # HELLO로 받은 프로토콜 버전 (None이면 텍스트 장치)
+        self.hellos = 0
+        self.frames = 0
+        self.lost = 0  # 순번이 건너뛴 수 (나중에 재전송으로 도착하면 다시 뺌)
+        self.late = 0  # 빠졌다가 나중에 도착한 순번
+        self.duplicates = 0  # 이미 받은 순번 (재전송 등, 대기열에 넣지 않음)
+        self.expected = None  # 다음에 올 순번 (지금까지 받은 가장 큰 순번 + 1)
+        self.ahead = set()  # ack_seq 뒤에 빈자리를 두고 먼저 받은 순번
+        self.last_sent = None  # 마지막 송신 시각 (32비트 원래 값)
+        self.sent_base = 0  # 송신 시각이 한 바퀴 돌 때마다 2^32씩 증가
+        self.window_start = None
+        self.min_offset = None  # 이번 주기의 (수신 시각 - 송신 시각) 최솟값 = 시계 차이 + 최소 전송 지연
+        self.prev_min_offset = None
+        self.delay = Histogram()  # 최소 전송 지연보다 더 걸린 시간 (µs, 단방향 지연 추정)
+        self.ack_seq = 0
+        self.ack_sent = 0
+        self.ack_due = False
+        self.pings = 0
+        self.pongs = 0
+        self.rtt_ms = None  # 마지막 PING 왕복 시간
+
+    def hello(self, seq, sent_ms, version):
+        """ 장치가 새로 연결됨 (장치가 재부팅했을 수 있으므로 순번과 시계를 처음부터) """
+        self.version = version
+        self.hellos += 1
+        self.expected = (seq + 1) & 0xFFFF
+        self.ahead.clear()
+        self.last_sent = None
+        self.window_start = self.min_offset = self.prev_min_offset = None
+        self.ack_seq = seq
+        self._ack(sent_ms)
+
+    def frame(self, seq, sent_ms, now_ms):
+        """ 트리거 프레임 하나 반영 (처음 받은 순번이면 True, 중복이면 False) """
+        self.frames += 1
+        if self.expected is None:
+            self.expected = self.ack_seq = seq  # HELLO 없이 시작한 링크: 이 프레임부터
+        elif (seq - self.ack_seq) & 0xFFFF >= 0x8000 or seq == self.ack_seq or seq in self.ahead:
+            self.duplicates += 1
+            self._ack(self.ack_sent)  # 장치가 ack를 못 받아 재전송한 것일 수 있음
+            return False
+
+        gap = (seq - self.expected) & 0xFFFF
+        if gap < 0x8000:
+            self.lost += gap
+            self.expected = (seq + 1) & 0xFFFF
+        else:
+            self.lost -= 1  # 빠졌던 순번이 재전송으로 도착
+            self.late += 1
+
+        if (seq - self.ack_seq) & 0xFFFF > ACK_WINDOW:
+            # 오래된 빈자리는 포기 (재전송하지 않는 장치 때문에 ACK가 멈춰 있지 않도록)
+            self.ack_seq = (seq - ACK_WINDOW) & 0xFFFF
+            self.ahead = {s for s in self.ahead if 0 < (s - self.ack_seq) & 0xFFFF < 0x8000}
+        self.ahead.add(seq)
+        while (self.ack_seq + 1) & 0xFFFF in self.ahead:
+            self.ack_seq = (self.ack_seq + 1) & 0xFFFF
+            self.ahead.discard(self.ack_seq)
+        self._clock(sent_ms, now_ms)
+        self._ack(sent_ms)
+        return True
+
+    def pong(self, sent_ms, now_ms):
+        self.pongs += 1
+        self.rtt_ms = (now_ms - sent_ms) & 0xFFFFFFFF
+
+    def snapshot(self):
+        offset = self.offset_ms()
+        drift = None
+        if self.min_offset is not None and self.prev_min_offset is not None:
+            drift = (self.min_offset - self.prev_min_offset) / self.window_ms * 1e6
+        return {
+            "version": self.version,
+            "frames": self.frames,
+            "lost": self.lost,
+            "late": self.late,
+            "duplicates": self.duplicates,
+            "clock_offset_ms": offset,
+            "clock_drift_ppm": drift,
+            "delay": self.delay.snapshot(),
+            "pings": self.pings,
+            "pongs": self.pongs,
+            "rtt_ms": self.rtt_ms,
+        }
+
+    def _clock(self, sent_ms, now_ms):
+        if self.last_sent is not None and sent_ms < self.last_sent and self.last_sent - sent_ms > 1 << 31:
+            self.sent_base += 1 << 32
+        self.last_sent = sent_ms
+        offset = now_ms - (self.sent_base + sent_ms)
+
+        if self.window_start is None or now_ms - self.window_start >= self.window_ms:
+            self.prev_min_offset = self.min_offset
+            self.min_offset = None
+            self.window_start = now_ms
+        if self.min_offset is None or offset < self.min_offset:
+            self.min_offset = offset
+        self.delay.record((offset - self.offset_ms()) * 1000)
+
+    def offset_ms(self):
+        """ 수신기 시계 - 장치 시계 (최소 전송 지연 포함, 아직 모르면 None) """
+        values = [v for v in (self.min_offset, self.prev_min_offset) if v is not None]
+        return min(values) if values else None
+
+    def _ack(self, sent_ms):
+        self.ack_sent = sent_ms
+        self.ack_due = True
+
+
+class ProtocolFramer(LineFramer):
+    """ 연결의 첫 바이트로 텍스트/바이너리를 정하고, 바이너리면 수신 버퍼 위에서 바로 헤더를 풀어냄 """
+
+    def __init__(self, bufsize=4096, delimiter=b"\n", link=None):
+        super().__init__(bufsize, delimiter)
+        self.link = link or LinkTracker()
+        self.binary = None  # None이면 아직 첫 바이트를 못 봄
+
+    def reset(self):
+        super().reset()
+        self.binary = None
+
+    def take_ack(self):
+        link = self.link
+        if not self.binary or not link.ack_due:
+            return None
+        link.ack_due = False
+        return HEADER.pack(OP_ACK, link.ack_seq, link.ack_sent, 0)
+
+    def keepalive(self):
+        """ 조용한 바이너리 링크에 보낼 PING (텍스트 장치는 받을 줄 모르므로 None) """
+        if not self.binary:
+            return None
+        link = self.link
+        link.pings += 1
+        return encode(OP_PING, link.pings, time.monotonic_ns() // 1_000_000)
+
+    def _frames(self):
+        if self.binary is None:
+            if self.start == self.end:
+                return
+            self.binary = self.buffer[self.start] == OP_HELLO
+        if not self.binary:
+            yield from LineFramer._frames(self)
+            return
+
+        link = self.link
+        buffer = self.buffer
+        size = HEADER.size
+        now_ms = time.monotonic_ns() // 1_000_000  # recv 직후 한 번 (같은 recv의 프레임은 같은 도착 시각)
+        while self.end - self.start >= size:
+            op, seq, sent_ms, length = HEADER.unpack_from(buffer, self.start)
+            body = self.start + size
+            if self.end - body < length:
+                break  # 본문이 아직 다 오지 않음
+            self.start = body + length
+
+            if op == OP_TRIGGER:
+                if link.frame(seq, sent_ms, now_ms):
+                    message = str(self.view[body:body + length], "utf-8", "replace").strip()
+                    if message:
+                        self.frames += 1
+                        yield message
+            elif op == OP_PONG:
+                link.pong(sent_ms, now_ms)
+            elif op == OP_HELLO:
+                link.hello(seq, sent_ms, buffer[body] if length else 0)
+            # 모르는 op는 길이만큼 건너뜀 (새 펌웨어의 확장용)
+
+        if self.start == self.end:
+            self.start = self.end = 0
+
+
+class ProtocolSender:
+    """ 장치 쪽 인코더 (ESP32 펌웨어 구현의 기준, 시뮬레이터에서 사용) """
+
+    def __init__(self, seq=0, clock=None):
+        self.seq = seq
+        self.clock = clock or (lambda: time.monotonic_ns() // 1_000_000)  # 장치 부팅 후 ms에 해당
+        self.acked = None  # 마지막으로 ack된 순번
+        self.rtt_ms = None
+
+    def hello(self):
+        return encode(OP_HELLO, self.seq, self.clock(), bytes([VERSION]))
+
+    def trigger(self, code):
+        self.seq = (self.seq + 1) & 0xFFFF
+        return encode(OP_TRIGGER, self.seq, self.clock(), code.encode("utf-8"))
+
+    def on_ack(self, data):
+        """ 수신기가 보낸 ACK/PING 반영 (왕복 시간은 ack에 되돌아온 송신 시각으로 계산), PING에 대한 PONG 반환 """
+        replies = []
+        for offset in range(0, len(data) - HEADER.size + 1, HEADER.size):
+            op, seq, sent_ms, _ = HEADER.unpack_from(data, offset)
+            if op == OP_ACK:
+                self.acked = seq
+                self.rtt_ms = (self.clock() - sent_ms) & 0xFFFFFFFF
+            elif op == OP_PING:
+                replies.append(encode(OP_PONG, seq, sent_ms))
+        return b"".join(replies)
@@ -1,41 +1,66 @@
 #!/usr/bin/env python3
-import bluetooth
 import time
-import subprocess
 import sys
 from PyQt5.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
 from PyQt5.QtCore import QThread, pyqtSignal
+from media_index import MediaIndex, MediaWatcher
+from player import create_player, playback_gain
+from reconnect import Backoff
+from transports import connect, make_framer, configured_addresses
 
 class BluetoothWorker(QThread):
     update_signal = pyqtSignal(str)  # UI를 업데이트하기 위한 시그널
 
     def __init__(self):
         super().__init__()
-        self.vlc_process = None  # VLC 프로세스 핸들
+        self.player = create_player()  # 상주형 플레이어 (트리거마다 VLC를 새로 띄우지 않음)
+        # USB 'final/' 색인과 트리거 매니페스트 (마운트/파일 변경 시에만 감시 스레드가 갱신)
+        self.media = MediaIndex()
+        self.media.refresh()  # 첫 트리거 전에 색인을 채워 둠 (감시 스레드의 첫 갱신을 기다리지 않도록)
+        self.media_watcher = MediaWatcher(self.media)
+        self.media_watcher.start()
+        self.priority = 0  # 지금 재생 중인 코드의 우선순위
+        self.backoff = Backoff(0.5, 30.0)  # 재시도 간격: 0.5초부터 두 배씩, 최대 30초 (지터 포함)
         self.running = True  # 스레드 실행 상태
 
+    def play(self, message):
+        """ 수신된 코드에 해당하는 MP3 재생 (매니페스트의 gain/priority 적용, 채널은 플레이어가 하나라 무시) """
+        # 매니페스트로 컴파일해 둔 조회표 (파일이 바뀌면 감시 스레드가 교체)
+        entries, binding = self.media.resolve(message)
+        if not entries:
+            return
+        if binding.priority < self.priority and self.player.status()["state"] != "stopped":
+            return  # 더 높은 우선순위 트랙이 재생 중
+        self.priority = binding.priority
+        gain = playback_gain(self.player, entries, binding.gain)
+        if len(entries) == 1:
+            self.update_signal.emit(f"Playing {entries[0].filename}")
+            self.player.play(entries[0].path, None, gain)  # 기존 재생을 끊고 바로 전환
+        else:
+            self.update_signal.emit("Playing " + " + ".join(entry.filename for entry in entries))
+            self.player.play_sequence([entry.path for entry in entries], None, gain)
+
     def stop_current_mp3(self):
         """ 현재 실행 중인 MP3를 강제로 중지 """
-        if self.vlc_process:
-            self.vlc_process.terminate()  # VLC 프로세스 종료
-            self.vlc_process.wait()  # 종료 완료 대기
-            self.vlc_process = None
+        self.player.stop()
 
     def connect_bluetooth(self):
         """ 블루투스 연결을 시도하고 성공할 때까지 반복 """
-        mac = '08:D1:F9:26:65:D2'
+        # ESP32 MAC (DDDS_TRANSPORTS로 tcp:// unix:// udp:// 주소 지정 가능)
+        self.address = configured_addresses(['08:D1:F9:26:65:D2'])[0]
         port = 1
 
         while self.running:
             try:
                 self.update_signal.emit("Attempting to connect...")
-                sock = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
-                sock.connect((mac, port))
+                sock = connect(self.address, port)
                 self.update_signal.emit("Connected")
+                self.backoff.reset()
                 return sock  # 연결된 소켓 반환
-            except bluetooth.BluetoothError as e:
-                self.update_signal.emit(f"Connection failed: {e}\nRetrying in 5 seconds...")
-                time.sleep(5)
+            except OSError as e:
+                delay = self.backoff.next()
+                self.update_signal.emit(f"Connection failed: {e}\nRetrying in {delay:.1f} seconds...")
+                time.sleep(delay)
 
     def run(self):
         """ 블루투스 메시지를 수신하고 MP3를 재생 """
@@ -43,30 +68,16 @@ class BluetoothWorker(QThread):
             sock = self.connect_bluetooth()  # 블루투스 연결 시도
 
             try:
+                framer = make_framer(self.address)  # 연결마다 버퍼 하나를 재사용
                 while self.running:
-                    data = sock.recv(1024)
-                    if data:
-                        received_data = data.decode('utf-8').strip()
+                    for received_data in framer.recv_from(sock):
                         self.update_signal.emit(f"Received: {received_data}")
+                        self.play(received_data)
+                    ack = framer.take_ack()
+                    if ack:
+                        sock.sendall(ack)  # recv 한 번에 받은 바이너리 프레임을 ack 하나로 (텍스트 장치는 None)
 
-                        # 수신된 번호에 해당하는 MP3 파일 매핑
-                        mp3_files = {
-                            '1': "/media/pi/3460-A639/final/stemon1.mp3",
-                            '2': "/media/pi/3460-A639/final/stemon2.mp3",
-                            '3': "/media/pi/3460-A639/final/stemon3.mp3",
-                            '4': "/media/pi/3460-A639/final/stemon4.mp3",
-                        }
-
-                        if received_data in mp3_files:
-                            self.stop_current_mp3()  # 기존 MP3 강제 종료
-                            self.update_signal.emit(f"Playing {received_data}.mp3")
-                            self.vlc_process = subprocess.Popen(
-                                ["cvlc", "--play-and-exit", mp3_files[received_data]],
-                                stdout=subprocess.DEVNULL,
-                                stderr=subprocess.DEVNULL
-                            )
-
-            except bluetooth.BluetoothError:
+            except OSError:  # BluetoothError, ConnectionError 모두 포함
                 self.update_signal.emit("Connection lost. Reconnecting...")
             finally:
                 sock.close()  # 연결 종료 후 다시 연결 시도
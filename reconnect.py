@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+""" 재연결 지수 백오프(지터 포함), 재연결 소요 시간 기록, 재생을 막지 않는 알림 전달 """
+import collections
+import random
+import threading
+import time
+
+from eventlog import events
+from tracing import Histogram
+
+
+class Backoff:
+    """ 실패할 때마다 initial × factor^n 까지 늘어나는 대기 시간 (cap에서 멈춤, jitter 비율만큼 무작위로 줄임) """
+
+    def __init__(self, initial=0.5, cap=30.0, factor=2.0, jitter=0.5, rng=random.random):
+        self.initial = initial
+        self.cap = cap
+        self.factor = factor
+        self.jitter = jitter  # 0이면 고정, 0.5면 [d/2, d] 사이 (여러 장치가 같은 순간에 몰리지 않도록)
+        self.rng = rng
+        self.failures = 0
+
+    def next(self):
+        """ 다음 재시도까지 기다릴 시간 (초) """
+        delay = min(self.cap, self.initial * self.factor ** self.failures)
+        self.failures += 1
+        return delay * (1 - self.jitter * self.rng())
+
+    def reset(self):
+        self.failures = 0
+
+
+class ReconnectStats:
+    """ 장치 하나의 연결 시도/실패 수와 끊김 → 재연결까지 걸린 시간 """
+
+    def __init__(self):
+        self.attempts = 0
+        self.failures = 0
+        self.down_since = time.monotonic()  # 연결이 없던 시점 (연결 중이면 None)
+        self.first_connect_ms = None  # 시작부터 첫 연결까지
+        self.last_reconnect_ms = None
+        self.retry_in = 0.0  # 마지막으로 정한 재시도 대기 (초)
+        self.histogram = Histogram()  # 끊김 → 재연결 (µs)
+
+    def attempt(self):
+        self.attempts += 1
+
+    def failed(self, retry_in):
+        self.failures += 1
+        self.retry_in = retry_in
+
+    def connected(self):
+        if self.down_since is None:
+            return
+        elapsed_us = (time.monotonic() - self.down_since) * 1e6
+        if self.first_connect_ms is None:
+            self.first_connect_ms = elapsed_us / 1000
+        else:
+            self.last_reconnect_ms = elapsed_us / 1000
+            self.histogram.record(elapsed_us)
+        self.down_since = None
+        self.retry_in = 0.0
+
+    def disconnected(self):
+        self.down_since = time.monotonic()
+
+    def snapshot(self):
+        return {
+            "attempts": self.attempts,
+            "failures": self.failures,
+            "down_for_s": time.monotonic() - self.down_since if self.down_since is not None else 0.0,
+            "retry_in_s": self.retry_in,
+            "first_connect_ms": self.first_connect_ms,
+            "last_reconnect_ms": self.last_reconnect_ms,
+            "reconnect": self.histogram.snapshot(),
+        }
+
+
+class Notifier(threading.Thread):
+    """ 연결/끊김 알림을 별도 스레드에서 차례로 실행 (쌓이면 오래된 것부터 버림) """
+
+    def __init__(self, maxsize=8):
+        super().__init__(daemon=True)
+        self.pending = collections.deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.running = True
+        self.dropped = 0
+        self.failures = 0  # 예외로 끝난 알림 콜백 수
+        self.start()
+
+    def post(self, fn, *args):
+        """ 호출한 쪽은 기다리지 않음 (이벤트 루프나 수신 스레드에서 바로 반환) """
+        with self.cond:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append((fn, args))
+            self.cond.notify()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                if not self.running:
+                    return
+                fn, args = self.pending.popleft()
+
+            try:
+                fn(*args)
+            except Exception as e:
+                self.failures += 1
+                events().event("notify_failed", None, text=f"{getattr(fn, '__name__', fn)}: {e}")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+""" 수신 바이트를 그대로 남기는 추가 전용 바이너리 기록과, 그 기록을 같은 시간 간격으로 다시 보내는 재생기
+
+    파일 = HEADER + 레코드들, 레코드 = [종류 1B][장치 id 2B][길이 4B][기록 시작부터의 ns 8B] + 본문
+"""
+import json
+import socket
+import struct
+import threading
+import time
+
+HEADER = b"DDDSREC\x01"
+RECORD = struct.Struct("<BHIq")
+
+DEVICE = 1  # 본문 = 장치 주소 (처음 나타날 때 한 번)
+DATA = 2  # 본문 = recv로 받은 바이트 그대로 (프레임 경계와 무관)
+CONNECT = 3
+DISCONNECT = 4
+SUMMARY = 5  # 본문 = 기록 당시 파이프라인 결과 JSON (닫을 때)
+
+
+class TriggerRecorder:
+    """ 여러 수신 스레드가 함께 쓰는 기록 파일 (레코드 단위로 잠그고 버퍼에 append만 함) """
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.file = open(path, "wb", buffering=1 << 16)
+        self.file.write(HEADER)
+        self.flush_interval = flush_interval  # 비정상 종료에도 이 정도만 잃도록
+        self.devices = {}  # 주소 → id
+        self.started_ns = time.monotonic_ns()
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.records = 0
+        self.bytes = 0
+
+    def wrap(self, connect):
+        """ connect(address) 자리에 넣으면 돌려주는 소켓이 받은 바이트를 모두 기록 """
+        def recording_connect(address, *args):
+            sock = connect(address, *args)
+            self.write(CONNECT, address)
+            return RecordingSocket(sock, self, address)
+        return recording_connect
+
+    def write(self, kind, address, payload=b"", at_ns=None):
+        at_ns = (at_ns if at_ns is not None else time.monotonic_ns()) - self.started_ns
+        with self.lock:
+            if self.file is None:
+                return
+            device_id = self.devices.get(address)
+            if device_id is None:
+                device_id = self.devices[address] = len(self.devices)
+                name = str(address).encode("utf-8")
+                self.file.write(RECORD.pack(DEVICE, device_id, len(name), at_ns) + name)
+            self.file.write(RECORD.pack(kind, device_id, len(payload), at_ns))
+            self.file.write(payload)
+            self.records += 1
+            self.bytes += len(payload)
+            if time.monotonic() - self.flushed_at >= self.flush_interval:
+                self.file.flush()
+                self.flushed_at = time.monotonic()
+
+    def close(self, summary=None):
+        """ summary(dict)가 있으면 기록 당시 결과로 남김 (재생 결과와 비교용) """
+        with self.lock:
+            if self.file is None:
+                return
+            if summary is not None:
+                body = json.dumps(summary).encode("utf-8")
+                self.file.write(RECORD.pack(SUMMARY, 0, len(body), time.monotonic_ns() - self.started_ns))
+                self.file.write(body)
+            self.file.close()
+            self.file = None
+
+
+class RecordingSocket:
+    """ 수신 루프가 쓰는 recv/recv_into만 가로채고 나머지는 원래 소켓으로 넘김 """
+
+    def __init__(self, sock, recorder, address):
+        self.sock = sock
+        self.recorder = recorder
+        self.address = address
+
+    def recv_into(self, buffer, nbytes=0):
+        n = self.sock.recv_into(buffer, nbytes)
+        if n:
+            self.recorder.write(DATA, self.address, bytes(buffer[:n]))
+        return n
+
+    def recv(self, bufsize):
+        data = self.sock.recv(bufsize)
+        if data:
+            self.recorder.write(DATA, self.address, data)
+        return data
+
+    def close(self):
+        self.recorder.write(DISCONNECT, self.address)
+        self.sock.close()
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+
+def read_records(path):
+    """ (종류, 주소, ns, 본문) 을 순서대로 (잘린 마지막 레코드는 무시) """
+    devices = {}
+    with open(path, "rb") as f:
+        if f.read(len(HEADER)) != HEADER:
+            raise ValueError(f"트리거 기록 파일이 아님: {path}")
+        while True:
+            head = f.read(RECORD.size)
+            if len(head) < RECORD.size:
+                return
+            kind, device_id, length, at_ns = RECORD.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            if kind == DEVICE:
+                devices[device_id] = payload.decode("utf-8")
+                continue
+            yield kind, devices.get(device_id), at_ns, payload
+
+
+def load(path):
+    """ 기록 파일 → (장치 주소 목록, 재생할 레코드 목록, 기록 당시 결과) """
+    devices, records, summary = [], [], None
+    for kind, address, at_ns, payload in read_records(path):
+        if kind == SUMMARY:
+            summary = json.loads(payload)
+            continue
+        if address not in devices:
+            devices.append(address)
+        records.append((kind, address, at_ns, payload))
+    return devices, records, summary
+
+
+def summarize(worker, tracer, receivers, duration):
+    """ 기록/재생 양쪽에서 같은 방식으로 뽑는 파이프라인 결과 """
+    from tracing import Histogram
+
+    started = Histogram()
+    for (_, stage), (total, _) in list(tracer.histograms.items()):
+        if stage == "started":
+            started.merge(total)
+    latency = started.snapshot()
+    metrics = worker.scheduler.metrics()
+    return {
+        "duration_s": round(duration, 3),
+        "messages": sum(r.messages for r in receivers),
+        "suppressed": sum(r.suppressed for r in receivers),
+        "played": worker.played,
+        "coalesced": metrics["coalesced"],
+        "dropped": metrics["dropped"],
+        "reconnects": sum(r.connects for r in receivers) - len(receivers),
+        "started_p50_ms": latency.get("p50_ms", 0.0),
+        "started_p99_ms": latency.get("p99_ms", 0.0),
+        "started_max_ms": latency.get("max_ms", 0.0),
+    }
+
+
+class Replayer:
+    """ 기록된 바이트를 장치별 socketpair로 다시 보냄 (speed 1 = 원래 속도, N = N배, 0 = 최대한 빠르게) """
+
+    def __init__(self, records, speed=1.0):
+        self.records = records
+        self.speed = speed
+        self.peers = {}  # 주소 → 수신 쪽이 연결할 때마다 생기는 상대편 소켓 대기열
+        self.current = {}  # 주소 → 지금 쓰는 상대편 소켓
+        self.locals = []  # 수신 쪽에 넘긴 소켓 (끝낼 때 shutdown)
+        self.closed = False
+        self.cond = threading.Condition()
+        self.sent = 0
+        self.late_ms = 0.0  # 예정 시각보다 늦게 보낸 최대 시간 (재생기 자체의 오차)
+
+    def connect(self, address, *args):
+        """ TriggerReceiver의 connect 자리에 들어가는 함수 """
+        # UDP는 데이터그램 경계가 곧 메시지 경계라 그대로 유지
+        kind = socket.SOCK_DGRAM if str(address).startswith("udp://") else socket.SOCK_STREAM
+        with self.cond:
+            if self.closed:
+                raise ConnectionRefusedError("재생이 끝남")
+            local, peer = socket.socketpair(socket.AF_UNIX, kind)
+            self.locals.append(local)
+            self.peers.setdefault(address, []).append(peer)
+            self.cond.notify_all()
+        return local
+
+    def run(self, timeout=5.0):
+        """ 모든 레코드를 보내고 반환 (수신 쪽이 재연결하지 않으면 timeout 후 그 장치 데이터는 건너뜀) """
+        if not self.records:
+            return
+        first_ns = self.records[0][2]
+        started = time.monotonic()
+        for kind, address, at_ns, payload in self.records:
+            if self.speed:
+                due = started + (at_ns - first_ns) / 1e9 / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    self.late_ms = max(self.late_ms, -delay * 1000)
+
+            if kind == DISCONNECT:
+                peer = self.current.pop(address, None)
+                if peer:
+                    peer.close()
+            elif kind == DATA:
+                peer = self._peer(address, timeout)
+                if peer:
+                    peer.sendall(payload)
+                    self.sent += 1
+                    try:
+                        peer.recv(65536, socket.MSG_DONTWAIT)  # 바이너리 프로토콜 ack는 읽어서 버림
+                    except (BlockingIOError, InterruptedError):
+                        pass
+
+    def close(self):
+        """ 수신 루프가 recv에서 빠져나오도록 양쪽을 끊음 (수신 쪽 stop()보다 먼저 호출) """
+        with self.cond:
+            self.closed = True
+            for local in self.locals:
+                try:
+                    local.shutdown(socket.SHUT_RDWR)  # 데이터그램 소켓은 닫기만 해서는 recv가 깨지 않음
+                except OSError:
+                    pass
+            for peer in list(self.current.values()) + [p for q in self.peers.values() for p in q]:
+                peer.close()
+            self.locals.clear()
+            self.current.clear()
+            self.peers.clear()
+
+    def _peer(self, address, timeout):
+        peer = self.current.get(address)
+        if peer is not None:
+            return peer
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.peers.get(address), timeout):
+                return None
+            peer = self.current[address] = self.peers[address].pop(0)
+        return peer
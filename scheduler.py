@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+""" 트리거 대기열 정책 (즉시 교체 / 최신 것만 / 제한된 FIFO) """
+import collections
+import threading
+import time
+
+PREEMPT = "preempt"  # 새 트리거가 오면 재생 중인 트랙을 바로 끊음 (대기열은 최신 1개)
+LATEST = "latest"  # 현재 트랙은 끝까지, 그동안 온 트리거는 최신 1개만 남김
+FIFO = "fifo"  # 순서대로 모두 재생, 대기열 길이 제한
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+class Trigger:
+    """ 대기열에 들어간 트리거 하나 """
+
+    __slots__ = ("data", "source", "span", "enqueued_at")
+
+    def __init__(self, data, source=None, span=None):
+        self.data = data
+        self.source = source  # 보낸 장치 (MAC 등)
+        self.span = span  # 지연 추적 구간 (tracing.Span, 없으면 None)
+        self.enqueued_at = time.monotonic()
+
+    def __repr__(self):
+        return f"Trigger({self.data!r}, source={self.source!r})"
+
+
+class TriggerScheduler:
+    """ 생산자는 절대 막지 않고, 정책에 따라 합치거나 버려서 대기열 길이를 제한 """
+
+    def __init__(self, policy=PREEMPT, maxsize=8, overflow=DROP_OLDEST):
+        if policy not in (PREEMPT, LATEST, FIFO):
+            raise ValueError(f"알 수 없는 정책: {policy}")
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"알 수 없는 초과 처리 방식: {overflow}")
+
+        self.policy = policy
+        self.maxsize = maxsize if policy == FIFO else 1
+        self.overflow = overflow
+        self.pending = collections.deque()
+        self.closed = False
+        self.cond = threading.Condition()
+
+        # 지표
+        self.enqueued = 0
+        self.dequeued = 0
+        self.coalesced = 0  # 최신 트리거로 덮어써서 사라진 수
+        self.dropped = 0  # FIFO 한도 초과로 버린 수
+        self.max_depth = 0
+        self.delay_total = 0.0  # 대기열에서 기다린 시간 합 (초)
+        self.delay_max = 0.0
+
+    @property
+    def preemptive(self):
+        """ 재생 중인 트랙을 끝까지 기다리지 않아도 되는지 """
+        return self.policy == PREEMPT
+
+    def put(self, data, source=None, span=None):
+        """ 트리거 추가 (받아들였으면 True, 버렸으면 False) """
+        trigger = Trigger(data, source, span)
+        with self.cond:
+            if self.closed:
+                return False
+
+            accepted = True
+            if len(self.pending) >= self.maxsize:
+                if self.policy != FIFO:
+                    self.pending.clear()
+                    self.coalesced += 1
+                elif self.overflow == DROP_OLDEST:
+                    self.pending.popleft()
+                    self.dropped += 1
+                else:
+                    self.dropped += 1
+                    accepted = False
+
+            if accepted:
+                self.pending.append(trigger)
+                self.enqueued += 1
+                self.max_depth = max(self.max_depth, len(self.pending))
+                self.cond.notify()
+
+        if accepted and span:
+            span.mark("enqueued")
+        return accepted
+
+    def get(self, timeout=None):
+        """ 다음 트리거 (시간 초과 또는 close() 후에는 None) """
+        with self.cond:
+            if not self.pending and not self.closed:
+                self.cond.wait(timeout)
+            if not self.pending or self.closed:
+                return None
+
+            trigger = self.pending.popleft()
+            self.dequeued += 1
+            delay = time.monotonic() - trigger.enqueued_at
+            self.delay_total += delay
+            self.delay_max = max(self.delay_max, delay)
+
+        if trigger.span:
+            trigger.span.mark("dequeued")
+        return trigger
+
+    def has_pending(self):
+        return bool(self.pending)
+
+    def close(self):
+        """ 대기 중인 get을 깨우고 이후 put은 거절 """
+        with self.cond:
+            self.closed = True
+            self.pending.clear()
+            self.cond.notify_all()
+
+    def metrics(self):
+        with self.cond:
+            return {
+                "policy": self.policy,
+                "depth": len(self.pending),
+                "max_depth": self.max_depth,
+                "enqueued": self.enqueued,
+                "dequeued": self.dequeued,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "delay_avg_ms": self.delay_total / self.dequeued * 1000 if self.dequeued else 0.0,
+                "delay_max_ms": self.delay_max * 1000,
+            }
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+""" 장치별 상태를 GUI 스레드 밖에서 모아 두고, 화면은 정해진 주기 이하로만 갱신하게 하는 상태 모델 """
+import threading
+import time
+from collections import OrderedDict
+
+
+class DeviceStatus:
+    """ 장치 하나의 화면 표시용 상태 """
+
+    __slots__ = ("name", "connected", "last_trigger", "now_playing", "triggers", "plays",
+                 "errors", "last_error", "changed_at")
+
+    def __init__(self, name):
+        self.name = name
+        self.connected = None  # None이면 아직 모름
+        self.last_trigger = None
+        self.now_playing = None
+        self.triggers = 0
+        self.plays = 0
+        self.errors = 0
+        self.last_error = None
+        self.changed_at = time.monotonic()
+
+    def snapshot(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def describe(self):
+        """ 한 줄 요약 (Qt 행, 로그 공용) """
+        link = {True: "🟢 connected", False: "🔴 disconnected", None: "⚪ waiting"}[self.connected]
+        parts = [f"{self.name}  {link}"]
+        if self.now_playing:
+            parts.append(f"▶ {self.now_playing}")
+        if self.last_trigger is not None:
+            parts.append(f"last {self.last_trigger}")
+        parts.append(f"triggers {self.triggers} / plays {self.plays}")
+        if self.last_error:
+            parts.append(f"⚠ {self.last_error}")
+        return " | ".join(parts)
+
+
+class StatusModel:
+    """ 모든 갱신은 잠금 아래에서 값만 바꾸고, 변경이 생긴 첫 순간에만 구독자에게 알림 (여러 번 바뀌어도 한 번) """
+
+    def __init__(self, max_hz=10.0):
+        self.min_interval = 1.0 / max_hz  # 화면 갱신 최소 간격 (초)
+        self.devices = OrderedDict()  # 이름 → DeviceStatus (처음 나타난 순서)
+        self.message = None  # 장치와 무관한 최근 안내 문구
+        self.dirty = False
+        self.subscribers = []
+        self.updates = 0  # 상태 변경 횟수
+        self.publishes = 0  # 실제로 화면에 넘긴 횟수
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """ callback()은 깨끗한 상태에서 처음 바뀔 때 호출됨 (아무 스레드에서나)
+
+            이미 바뀐 상태면 바로 한 번 호출 (아니면 take() 전까지 다음 변경도 알리지 않음)
+        """
+        with self.lock:
+            self.subscribers.append(callback)
+            dirty = self.dirty
+        if dirty:
+            callback()
+
+    def take(self):
+        """ 현재 상태 스냅샷을 가져가고 다시 깨끗한 상태로 (GUI 스레드에서 호출) """
+        with self.lock:
+            self.dirty = False
+            self.publishes += 1
+            return {
+                "message": self.message,
+                "devices": [device.snapshot() for device in self.devices.values()],
+                "rows": [device.describe() for device in self.devices.values()],
+            }
+
+    # 상태 변경 (수신/재생 스레드에서 호출)
+
+    def add_device(self, device):
+        """ 아직 소식이 없는 장치도 줄을 만들어 둠 """
+        self._update(device)
+
+    def set_message(self, text):
+        self._update(None, message=text)
+
+    def connected(self, device):
+        self._update(device, connected=True, last_error=None)
+
+    def disconnected(self, device, error=None):
+        self._update(device, connected=False, last_error=error)
+
+    def received(self, device, data):
+        self._update(device, last_trigger=data, triggers=1)
+
+    def playing(self, device, track):
+        self._update(device, now_playing=track, plays=1)
+
+    def stopped(self, device):
+        self._update(device, now_playing=None)
+
+    def error(self, device, text):
+        self._update(device, last_error=text, errors=1)
+
+    def _update(self, device, message=None, triggers=0, plays=0, errors=0, **fields):
+        with self.lock:
+            if device is None:
+                if message is not None:
+                    self.message = message
+            else:
+                status = self.devices.get(device)
+                if status is None:
+                    status = self.devices[device] = DeviceStatus(device)
+                for field, value in fields.items():
+                    setattr(status, field, value)
+                status.triggers += triggers
+                status.plays += plays
+                status.errors += errors
+                status.changed_at = time.monotonic()
+
+            self.updates += 1
+            notify = not self.dirty
+            self.dirty = True
+
+        if notify:
+            for callback in self.subscribers:
+                callback()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+""" StatusModel을 보여주는 PyQt5 위젯 (변경이 몰려도 max_hz 이하로만 다시 그림) """
+import time
+
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+
+class StatusView(QWidget):
+    """ 맨 위 안내 문구 + 장치별 한 줄 """
+    changed = pyqtSignal()  # 다른 스레드에서 emit → GUI 스레드에서 schedule 실행
+
+    def __init__(self, model, initial_text, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.last_refresh = 0.0
+
+        self.label = QLabel(initial_text, self)
+        self.label.setStyleSheet("font-size: 16px; color: blue;")
+        self.rows = {}  # 장치 이름 → QLabel
+        self.row_layout = QVBoxLayout()
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.label)
+        layout.addLayout(self.row_layout)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.refresh)
+        self.changed.connect(self.schedule)
+        model.subscribe(self.changed.emit)
+
+    def schedule(self):
+        """ 마지막 갱신 후 최소 간격이 지나면 다시 그림 (이미 예약돼 있으면 무시) """
+        if self.timer.isActive():
+            return
+        wait = self.model.min_interval - (time.monotonic() - self.last_refresh)
+        self.timer.start(max(0, int(wait * 1000)))
+
+    def refresh(self):
+        self.last_refresh = time.monotonic()
+        snapshot = self.model.take()
+
+        if snapshot["message"] and snapshot["message"] != self.label.text():
+            self.label.setText(snapshot["message"])
+
+        for device, text in zip(snapshot["devices"], snapshot["rows"]):
+            row = self.rows.get(device["name"])
+            if row is None:
+                row = self.rows[device["name"]] = QLabel(self)
+                row.setStyleSheet("font-size: 13px;")
+                self.row_layout.addWidget(row)
+            if row.text() != text:
+                row.setText(text)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+""" 수신/재생 스레드의 하트비트를 감시해서 멈추거나 죽은 구성 요소만 다시 시작하는 감시자 """
+import threading
+import time
+
+from eventlog import events
+from tracing import Histogram
+
+
+class Heartbeat:
+    """ 구성 요소 하나가 마지막으로 진행한 시각 (대입만 하므로 잠금 없이 핫 패스에서 호출) """
+
+    __slots__ = ("last", "grace", "active")
+
+    def __init__(self, active=True):
+        self.last = time.monotonic()
+        self.grace = 0.0  # 이번 박동 뒤로 조용해도 되는 추가 시간 (연결 시도, 재시도 대기 등)
+        self.active = active  # False면 감시하지 않음 (호출 중일 때만 감시하는 플레이어 등)
+
+    def beat(self, grace=0.0):
+        self.last = time.monotonic()
+        self.grace = grace
+
+    def enter(self, grace=0.0):
+        """ 감시 구간 시작 (플레이어 호출 등, 끝나면 leave) """
+        self.beat(grace)
+        self.active = True
+
+    def leave(self):
+        self.beat()
+        self.active = False
+
+    def silent_for(self, now):
+        """ 허용된 시간을 넘겨 조용했던 시간 (0 이하면 정상) """
+        if not self.active:
+            return 0.0
+        return now - self.last - self.grace
+
+
+class Component:
+    """ 감시 대상 하나의 상태와 재시작 기록 """
+
+    def __init__(self, name, heartbeat, run, abort, alive, waits_on, deadline):
+        self.name = name
+        self.heartbeat = heartbeat
+        self.run = run  # 있으면 재시작할 때 새 스레드에서 실행
+        self.abort = abort  # 멈춘 호출을 풀고 예전 루프를 끝내도록 함
+        self.alive = alive  # 스레드가 살아 있는지 (없으면 하트비트만 봄)
+        self.waits_on = waits_on  # 이 구성 요소를 기다리는 동안은 멈춘 것으로 보지 않음 (워커 → 플레이어)
+        self.deadline = deadline
+        self.thread = None
+        self.failed_at = None  # 멈춤을 감지한 시각 (복구되면 None)
+        self.restarted_at = None
+        self.hangs = 0  # 하트비트가 기한을 넘긴 횟수
+        self.deaths = 0  # 스레드가 예외로 끝난 횟수
+        self.restarts = 0
+        self.restart_errors = 0
+        self.last_recovery_ms = None
+        self.recovery = Histogram()  # 감지 → 복구 (µs)
+
+    def snapshot(self):
+        return {
+            "name": self.name,
+            "ok": self.failed_at is None,
+            "silent_s": max(0.0, time.monotonic() - self.heartbeat.last) if self.heartbeat.active else 0.0,
+            "hangs": self.hangs,
+            "deaths": self.deaths,
+            "restarts": self.restarts,
+            "restart_errors": self.restart_errors,
+            "last_recovery_ms": self.last_recovery_ms,
+            "recovery": self.recovery.snapshot(),
+        }
+
+
+class Supervisor(threading.Thread):
+    """ interval마다 모든 하트비트를 확인하고, 기한을 넘기거나 스레드가 죽은 구성 요소만 재시작 """
+
+    def __init__(self, deadline=5.0, interval=0.5):
+        super().__init__(name="supervisor", daemon=True)
+        self.deadline = deadline  # 기본 멈춤 판정 기한 (초)
+        self.interval = interval
+        self.components = {}
+        self.running = True
+        self.wakeup = threading.Event()
+
+    def watch(self, name, heartbeat, run=None, abort=None, alive=None, waits_on=None, deadline=None):
+        """ 이미 돌고 있는 구성 요소 감시 (QThread 등, 재시작부터는 감시자가 스레드를 띄움) """
+        component = Component(name, heartbeat, run, abort, alive, waits_on, deadline or self.deadline)
+        self.components[name] = component
+        return component
+
+    def spawn(self, name, run, heartbeat, abort=None, waits_on=None, deadline=None):
+        """ 감시자가 직접 스레드를 띄우는 구성 요소 """
+        component = self.watch(name, heartbeat, run, abort, waits_on=waits_on, deadline=deadline)
+        self._start_thread(component)
+        return component
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+    def run(self):
+        while not self.wakeup.wait(self.interval):
+            self.check()
+
+    def check(self, now=None):
+        """ 한 번 훑기 (멈춘 구성 요소를 재시작하고, 재시작한 것은 첫 박동을 복구로 기록) """
+        now = now if now is not None else time.monotonic()
+        for component in list(self.components.values()):
+            if not self.running:
+                return
+            heartbeat = component.heartbeat
+            if component.failed_at is not None:
+                if heartbeat.last > component.restarted_at and self._alive(component):
+                    self._recovered(component, heartbeat.last)
+                elif now - component.restarted_at > component.deadline:
+                    self._restart(component, now, "still_failed")  # 재시작해도 그대로면 기한마다 다시
+                continue
+
+            if component.alive is not None and not self._alive(component):
+                component.deaths += 1
+                self._restart(component, now, "thread_died")
+                continue
+            waits_on = component.waits_on
+            if waits_on is not None and waits_on.active:
+                continue  # 플레이어 호출을 기다리는 중: 멈췄다면 플레이어 쪽에서 처리
+            silent = heartbeat.silent_for(now)
+            if silent > component.deadline:
+                component.hangs += 1
+                self._restart(component, now, "hung", silent)
+
+    def snapshot(self):
+        return [component.snapshot() for component in list(self.components.values())]
+
+    def _alive(self, component):
+        return component.alive is None or component.alive()
+
+    def _restart(self, component, now, reason, silent=0.0):
+        if component.failed_at is None:
+            component.failed_at = now  # 복구 시간은 처음 감지한 때부터
+        events().event(reason, None, int(silent * 1000), text=component.name)
+        component.restarts += 1
+        component.restarted_at = time.monotonic()  # 이 뒤의 첫 박동이 복구
+        try:
+            if component.abort:
+                component.abort()
+            if component.run:
+                self._start_thread(component)
+        except Exception as e:
+            component.restart_errors += 1
+            events().event("restart_failed", None, text=f"{component.name}: {e}")
+
+    def _recovered(self, component, at):
+        elapsed_us = max(0.0, at - component.failed_at) * 1e6
+        component.recovery.record(elapsed_us)
+        component.last_recovery_ms = round(elapsed_us / 1000, 3)
+        component.failed_at = None
+        events().event("recovered", None, int(elapsed_us / 1000), text=component.name)
+
+    def _start_thread(self, component):
+        thread = threading.Thread(target=component.run, name=component.name, daemon=True)
+        thread.start()
+        component.thread = thread
+        component.alive = thread.is_alive
@@ -0,0 +1,6 @@
+""" 테스트가 저장소 최상위 모듈을 바로 import하도록 경로 추가, 이벤트 로그는 버림 """
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DDDS_EVENT_LOG", os.devnull)
@@ -0,0 +1,32 @@
+from debounce import TriggerFilter
+
+
+def test_repeat_within_window_is_suppressed():
+    f = TriggerFilter(window=0.05)
+    assert f.accept("a", "1", 10.0)
+    assert not f.accept("a", "1", 10.03)
+    assert f.accept("a", "1", 10.06)
+    assert (f.passed, f.suppressed) == (2, 1)
+    assert f.stats()["by_key"] == {"a/1": 1}
+
+
+def test_devices_and_codes_are_independent():
+    f = TriggerFilter(window=0.05)
+    assert f.accept("a", "1", 10.0)
+    assert f.accept("b", "1", 10.0)
+    assert f.accept("a", "2", 10.0)
+
+
+def test_code_window_overrides_device_window():
+    f = TriggerFilter(window=0.05, code_windows={"9": 1.0}, device_windows={"a": 0.0})
+    assert f.accept("a", "1", 10.0)
+    assert f.accept("a", "1", 10.001)  # 장치 창 0: 모두 통과
+    assert f.accept("a", "9", 10.0)
+    assert not f.accept("a", "9", 10.5)
+
+
+def test_table_is_bounded():
+    f = TriggerFilter(window=1.0, max_keys=4)
+    for code in range(10):
+        f.accept("a", str(code), 10.0)
+    assert len(f.entries) <= 4
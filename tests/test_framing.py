@@ -0,0 +1,30 @@
+from framing import LineFramer
+
+
+def test_message_split_across_reads():
+    framer = LineFramer()
+    assert list(framer.feed(b"12")) == []
+    assert list(framer.feed(b"3\n4\n")) == ["123", "4"]
+
+
+def test_overflow_drops_the_whole_line():
+    framer = LineFramer(bufsize=8)
+    # 구분자 없이 버퍼보다 긴 줄: 앞부분도 꼬리도 메시지로 나오면 안 됨
+    assert list(framer.feed(b"abcdefghijkl\n5\n")) == ["5"]
+    assert framer.overflows == 1
+    assert not framer.discarding
+
+
+def test_overflow_tail_in_later_read_is_dropped():
+    framer = LineFramer(bufsize=8)
+    assert list(framer.feed(b"abcdefghij")) == []
+    assert list(framer.feed(b"klm")) == []
+    assert list(framer.feed(b"nop\n6\n")) == ["6"]
+    assert framer.overflows == 1
+
+
+def test_reset_forgets_partial_message():
+    framer = LineFramer()
+    list(framer.feed(b"12"))
+    framer.reset()
+    assert list(framer.feed(b"3\n")) == ["3"]
@@ -0,0 +1,48 @@
+import pytest
+
+import loudness
+from loudness import DEFAULT_TARGET, track_gain
+
+
+def test_unknown_or_silent_track_is_left_alone():
+    assert track_gain(None, None) == 1.0
+    assert track_gain(-80.0, -60.0) == 1.0
+
+
+def test_gain_moves_toward_target():
+    assert track_gain(-16.0, -3.0) == 1.0
+    assert track_gain(-20.0, None) == pytest.approx(10 ** (4 / 20), abs=1e-4)
+    assert track_gain(-10.0, -0.5) == pytest.approx(10 ** (-6 / 20), abs=1e-4)
+
+
+def test_peak_ceiling_limits_boost():
+    # +10 dB면 목표에 맞지만 피크가 -5 dBTP라 -1 dBTP까지 +4 dB만
+    assert track_gain(-26.0, -5.0) == pytest.approx(10 ** (4 / 20), abs=1e-4)
+    assert track_gain(-26.0, float("-inf")) == pytest.approx(10 ** (10 / 20), abs=1e-4)
+
+
+def test_gain_is_clamped():
+    assert track_gain(-60.0, None) == pytest.approx(10 ** (12 / 20), abs=1e-4)
+    assert track_gain(0.0, None) == pytest.approx(10 ** (-12 / 20), abs=1e-4)
+
+
+@pytest.fixture
+def with_ffmpeg(monkeypatch):
+    monkeypatch.setattr(loudness.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.delenv(loudness.ENV_TARGET, raising=False)
+
+
+def test_target_zero_is_not_unset(with_ffmpeg, monkeypatch):
+    monkeypatch.setenv(loudness.ENV_TARGET, "-20")
+    assert loudness.create_loudness_analyzer(0).target == 0.0
+    assert loudness.create_loudness_analyzer().target == -20.0
+
+
+@pytest.mark.parametrize("value", ["loud", "nan", ""])
+def test_malformed_target_falls_back(with_ffmpeg, monkeypatch, value):
+    monkeypatch.setenv(loudness.ENV_TARGET, value)
+    assert loudness.create_loudness_analyzer().target == DEFAULT_TARGET
+
+
+def test_off_disables_analysis(with_ffmpeg):
+    assert loudness.create_loudness_analyzer("off") is None
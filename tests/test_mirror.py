@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import media_index
+from mirror import MirroredIndex
+
+
+@pytest.fixture
+def usb(tmp_path):
+    folder = tmp_path / "media" / "USB" / "final"
+    folder.mkdir(parents=True)
+    for i in range(3):
+        (folder / f"{i:03d}.mp3").write_bytes(os.urandom(2048))
+    return folder
+
+
+def mirrored(tmp_path):
+    return MirroredIndex(base_path=str(tmp_path / "media") + "/", mirror_dir=str(tmp_path / "mirror"))
+
+
+def test_sync_copies_and_plays_from_local_copy(tmp_path, usb):
+    index = mirrored(tmp_path)
+    assert index.refresh()
+    assert index.last_sync["copied"] == 3
+    assert sorted(index.by_file) == ["000.mp3", "001.mp3", "002.mp3"]
+    for name, entry in index.by_file.items():
+        assert entry.path.startswith(str(tmp_path / "mirror"))
+        with open(entry.path, "rb") as f:
+            assert f.read() == (usb / name).read_bytes()
+
+
+def test_restart_reuses_objects_and_survives_unplug(tmp_path, usb):
+    mirrored(tmp_path).refresh()
+
+    index = mirrored(tmp_path)
+    assert sorted(index.by_file) == ["000.mp3", "001.mp3", "002.mp3"]  # USB를 훑기 전에도 재생 가능
+    index.refresh()
+    assert (index.last_sync["copied"], index.last_sync["reused"]) == (0, 3)
+
+    for path in usb.iterdir():
+        path.unlink()
+    usb.rmdir()
+    index.refresh()
+    assert len(index.by_file) == 3
+
+
+def test_changed_and_removed_files_are_resynced(tmp_path, usb):
+    index = mirrored(tmp_path)
+    index.refresh()
+    (usb / "001.mp3").write_bytes(os.urandom(4096))
+    (usb / "002.mp3").unlink()
+
+    assert index.refresh()
+    assert index.last_sync["copied"] == 1
+    assert index.last_sync["removed"] == 1
+    assert sorted(index.by_file) == ["000.mp3", "001.mp3"]
+    assert index.by_file["001.mp3"].size == 4096
+    assert len(os.listdir(index.objects_dir)) == 2
+
+
+def test_copy_with_wrong_hash_is_not_published(tmp_path, usb, monkeypatch):
+    real_hash = media_index.file_hash
+    # 색인한 뒤 내용이 바뀐 것처럼: 색인 때의 해시와 복사하면서 계산한 해시가 다름
+    monkeypatch.setattr(media_index, "file_hash",
+                        lambda path: "0" * 32 if path.endswith("001.mp3") else real_hash(path))
+    index = mirrored(tmp_path)
+    index.refresh()
+
+    assert index.verify_errors == 1
+    assert index.last_sync["failed"] == 1
+    assert sorted(index.by_file) == ["000.mp3", "002.mp3"]
+    assert not [name for name in os.listdir(index.objects_dir) if name.endswith(".tmp")]
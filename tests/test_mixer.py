@@ -0,0 +1,140 @@
+import threading
+import types
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mixer import Mixer
+
+
+class FakeClip:
+    """ mmap 대신 bytes로 만든 PcmClip """
+
+    def __init__(self, samples, channels=1, sample_rate=8000):
+        self.data = memoryview(np.asarray(samples, dtype=np.int16).tobytes())
+        self.channels = channels
+        self.sample_rate = sample_rate
+
+    def willneed(self):
+        pass
+
+
+class FailingSink:
+    """ 처음 failures번은 BrokenPipeError, 그 뒤로는 받은 블록을 기록 """
+
+    def __init__(self, failures=1):
+        self.failures = failures
+        self.aborts = 0
+        self.blocks = []
+        self.written = threading.Event()
+
+    def write(self, data):
+        if self.failures:
+            self.failures -= 1
+            raise BrokenPipeError("aplay 죽음")
+        self.blocks.append(np.frombuffer(bytes(data), dtype=np.int16).copy())
+        self.written.set()
+        return len(data)
+
+    def abort(self):
+        self.aborts += 1
+
+    def close(self):
+        pass
+
+
+def make_mixer(sink, block_frames=4, **kwargs):
+    cache = types.SimpleNamespace(sample_rate=8000, channels=1)
+    return Mixer(cache, media=None, sink=sink, block_frames=block_frames, **kwargs)
+
+
+def start(mixer, name, samples, **kwargs):
+    channel = mixer.channel(name, **kwargs)
+    with mixer.cond:
+        channel.clip = FakeClip(samples)
+        channel.position = 0
+        mixer.cond.notify()
+    return channel
+
+
+def test_mixer_survives_failing_sink():
+    sink = FailingSink(failures=1)
+    mixer = make_mixer(sink)
+    try:
+        start(mixer, "a", [100] * 16)
+        assert sink.written.wait(2), "출력이 한 번 실패한 뒤 믹서 스레드가 멈춤"
+        assert sink.aborts == 1
+        assert mixer.sink_errors == 1
+        assert mixer.thread.is_alive()
+    finally:
+        mixer.close()
+
+
+class NullSink:
+    def write(self, data):
+        return len(data)
+
+    def abort(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def idle_mixer(**kwargs):
+    """ 출력 스레드 없이 mix()만 직접 호출하는 믹서 """
+    mixer = make_mixer(NullSink(), **kwargs)
+    mixer.close()
+    return mixer
+
+
+def block(mixer):
+    out, _ = mixer.mix()
+    return out.tolist()
+
+
+def test_q15_gain():
+    mixer = idle_mixer()
+    channel = start(mixer, "a", [1000, -1000, 32767, -32768])
+    channel.gain = 0.5
+    assert block(mixer) == [500, -500, 16383, -16384]
+
+
+def test_track_gain_multiplies_channel_gain():
+    mixer = idle_mixer()
+    channel = start(mixer, "a", [8000] * 4)
+    channel.gain = 0.5
+    channel.track_gain = 0.5
+    assert block(mixer) == [2000] * 4
+
+
+def test_sum_is_clipped_to_int16():
+    mixer = idle_mixer()
+    start(mixer, "a", [30000, -30000, 100, 0])
+    start(mixer, "b", [30000, -30000, 100, 0])
+    assert block(mixer) == [32767, -32768, 200, 0]
+
+
+def test_short_clip_leaves_silence_and_ends():
+    mixer = idle_mixer()
+    channel = start(mixer, "a", [100, 200])
+    assert block(mixer) == [100, 200, 0, 0]
+    assert not channel.active
+    assert mixer.mix() is None
+
+
+def test_ducking_ramps_down_and_back():
+    mixer = idle_mixer(duck_gain=0.25)  # 기본 attack 2블록, release 12블록
+    music = start(mixer, "music", [8000] * 64)
+    start(mixer, "notify", [0] * 8, ducks=True)
+
+    assert block(mixer) == [(8000 * int(0.625 * 32768)) >> 15] * 4
+    assert block(mixer) == [2000] * 4
+    assert music.duck == 0.25
+
+    # 알림이 끝나면 12블록에 걸쳐 원래 볼륨으로
+    assert block(mixer) == [(8000 * int((0.25 + 0.0625) * 32768)) >> 15] * 4
+    for _ in range(11):
+        block(mixer)
+    assert music.duck == pytest.approx(1.0)
@@ -0,0 +1,79 @@
+from protocol import ACK_WINDOW, HEADER, OP_ACK, LinkTracker, ProtocolFramer, ProtocolSender
+
+
+def link_after_hello(seq=0):
+    link = LinkTracker()
+    link.hello(seq, 0, 1)
+    return link
+
+
+def test_in_order_frames_ack_the_last_seq():
+    link = link_after_hello()
+    for seq in (1, 2, 3):
+        assert link.frame(seq, seq, 100)
+    assert link.ack_seq == 3
+    assert (link.lost, link.late, link.duplicates) == (0, 0, 0)
+
+
+def test_gap_holds_ack_until_late_frame_arrives():
+    link = link_after_hello()
+    link.frame(1, 1, 100)
+    link.frame(3, 3, 100)
+    assert link.ack_seq == 1  # 2가 빠졌으므로 장치는 2부터 다시 보내야 함
+    assert link.lost == 1
+
+    assert link.frame(2, 2, 100)
+    assert link.ack_seq == 3
+    assert (link.lost, link.late) == (0, 1)
+
+
+def test_duplicate_is_rejected_and_reacked():
+    link = link_after_hello()
+    link.frame(1, 1, 100)
+    link.frame(3, 3, 100)
+    link.ack_due = False
+
+    assert not link.frame(1, 1, 100)  # 이미 ack한 순번
+    assert not link.frame(3, 3, 100)  # ack 뒤에 먼저 받아 둔 순번
+    assert link.duplicates == 2
+    assert link.ack_due
+    assert link.ack_seq == 1
+
+
+def test_seq_wraparound():
+    link = link_after_hello(0xFFFE)
+    for seq in (0xFFFF, 0, 1):
+        assert link.frame(seq, 0, 100)
+    assert link.ack_seq == 1
+    assert link.lost == 0
+    assert not link.frame(0xFFFF, 0, 100)
+
+
+def test_gap_is_given_up_after_ack_window():
+    link = link_after_hello()
+    link.frame(1, 1, 100)
+    last = ACK_WINDOW + 10
+    for seq in range(3, last + 1):
+        link.frame(seq, seq, 100)
+    assert link.ack_seq == last  # 2는 포기하고 ACK가 앞으로 감
+    assert link.lost == 1
+
+
+def test_framer_acks_binary_frames_once_per_recv():
+    sender = ProtocolSender(clock=lambda: 1000)
+    framer = ProtocolFramer()
+    data = sender.hello() + sender.trigger("7") + sender.trigger("8")
+    assert list(framer.feed(data)) == ["7", "8"]
+
+    ack = framer.take_ack()
+    assert HEADER.unpack(ack)[:2] == (OP_ACK, 2)
+    assert framer.take_ack() is None
+
+    sender.on_ack(ack)
+    assert sender.acked == 2
+
+
+def test_text_device_gets_no_ack():
+    framer = ProtocolFramer()
+    assert list(framer.feed(b"1\n2\n")) == ["1", "2"]
+    assert framer.take_ack() is None
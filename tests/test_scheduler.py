@@ -0,0 +1,49 @@
+import pytest
+
+from scheduler import DROP_NEWEST, FIFO, LATEST, PREEMPT, TriggerScheduler
+
+
+def drain(scheduler):
+    items = []
+    while scheduler.has_pending():
+        items.append(scheduler.get(timeout=0).data)
+    return items
+
+
+@pytest.mark.parametrize("policy", [PREEMPT, LATEST])
+def test_single_slot_policies_keep_only_the_latest(policy):
+    scheduler = TriggerScheduler(policy)
+    for data in ("1", "2", "3"):
+        assert scheduler.put(data)
+    assert drain(scheduler) == ["3"]
+    assert scheduler.coalesced == 2
+    assert scheduler.preemptive == (policy == PREEMPT)
+
+
+def test_fifo_drops_oldest_by_default():
+    scheduler = TriggerScheduler(FIFO, maxsize=2)
+    for data in ("1", "2", "3"):
+        assert scheduler.put(data)
+    assert drain(scheduler) == ["2", "3"]
+    assert scheduler.dropped == 1
+
+
+def test_fifo_drop_newest_rejects_the_new_trigger():
+    scheduler = TriggerScheduler(FIFO, maxsize=2, overflow=DROP_NEWEST)
+    assert scheduler.put("1") and scheduler.put("2")
+    assert not scheduler.put("3")
+    assert drain(scheduler) == ["1", "2"]
+
+
+def test_get_times_out_and_close_wakes():
+    scheduler = TriggerScheduler(PREEMPT)
+    assert scheduler.get(timeout=0.01) is None
+    scheduler.put("1")
+    scheduler.close()
+    assert scheduler.get(timeout=0.01) is None
+    assert not scheduler.put("2")
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        TriggerScheduler("random")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+""" 트리거별 구간 시각 기록과 장치/단계별 지연 히스토그램 """
+import json
+import signal
+import sys
+import threading
+import time
+
+# 트리거 하나가 지나가는 단계 (순서대로)
+STAGES = ("received", "parsed", "enqueued", "dequeued", "stopped", "started", "first_audio")
+
+
+class Histogram:
+    """ HDR 방식의 로그-선형 히스토그램 (µs 단위, 2의 거듭제곱 구간마다 16칸, 오차 약 6%) """
+
+    SUB_BUCKETS = 16
+    MAX_EXPONENT = 40  # 2^44 µs 이상은 마지막 칸에 기록
+
+    def __init__(self):
+        self.counts = [0] * (self.SUB_BUCKETS * (self.MAX_EXPONENT + 1))
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def bucket_index(cls, value):
+        if value < cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - 5  # value >> shift 가 16~31 사이가 되도록
+        index = cls.SUB_BUCKETS * (shift + 1) + (value >> shift) - cls.SUB_BUCKETS
+        return min(index, cls.SUB_BUCKETS * (cls.MAX_EXPONENT + 1) - 1)
+
+    @classmethod
+    def bucket_value(cls, index):
+        """ 칸의 대표값 (구간 하한) """
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        return (index % cls.SUB_BUCKETS + cls.SUB_BUCKETS) << shift
+
+    def record(self, value_us):
+        value_us = max(0, int(value_us))
+        index = self.bucket_index(value_us)
+        with self.lock:
+            self.counts[index] += 1
+            self.total += 1
+            self.sum += value_us
+            if value_us > self.max:
+                self.max = value_us
+
+    def merge(self, other):
+        """ 다른 히스토그램의 기록을 더함 (장치별 → 전체 집계용) """
+        with other.lock:
+            counts = list(other.counts)
+            total, value_sum, value_max = other.total, other.sum, other.max
+        with self.lock:
+            for index, count in enumerate(counts):
+                if count:
+                    self.counts[index] += count
+            self.total += total
+            self.sum += value_sum
+            self.max = max(self.max, value_max)
+
+    def cumulative(self, bounds_us):
+        """ 상한(µs)별 누적 개수, 전체 개수, 합계 (잠금 없이 복사해서 기록 스레드를 막지 않음) """
+        counts = list(self.counts)
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds_us:
+            while index < len(counts) and self.bucket_value(index + 1) <= bound:
+                seen += counts[index]
+                index += 1
+            result.append(seen)
+        return result, sum(counts), self.sum
+
+    def percentile(self, p):
+        with self.lock:
+            return self._percentile(p)
+
+    def snapshot(self):
+        """ 개수, 평균, p50/p90/p99, 최댓값 (ms) """
+        with self.lock:
+            if not self.total:
+                return {"count": 0}
+            return {
+                "count": self.total,
+                "mean_ms": self.sum / self.total / 1000,
+                "p50_ms": self._percentile(50) / 1000,
+                "p90_ms": self._percentile(90) / 1000,
+                "p99_ms": self._percentile(99) / 1000,
+                "max_ms": self.max / 1000,
+            }
+
+    def _percentile(self, p):
+        if not self.total:
+            return 0
+        target = max(1, int(self.total * p / 100 + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.bucket_value(index), self.max)
+        return self.max
+
+
+class Span:
+    """ 트리거 하나의 단계별 시각 (monotonic ns) """
+
+    __slots__ = ("tracer", "device", "times", "last")
+
+    def __init__(self, tracer, device, received_ns):
+        self.tracer = tracer
+        self.device = device
+        self.times = {"received": received_ns}
+        self.last = received_ns
+
+    def mark(self, stage, at_ns=None):
+        """ 단계 도달 시각 기록 (같은 단계는 처음 한 번만) """
+        if stage in self.times:
+            return
+        now = at_ns if at_ns is not None else time.monotonic_ns()
+        self.times[stage] = now
+        self.tracer.record(self.device, stage, now - self.times["received"], now - self.last)
+        self.last = max(self.last, now)
+
+
+class Tracer:
+    """ 단계가 기록될 때마다 바로 히스토그램에 반영 (끝나지 않은 구간도 집계됨) """
+
+    def __init__(self):
+        # (장치, 단계) → (수신 시점부터 걸린 시간, 바로 앞 단계부터 걸린 시간)
+        self.histograms = {}
+        self.spans = 0
+        self.lock = threading.Lock()
+
+    def begin(self, device, received_ns=None):
+        """ 바이트를 받은 시점으로 새 구간 시작 """
+        self.spans += 1
+        return Span(self, device, received_ns if received_ns is not None else time.monotonic_ns())
+
+    def record(self, device, stage, total_ns, step_ns):
+        pair = self.histograms.get((device, stage))
+        if pair is None:
+            with self.lock:
+                pair = self.histograms.setdefault((device, stage), (Histogram(), Histogram()))
+        pair[0].record(total_ns // 1000)
+        pair[1].record(step_ns // 1000)
+
+    def snapshot(self):
+        """ {장치: {단계: {"since_received": ..., "since_previous": ...}}} (서비스 중에도 호출 가능) """
+        with self.lock:
+            items = list(self.histograms.items())
+
+        def order(item):
+            device, stage = item[0]
+            return str(device), STAGES.index(stage) if stage in STAGES else len(STAGES)
+
+        result = {}
+        for (device, stage), (total, step) in sorted(items, key=order):
+            result.setdefault(str(device), {})[stage] = {
+                "since_received": total.snapshot(),
+                "since_previous": step.snapshot(),
+            }
+        return result
+
+
+def install_signal_dump(tracer, signum=signal.SIGUSR1, stream=sys.stdout):
+    """ kill -USR1 <pid> 으로 현재 히스토그램을 JSON으로 출력 (메인 스레드에서 호출) """
+    def dump(_signum, _frame):
+        stream.write(json.dumps(tracer.snapshot(), ensure_ascii=False) + "\n")
+        stream.flush()
+
+    signal.signal(signum, dump)
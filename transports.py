@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+""" 트리거 전송 계층 (RFCOMM / TCP / Unix 소켓 / UDP 멀티캐스트), 주소 문자열 하나로 선택
+
+    08:D1:F9:26:65:D2               RFCOMM (채널은 기본값)
+    rfcomm://08:D1:F9:26:65:D2/1    RFCOMM 채널 1
+    tcp://192.168.0.10:7000         TCP 서버에 연결
+    unix:///run/ddds/trigger.sock   Unix 도메인 소켓에 연결
+    udp://239.0.0.1:7001            UDP 멀티캐스트 그룹 가입 (유니캐스트 주소면 그 포트에서 수신만)
+"""
+import abc
+import ipaddress
+import os
+import socket
+import struct
+
+from framing import DatagramFramer
+from protocol import ProtocolFramer
+
+ENV_ADDRESSES = "DDDS_TRANSPORTS"  # 쉼표로 구분한 주소 목록 (코드에 적힌 MAC 대신 사용)
+
+
+def pybluez_connect(address, port=1):
+    """ PyBluez RFCOMM 소켓으로 블로킹 연결 """
+    try:
+        import bluetooth  # 표준 socket에 AF_BLUETOOTH가 없을 때만 로드
+    except ImportError:
+        raise OSError("RFCOMM을 쓸 수 없음 (AF_BLUETOOTH도 PyBluez도 없음)") from None
+
+    sock = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
+    try:
+        sock.connect((address, port))
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+class Transport(abc.ABC):
+    """ 연결 방법 하나 (블로킹 connect는 스레드용, connect_async는 asyncio 허브용) """
+
+    def __init__(self, address):
+        self.address = address  # 원래 주소 문자열 (장치 이름으로도 사용)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.address!r})"
+
+    @abc.abstractmethod
+    def connect(self):
+        """ 연결된 블로킹 소켓 """
+
+    @abc.abstractmethod
+    async def connect_async(self):
+        """ 이벤트 루프에 등록할 논블로킹 소켓 """
+
+    def make_framer(self):
+        return ProtocolFramer()
+
+
+class StreamTransport(Transport):
+    """ 연결형 소켓 (RFCOMM / TCP / Unix), 바이트 스트림을 줄 단위로 조립 """
+
+    family = None
+    proto = 0
+
+    def __init__(self, address, target):
+        super().__init__(address)
+        self.target = target  # socket.connect에 넘길 주소
+
+    def connect(self):
+        sock = socket.socket(self.family, socket.SOCK_STREAM, self.proto)
+        try:
+            sock.connect(self.target)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    async def connect_async(self):
+        import asyncio  # 스레드 방식 수신만 쓰는 데몬은 asyncio를 로드하지 않음 (기동 시간)
+
+        sock = socket.socket(self.family, socket.SOCK_STREAM, self.proto)
+        sock.setblocking(False)
+        try:
+            await asyncio.get_running_loop().sock_connect(sock, self.target)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+
+class RfcommTransport(StreamTransport):
+    """ ESP32 SerialBT (표준 socket의 AF_BLUETOOTH, 없으면 PyBluez) """
+
+    def __init__(self, address, mac, channel=1):
+        super().__init__(address, (mac, channel))
+        if hasattr(socket, "AF_BLUETOOTH"):
+            self.family = socket.AF_BLUETOOTH
+            self.proto = socket.BTPROTO_RFCOMM
+
+    def connect(self):
+        if self.family is None:
+            return pybluez_connect(*self.target)
+        return super().connect()
+
+    async def connect_async(self):
+        if self.family is None:
+            raise OSError("이 파이썬은 AF_BLUETOOTH를 지원하지 않음")
+        return await super().connect_async()
+
+
+class TcpTransport(StreamTransport):
+    family = socket.AF_INET
+
+
+class UnixTransport(StreamTransport):
+    family = socket.AF_UNIX
+
+
+class UdpTransport(Transport):
+    """ UDP 수신 (멀티캐스트 주소면 그룹에 가입), 데이터그램 하나가 메시지 하나 """
+
+    def __init__(self, address, host, port, rcvbuf=1 << 20):
+        super().__init__(address)
+        self.host = host
+        self.port = port
+        self.rcvbuf = rcvbuf  # 순간적인 폭주에도 커널에서 버려지지 않도록
+
+    def connect(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+            except OSError:
+                pass
+
+            if ipaddress.ip_address(self.host).is_multicast:
+                sock.bind(("", self.port))
+                membership = struct.pack("4s4s", socket.inet_aton(self.host), socket.inet_aton("0.0.0.0"))
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+            else:
+                sock.bind((self.host, self.port))
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    async def connect_async(self):
+        sock = self.connect()
+        sock.setblocking(False)
+        return sock
+
+    def make_framer(self):
+        return DatagramFramer()
+
+
+def _host_port(rest, address):
+    host, sep, port = rest.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"포트가 없는 주소: {address}")
+    return host.strip("[]"), int(port)
+
+
+def open_transport(address, channel=1):
+    """ 주소 문자열 → Transport (scheme이 없으면 RFCOMM MAC 주소로 봄) """
+    scheme, sep, rest = address.partition("://")
+    if not sep:
+        return RfcommTransport(address, address, channel)
+
+    if scheme == "rfcomm":
+        mac, _, port = rest.partition("/")
+        return RfcommTransport(address, mac, int(port) if port else channel)
+    if scheme == "tcp":
+        return TcpTransport(address, _host_port(rest, address))
+    if scheme == "unix":
+        return UnixTransport(address, rest)
+    if scheme == "udp":
+        host, port = _host_port(rest, address)
+        return UdpTransport(address, host, port)
+    raise ValueError(f"알 수 없는 전송 방식: {address}")
+
+
+def connect(address, channel=1):
+    """ 블로킹 연결 (pipeline.TriggerReceiver의 connect 자리에 사용) """
+    return open_transport(address, channel).connect()
+
+
+async def connect_async(address):
+    """ 논블로킹 연결 (hub.DeviceHub의 connect 자리에 사용) """
+    return await open_transport(address).connect_async()
+
+
+def make_framer(address):
+    """ 주소에 맞는 프레이머 (UDP는 데이터그램 단위, 나머지는 줄 단위 또는 HELLO로 협상한 바이너리) """
+    if isinstance(address, str) and address.startswith("udp://"):
+        return DatagramFramer()
+    return ProtocolFramer()
+
+
+def configured_addresses(default):
+    """ 환경 변수에 주소 목록이 있으면 그것을, 없으면 기본 목록 """
+    value = os.environ.get(ENV_ADDRESSES, "")
+    addresses = [a.strip() for a in value.split(",") if a.strip()]
+    return addresses or list(default)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+""" 트리거 매니페스트 (코드 → 트랙/게인/우선순위/채널을 선언한 JSON)를 불변 조회표로 컴파일
+
+    {"codes": {"1": "stemon1.mp3",
+               "5": ["intro.mp3", "stemon2.mp3", "outro.mp3"],
+               "9": {"file": "alarm.mp3", "gain": 0.8, "priority": 10, "channel": "alarm"}}}
+"""
+import hashlib
+import json
+import os
+import types
+
+MANIFEST_NAME = "triggers.json"  # USB 'final/' 폴더 안에 두면 클립과 함께 들고 다님
+DEFAULT_MANIFEST = os.path.expanduser("~/.config/ddds/triggers.json")  # USB에 없을 때 쓰는 로컬 매니페스트
+ENV_PATH = "DDDS_TRIGGERS"  # 지정하면 이 파일이 가장 우선
+
+MAX_GAIN = 2.0  # 믹서의 Q15 곱셈이 int32를 넘지 않는 한도
+
+
+class Binding:
+    """ 코드 하나의 선언 (컴파일된 뒤에는 바꾸지 않음) """
+
+    __slots__ = ("code", "files", "gain", "priority", "channel")
+
+    def __init__(self, code, files, gain=1.0, priority=0, channel=None):
+        self.code = code
+        self.files = files  # 이어서 재생할 파일 이름 튜플 (하나면 단일 트랙)
+        self.gain = gain  # 볼륨 배율 (믹서 채널에 적용)
+        self.priority = priority  # 재생 중인 것보다 낮으면 끊지 않음
+        self.channel = channel  # 믹서 채널 이름 (None이면 보낸 장치의 채널)
+
+    def __repr__(self):
+        return f"Binding({self.code!r}, {self.files}, gain={self.gain}, priority={self.priority})"
+
+
+class TriggerMap:
+    """ 코드 → Binding 조회표 (읽기 전용, 바뀌면 새 표를 만들어 참조째 교체) """
+
+    __slots__ = ("bindings", "source", "digest")
+
+    def __init__(self, bindings, source=None, digest=None):
+        self.bindings = types.MappingProxyType(bindings)
+        self.source = source  # 읽어 온 파일 (기본 매핑이면 None)
+        self.digest = digest  # 파일 내용 해시 (같은 내용을 다시 읽으면 교체하지 않음)
+
+    def get(self, code):
+        return self.bindings.get(code)
+
+    def __len__(self):
+        return len(self.bindings)
+
+    def files(self):
+        """ 매핑에 나오는 모든 파일 이름 """
+        return {name for binding in self.bindings.values() for name in binding.files}
+
+    @classmethod
+    def from_tables(cls, tracks, sequences=None):
+        """ 코드 → 파일 이름 / 코드 → 파일 이름들 사전에서 (매니페스트가 없을 때의 기본 매핑) """
+        codes = dict(tracks)
+        codes.update({code: list(names) for code, names in (sequences or {}).items()})
+        return compile_trigger_map({"codes": codes})
+
+
+def compile_trigger_map(data, source=None, digest=None):
+    """ 매니페스트 내용(dict) → TriggerMap (잘못된 선언이 하나라도 있으면 ValueError) """
+    where = source or "매니페스트"
+    if not isinstance(data, dict) or not isinstance(data.get("codes"), dict):
+        raise ValueError(f"{where}: 최상위에 'codes' 객체가 필요함")
+
+    bindings = {}
+    shared = {}  # 같은 파일 목록은 튜플 하나를 함께 씀 (코드 표를 만들 때도 한 번만 확인)
+    for code, spec in data["codes"].items():
+        code = code.strip()
+        if not code or "," in code:
+            raise ValueError(f"{where}: 코드 {code!r}: 비어 있거나 ','가 들어 있음 (','는 여러 코드 구분용)")
+        if isinstance(spec, (str, list)):
+            spec = {"files": spec}
+        elif not isinstance(spec, dict):
+            raise ValueError(f"{where}: 코드 {code!r}: 파일 이름, 목록 또는 객체여야 함")
+
+        files = spec.get("files", spec.get("file"))
+        if isinstance(files, str):
+            files = [files]
+        if not files or not isinstance(files, list) or not all(isinstance(name, str) and name for name in files):
+            raise ValueError(f"{where}: 코드 {code!r}: 'file' 또는 'files'가 필요함")
+        for name in files:
+            if "/" in name or name in (".", ".."):
+                raise ValueError(f"{where}: 코드 {code!r}: 경로 없이 파일 이름만 ('final/' 기준): {name!r}")
+
+        gain = spec.get("gain", 1.0)
+        if isinstance(gain, bool) or not isinstance(gain, (int, float)) or not 0.0 <= gain <= MAX_GAIN:
+            raise ValueError(f"{where}: 코드 {code!r}: gain은 0~{MAX_GAIN} 사이의 수")
+        priority = spec.get("priority", 0)
+        if isinstance(priority, bool) or not isinstance(priority, int):
+            raise ValueError(f"{where}: 코드 {code!r}: priority는 정수")
+        channel = spec.get("channel")
+        if channel is not None and (not isinstance(channel, str) or not channel):
+            raise ValueError(f"{where}: 코드 {code!r}: channel은 문자열")
+
+        files = tuple(files)
+        bindings[code] = Binding(code, shared.setdefault(files, files), float(gain), priority, channel)
+
+    if digest is None:
+        digest = _digest(json.dumps(data, sort_keys=True).encode("utf-8"))
+    return TriggerMap(bindings, source, digest)
+
+
+def load_trigger_map(path):
+    """ 매니페스트 파일 → TriggerMap (읽지 못하면 OSError, 내용이 잘못되면 ValueError) """
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"{path}: JSON 오류: {e}") from None
+    return compile_trigger_map(data, path, _digest(raw))
+
+
+def _digest(raw):
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()